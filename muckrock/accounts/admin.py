@@ -19,6 +19,7 @@ from muckrock.accounts.models import (
     Profile,
     ReceiptEmail,
     RecurringDonation,
+    RequestCredit,
     Statistics,
 )
 from muckrock.agency.models import Agency
@@ -176,7 +177,35 @@ class RecurringDonationAdmin(VersionAdmin):
                      self).save_model(request, obj, form, change)
 
 
+class RequestCreditAdmin(admin.ModelAdmin):
+    """Request credit admin options
+    The ledger is append only, so credits may not be edited"""
+    list_display = (
+        'datetime',
+        'profile',
+        'organization',
+        'kind',
+        'amount',
+        'reason',
+    )
+    list_select_related = ('profile__user', 'organization')
+    list_filter = ('kind', 'reason')
+    search_fields = ('profile__user__username', 'organization__name')
+    date_hierarchy = 'datetime'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_readonly_fields(self, request, obj=None):
+        """All fields are read only"""
+        return [f.name for f in self.model._meta.fields]
+
+
 admin.site.register(Statistics, StatisticsAdmin)
 admin.site.unregister(User)
 admin.site.register(User, MRUserAdmin)
 admin.site.register(RecurringDonation, RecurringDonationAdmin)
+admin.site.register(RequestCredit, RequestCreditAdmin)
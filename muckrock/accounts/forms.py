@@ -309,7 +309,10 @@ class BuyRequestForm(StripeForm):
             },
             idempotency_key=True,
         )
-        recipient.profile.add_requests(num_requests)
+        recipient.profile.add_requests(
+            num_requests,
+            'purchase' if recipient == self.user else 'gift',
+        )
 
     def get_price(self, num_requests):
         """Get the price for the requests"""
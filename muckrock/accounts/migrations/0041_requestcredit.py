@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0004_organization_private'),
+        ('accounts', '0040_auto_20180518_1255'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestCredit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[(b'regular', b'Regular'), (b'monthly', b'Monthly'), (b'org', b'Organization')], max_length=7)),
+                ('amount', models.IntegerField(help_text=b'Positive for credits, negative for debits')),
+                ('reason', models.CharField(choices=[(b'purchase', b'Purchase'), (b'gift', b'Gift'), (b'reset', b'Monthly reset'), (b'plan', b'Plan change'), (b'request', b'Request filed'), (b'return', b'Request returned')], max_length=8)),
+                ('datetime', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_credits', to='organization.Organization')),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_credits', to='accounts.Profile')),
+            ],
+        ),
+    ]
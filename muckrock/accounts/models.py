@@ -8,6 +8,7 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.core.urlresolvers import reverse
 from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 # Standard Library
@@ -48,6 +49,15 @@ ACCT_TYPES = [
 PAYMENT_FEE = .05
 
 
+def reset_due(date_update):
+    """Have the monthly requests not been reset yet this month"""
+    today = date.today()
+    return (
+        date_update is None
+        or (date_update.year, date_update.month) != (today.year, today.month)
+    )
+
+
 class Profile(models.Model):
     """User profile information for muckrock"""
     # pylint: disable=too-many-public-methods
@@ -202,31 +212,69 @@ class Profile(models.Model):
         return self.organization
 
     def get_monthly_requests(self):
-        """Get the number of requests left for this month"""
+        """Get the number of requests left for this month
+        This does not lock or write to the profile - if the requests have
+        not been reset yet this month, it is what they will be reset to"""
+        if reset_due(self.date_update):
+            return settings.MONTHLY_REQUESTS.get(self.acct_type, 0)
+        return self.monthly_requests
+
+    def reset_monthly_requests(self):
+        """Reset the monthly requests if they have not been reset yet this
+        month.  The caller must hold a lock on the profile and save it."""
+        if reset_due(self.date_update):
+            monthly_requests = settings.MONTHLY_REQUESTS.get(self.acct_type, 0)
+            RequestCredit.objects.record(
+                monthly_requests - self.monthly_requests,
+                'monthly',
+                'reset',
+                profile=self,
+            )
+            self.date_update = date.today()
+            self.monthly_requests = monthly_requests
+
+    @classmethod
+    def reset_all_monthly_requests(cls):
+        """Reset the monthly requests of every profile which has not been
+        reset yet this month"""
+        today = date.today()
         with transaction.atomic():
-            profile = Profile.objects.select_for_update().get(pk=self.pk)
-            not_this_month = profile.date_update.month != date.today().month
-            not_this_year = profile.date_update.year != date.today().year
-            # update requests if they have not yet been updated this month
-            if not_this_month or not_this_year:
-                profile.date_update = date.today()
-                profile.monthly_requests = settings.MONTHLY_REQUESTS.get(
-                    profile.acct_type, 0
+            profiles = (
+                cls.objects.select_for_update()
+                .filter(date_update__lt=today.replace(day=1))
+            )
+            RequestCredit.objects.bulk_create(
+                RequestCredit(
+                    profile_id=pk,
+                    kind='monthly',
+                    amount=settings.MONTHLY_REQUESTS.get(acct_type, 0) -
+                    monthly_requests,
+                    reason='reset',
+                ) for pk, acct_type, monthly_requests in profiles.values_list(
+                    'pk', 'acct_type', 'monthly_requests'
+                ) if settings.MONTHLY_REQUESTS.get(acct_type, 0) !=
+                monthly_requests
+            )
+            for acct_type, _ in ACCT_TYPES:
+                profiles.filter(acct_type=acct_type).update(
+                    monthly_requests=settings.MONTHLY_REQUESTS.get(
+                        acct_type, 0
+                    ),
+                    date_update=today,
                 )
-                profile.save()
-            return profile.monthly_requests
 
     def total_requests(self):
         """Get sum of paid for requests and monthly requests"""
         org_reqs = self.organization.get_requests() if self.organization else 0
         return self.num_requests + self.get_monthly_requests() + org_reqs
 
-    def add_requests(self, num):
+    def add_requests(self, num, reason='purchase'):
         """Add requests to the profile"""
         with transaction.atomic():
-            profile = Profile.objects.select_for_update().get(pk=self.id)
-            profile.num_requests += num
-            profile.save()
+            Profile.objects.filter(pk=self.pk).update(
+                num_requests=F('num_requests') + num
+            )
+            RequestCredit.objects.record(num, 'regular', reason, profile=self)
 
     def multiple_requests(self, num):
         """How many requests of each type would be used for this user to make
@@ -265,12 +313,33 @@ class Profile(models.Model):
             if request_count['extra'] > 0:
                 raise InsufficientRequestsError(request_count['extra'])
 
+            profile.reset_monthly_requests()
             profile.num_requests -= request_count['regular']
             profile.monthly_requests -= request_count['monthly']
             profile.save()
+            RequestCredit.objects.record(
+                -request_count['regular'],
+                'regular',
+                'request',
+                profile=profile,
+            )
+            RequestCredit.objects.record(
+                -request_count['monthly'],
+                'monthly',
+                'request',
+                profile=profile,
+            )
             if profile.organization:
+                profile.organization.reset_requests()
                 profile.organization.num_requests -= request_count['org']
                 profile.organization.save()
+                RequestCredit.objects.record(
+                    -request_count['org'],
+                    'org',
+                    'request',
+                    organization=profile.organization,
+                    profile=profile,
+                )
         return request_count
 
     def customer(self):
@@ -334,8 +403,15 @@ class Profile(models.Model):
             profile = Profile.objects.select_for_update().get(pk=self.pk)
             profile.subscription_id = subscription.id
             profile.acct_type = 'pro'
+            monthly_requests = settings.MONTHLY_REQUESTS.get('pro', 0)
+            RequestCredit.objects.record(
+                monthly_requests - profile.monthly_requests,
+                'monthly',
+                'plan',
+                profile=profile,
+            )
             profile.date_update = date.today()
-            profile.monthly_requests = settings.MONTHLY_REQUESTS.get('pro', 0)
+            profile.monthly_requests = monthly_requests
             profile.save()
         return subscription
 
@@ -372,7 +448,14 @@ class Profile(models.Model):
             profile = Profile.objects.select_for_update().get(pk=self.pk)
             profile.subscription_id = ''
             profile.acct_type = 'basic'
-            profile.monthly_requests = settings.MONTHLY_REQUESTS.get('basic', 0)
+            monthly_requests = settings.MONTHLY_REQUESTS.get('basic', 0)
+            RequestCredit.objects.record(
+                monthly_requests - profile.monthly_requests,
+                'monthly',
+                'plan',
+                profile=profile,
+            )
+            profile.monthly_requests = monthly_requests
             profile.payment_failed = False
             profile.save()
         self.refresh_from_db()
@@ -421,6 +504,78 @@ class Profile(models.Model):
         return self.acct_type not in ('admin', 'agency')
 
 
+class RequestCreditQuerySet(models.QuerySet):
+    """Object manager for request credits"""
+
+    def record(self, amount, kind, reason, profile=None, organization=None):
+        """Record a change to a balance, if there was one"""
+        # pylint: disable=too-many-arguments
+        if amount:
+            return self.create(
+                amount=amount,
+                kind=kind,
+                reason=reason,
+                profile=profile,
+                organization=organization,
+            )
+        return None
+
+
+class RequestCredit(models.Model):
+    """A change to a profile's or organization's request balance
+
+    This is an append only history of the credits and debits made by the
+    site, for auditing.  The balances themselves are kept on the profile
+    and organization, so reading them needs no locks or sums.  Balances from
+    before the history was kept, and edits made in the admin, are not
+    recorded, so the history does not add up to the balances.
+    """
+    profile = models.ForeignKey(
+        Profile,
+        related_name='request_credits',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    organization = models.ForeignKey(
+        'organization.Organization',
+        related_name='request_credits',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    kind = models.CharField(
+        max_length=7,
+        choices=(
+            ('regular', 'Regular'),
+            ('monthly', 'Monthly'),
+            ('org', 'Organization'),
+        ),
+    )
+    amount = models.IntegerField(
+        help_text='Positive for credits, negative for debits'
+    )
+    reason = models.CharField(
+        max_length=8,
+        choices=(
+            ('purchase', 'Purchase'),
+            ('gift', 'Gift'),
+            ('reset', 'Monthly reset'),
+            ('plan', 'Plan change'),
+            ('request', 'Request filed'),
+            ('return', 'Request returned'),
+        ),
+    )
+    datetime = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = RequestCreditQuerySet.as_manager()
+
+    def __unicode__(self):
+        return u'%+d %s requests (%s)' % (
+            self.amount, self.kind, self.get_reason_display()
+        )
+
+
 class ReceiptEmail(models.Model):
     """An additional email address to send receipts to"""
     user = models.ForeignKey(
@@ -22,6 +22,7 @@ from raven.contrib.celery import register_logger_signal, register_signal
 
 # MuckRock
 from muckrock.accounts.models import Profile, Statistics
+from muckrock.accounts.widgets import take_snapshot
 from muckrock.agency.models import Agency
 from muckrock.communication.models import (
     EmailCommunication,
@@ -67,6 +68,27 @@ register_logger_signal(client)
 register_signal(client)
 
 
+@periodic_task(
+    run_every=crontab(minute='*'),
+    name='muckrock.accounts.tasks.snapshot_dashboard',
+)
+def snapshot_dashboard():
+    """Compute the dashboard's widgets in the background, so polling the
+    dashboard does not query the database"""
+    take_snapshot()
+
+
+@periodic_task(
+    run_every=crontab(day_of_month=1, hour=0, minute=5),
+    name='muckrock.accounts.tasks.reset_monthly_requests',
+)
+def reset_monthly_requests():
+    """Reset the monthly requests for all users and organizations, so
+    reading a balance never needs to reset it"""
+    Profile.reset_all_monthly_requests()
+    Organization.reset_all_requests()
+
+
 @periodic_task(
     run_every=crontab(hour=0, minute=30),
     name='muckrock.accounts.tasks.store_statistics'
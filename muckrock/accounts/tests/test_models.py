@@ -14,7 +14,7 @@ from mock import ANY, Mock, patch
 from nose.tools import assert_false, assert_true, eq_, nottest, ok_, raises
 
 # MuckRock
-from muckrock.accounts.models import Notification
+from muckrock.accounts.models import Notification, Profile
 from muckrock.core.factories import (
     NotificationFactory,
     OrganizationFactory,
@@ -96,13 +96,45 @@ class TestProfileUnit(TestCase):
         eq_(self.profile.get_monthly_requests(), self.profile.monthly_requests)
 
     def test_monthly_requests_refresh(self):
-        """Get number requests resets the number of requests if its been over a month"""
-        self.profile.date_update = date.today() - timedelta(32)
+        """Get number requests returns the reset number of requests if its
+        been over a month, without writing the reset"""
+        last_month = date.today() - timedelta(32)
+        self.profile.date_update = last_month
+        self.profile.monthly_requests = 0
         self.profile.save()
         monthly_requests = settings.MONTHLY_REQUESTS[self.profile.acct_type]
         eq_(self.profile.get_monthly_requests(), monthly_requests)
         self.profile.refresh_from_db()
+        eq_(self.profile.date_update, last_month)
+
+    def test_reset_all_monthly_requests(self):
+        """The monthly reset job resets the requests and records the credit"""
+        self.profile.date_update = date.today() - timedelta(32)
+        self.profile.monthly_requests = 0
+        self.profile.save()
+        Profile.reset_all_monthly_requests()
+        self.profile.refresh_from_db()
+        monthly_requests = settings.MONTHLY_REQUESTS[self.profile.acct_type]
         eq_(self.profile.date_update, date.today())
+        eq_(self.profile.monthly_requests, monthly_requests)
+        credit = self.profile.request_credits.get()
+        eq_(credit.amount, monthly_requests)
+        eq_(credit.reason, 'reset')
+
+    def test_make_requests_ledger(self):
+        """Making requests debits the balances and records the debits"""
+        self.profile.num_requests = 5
+        self.profile.monthly_requests = 2
+        self.profile.date_update = date.today()
+        self.profile.save()
+        self.profile.make_requests(3)
+        self.profile.refresh_from_db()
+        eq_(self.profile.monthly_requests, 0)
+        eq_(self.profile.num_requests, 4)
+        eq_(
+            dict(self.profile.request_credits.values_list('kind', 'amount')),
+            {'monthly': -2, 'regular': -1},
+        )
 
     def test_customer(self):
         """Test accessing the profile's Stripe customer"""
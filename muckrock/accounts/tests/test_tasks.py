@@ -3,13 +3,19 @@ Tests tasks for the Accounts application
 """
 
 # Django
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+# Standard Library
+from datetime import date, timedelta
 
 # Third Party
+from mock import patch
 from nose.tools import eq_
 
 # MuckRock
-from muckrock.accounts import models, tasks
+from muckrock.accounts import models, tasks, widgets
+from muckrock.core.factories import StatisticsFactory
 
 
 class TestStatisticsTask(TestCase):
@@ -24,3 +30,40 @@ class TestStatisticsTask(TestCase):
             new_stat_count, stat_count + 1,
             'A new Statistics object should be created.'
         )
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestDashboardSnapshot(TestCase):
+    """The dashboard should be served from a snapshot"""
+
+    def setUp(self):
+        cache.clear()
+
+    @patch(
+        'muckrock.accounts.widgets.TopWidget.get_snapshot',
+        return_value={'ProUserCountWidget': {'value': '1'}},
+    )
+    def test_snapshot(self, mock_get_snapshot):
+        """Polling the dashboard should not recompute the snapshot"""
+        tasks.snapshot_dashboard()
+        eq_(mock_get_snapshot.call_count, 1)
+        eq_(
+            widgets.TopWidget().get_context(),
+            {'ProUserCountWidget': {'value': '1'}},
+        )
+        eq_(mock_get_snapshot.call_count, 1)
+
+    def test_graph_series(self):
+        """Graphs should plot the latest statistics, oldest first"""
+        today = date.today()
+        for i in range(3):
+            StatisticsFactory(date=today - timedelta(i), pro_users=i)
+        widget = widgets.ProUserGraphWidget()
+        widget.days = 2
+        eq_(widget.get_data(), [{'x': 0, 'y': 1}, {'x': 1, 'y': 0}])
@@ -23,6 +23,7 @@ from smart_open import smart_open
 
 # MuckRock
 from muckrock.accounts.models import Profile, Statistics
+from muckrock.core import caching
 from muckrock.core.models import ExtractDay
 from muckrock.core.utils import cache_get_or_set
 from muckrock.crowdsource.models import CrowdsourceResponse
@@ -34,6 +35,35 @@ RED = '#dc5945'
 GREEN = '#96bf48'
 BLUE = '#12b0c5'
 
+SNAPSHOT_KEY = 'dashboard:snapshot'
+
+
+def _latest_stat(field):
+    """Get a single field from the latest statistics"""
+    return Statistics.objects.values_list(field, flat=True).first()
+
+
+def _month_ago_stat(field):
+    """Get a single field from the statistics from about a month ago"""
+    # get 30th newest stat ~1 month ago
+    return list(Statistics.objects.values_list(field, flat=True)[:30])[-1]
+
+
+def _stat_series(days, *fields):
+    """Get the fields from the statistics for the last `days` days, oldest
+    first"""
+    return list(Statistics.objects.values_list(*fields)[:days])[::-1]
+
+
+DAILY_REQUEST_FIELDS = (
+    'daily_requests_pro',
+    'daily_requests_basic',
+    'daily_requests_beta',
+    'daily_requests_proxy',
+    'daily_requests_admin',
+    'daily_requests_org',
+)
+
 # Widgets to inherit from
 
 
@@ -104,11 +134,8 @@ class StatGraphWidget(GraphWidget):
 
     def get_data(self):
         """Get graph data"""
-        stats = Statistics.objects.all()[:self.days:-1]
-        return [{
-            'x': i,
-            'y': getattr(stat, self.stat)
-        } for i, stat in enumerate(stats)]
+        stats = _stat_series(self.days, self.stat)
+        return [{'x': i, 'y': stat} for i, (stat,) in enumerate(stats)]
 
 
 # Concrete widgets
@@ -125,7 +152,7 @@ class ProcessingDaysWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        return Statistics.objects.latest('date').requests_processing_days
+        return _latest_stat('requests_processing_days')
 
 
 class ProcessingCountWidget(CompareNumberWidget):
@@ -139,7 +166,7 @@ class ProcessingCountWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        return Statistics.objects.latest('date').total_requests_submitted
+        return _latest_stat('total_requests_submitted')
 
 
 class OldestProcessingWidget(ListWidget):
@@ -183,7 +210,7 @@ class FlagDaysWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        return Statistics.objects.latest('date').flag_processing_days
+        return _latest_stat('flag_processing_days')
 
 
 class FlagCountWidget(CompareNumberWidget):
@@ -199,7 +226,7 @@ class FlagCountWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        return Statistics.objects.latest('date').total_unresolved_flagged_tasks
+        return _latest_stat('total_unresolved_flagged_tasks')
 
 
 class OldestFlagWidget(ListWidget):
@@ -269,20 +296,8 @@ class RequestsFiledGraphWidget(GraphWidget):
 
     def get_data(self):
         """Get graph data"""
-        stats = Statistics.objects.all()[:self.days:-1]
-        return [{
-            'x':
-                i,
-            'y':
-                sum([
-                    stat.daily_requests_pro,
-                    stat.daily_requests_basic,
-                    stat.daily_requests_beta,
-                    stat.daily_requests_proxy,
-                    stat.daily_requests_admin,
-                    stat.daily_requests_org,
-                ])
-        } for i, stat in enumerate(stats)]
+        stats = _stat_series(self.days, *DAILY_REQUEST_FIELDS)
+        return [{'x': i, 'y': sum(stat)} for i, stat in enumerate(stats)]
 
 
 class CrowdsourceRespondedUsersGraphWidget(StatGraphWidget):
@@ -318,15 +333,9 @@ class RequestsFiledWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        stat = Statistics.objects.latest('date')
-        return sum([
-            stat.daily_requests_pro,
-            stat.daily_requests_basic,
-            stat.daily_requests_beta,
-            stat.daily_requests_proxy,
-            stat.daily_requests_admin,
-            stat.daily_requests_org,
-        ])
+        return sum(
+            Statistics.objects.values_list(*DAILY_REQUEST_FIELDS).first()
+        )
 
 
 class RequestsSuccessWidget(CompareNumberWidget):
@@ -340,7 +349,7 @@ class RequestsSuccessWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        return Statistics.objects.latest('date').total_requests_success
+        return _latest_stat('total_requests_success')
 
 
 class ProUserCountWidget(CompareNumberWidget):
@@ -355,9 +364,7 @@ class ProUserCountWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        # get 30th newest stat ~1 month ago
-        stat = list(Statistics.objects.all()[:30])[-1]
-        return stat.pro_users
+        return _month_ago_stat('pro_users')
 
 
 class OrgUserCountWidget(CompareNumberWidget):
@@ -377,9 +384,7 @@ class OrgUserCountWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        # get 30th newest stat ~1 month ago
-        stat = list(Statistics.objects.all()[:30])[-1]
-        return stat.total_active_org_members
+        return _month_ago_stat('total_active_org_members')
 
 
 class RecentRequestsWidget(ListWidget):
@@ -407,7 +412,7 @@ class PageCountWidget(CompareNumberWidget):
 
     def get_previous_value(self):
         """Get previous value"""
-        return Statistics.objects.latest('date').total_pages
+        return _latest_stat('total_pages')
 
 
 class RegisteredUsersWidget(GoalCompareNumberWidget):
@@ -515,6 +520,28 @@ class ProjectCountWidget(NumberWidget):
         return 'Total: {:,}'.format(Project.objects.count())
 
 
+class CacheHitRateWidget(NumberWidget):
+    """Show how often cached values are served instead of recomputed"""
+    title = 'Cache Hit Rate'
+
+    def get_value(self):
+        """Percent of gets served from the cache, fresh or stale"""
+        metrics = caching.get_metrics()
+        served = metrics['hit'] + metrics['stale']
+        total = served + metrics['miss']
+        if total == 0:
+            return 'N/A'
+        return '{:.1%}'.format(float(served) / total)
+
+    def get_detail(self):
+        """Stale hits and recomputes"""
+        metrics = caching.get_metrics()
+        return 'Stale: {:,} Recomputed: {:,}'.format(
+            metrics['stale'],
+            metrics['recompute'],
+        )
+
+
 # Top level widget to pull them all together into one request
 
 
@@ -543,11 +570,31 @@ class TopWidget(Widget):
             CrowdsourceResponsesGraphWidget(),
             PageViewsWidget(),
             ProjectCountWidget(),
+            CacheHitRateWidget(),
         ]
 
     def get_context(self):
-        """Return data for all widgets"""
+        """Return the latest snapshot of the data for all widgets
+        The snapshot is kept up to date by a periodic task, so polling the
+        dashboard does not run any queries"""
+        return caching.get_or_set(
+            SNAPSHOT_KEY,
+            self.get_snapshot,
+            settings.DASHBOARD_SNAPSHOT_TIMEOUT,
+        )
+
+    def get_snapshot(self):
+        """Compute the data for all widgets"""
         context = {}
         for widget in self.widgets:
             context[widget.__class__.__name__] = widget.get_context()
         return context
+
+
+def take_snapshot():
+    """Compute and store a new snapshot of the dashboard"""
+    caching.refresh(
+        SNAPSHOT_KEY,
+        TopWidget().get_snapshot,
+        settings.DASHBOARD_SNAPSHOT_TIMEOUT,
+    )
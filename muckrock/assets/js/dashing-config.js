@@ -111,3 +111,7 @@ dashboardRequest.addWidget('project_count_widget', 'Number', {
     getData: getData('ProjectCountWidget'),
     interval: interval
 });
+dashboardRequest.addWidget('cache_hit_rate_widget', 'Number', {
+    getData: getData('CacheHitRateWidget'),
+    interval: interval
+});
@@ -20,8 +20,10 @@ from muckrock.communication.models import (
     MailCommunication,
     PhoneNumber,
     PortalCommunication,
+    QueuedFax,
     WebCommunication,
 )
+from muckrock.foia.fax import get_stats as get_fax_stats
 
 
 class ReadOnlyMixin(object):
@@ -127,6 +129,37 @@ class FaxCommunicationAdmin(CommunicationLinkMixin, VersionAdmin):
     readonly_fields = fields
 
 
+class QueuedFaxAdmin(CommunicationLinkMixin, admin.ModelAdmin):
+    """Queued fax admin, showing the state of the fax queue"""
+    list_display = (
+        '__unicode__',
+        'priority',
+        'error_count',
+        'attempts',
+        'datetime_queued',
+        'send_after',
+    )
+    list_filter = ['priority']
+    fields = (
+        'comm_link',
+        'subject',
+        'error_count',
+        'attempts',
+        'priority',
+        'datetime_queued',
+        'send_after',
+    )
+    readonly_fields = ('comm_link', 'subject', 'error_count', 'datetime_queued')
+
+    def changelist_view(self, request, extra_context=None):
+        """Add the queue metrics"""
+        extra_context = extra_context or {}
+        extra_context['stats'] = get_fax_stats()
+        return super(QueuedFaxAdmin, self).changelist_view(
+            request, extra_context=extra_context
+        )
+
+
 class FaxCommunicationInline(admin.StackedInline):
     """Fax Communication Inline admin"""
     model = FaxCommunication
@@ -214,6 +247,7 @@ class AddressAdmin(VersionAdmin):
 
 admin.site.register(EmailCommunication, EmailCommunicationAdmin)
 admin.site.register(FaxCommunication, FaxCommunicationAdmin)
+admin.site.register(QueuedFax, QueuedFaxAdmin)
 admin.site.register(EmailAddress, EmailAddressAdmin)
 admin.site.register(PhoneNumber, PhoneNumberAdmin)
 admin.site.register(Address, AddressAdmin)
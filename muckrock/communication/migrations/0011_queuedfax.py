@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-07 14:21
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0061_auto_20180605_1405'),
+        ('communication', '0010_auto_20180307_1306'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedFax',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('error_count', models.PositiveSmallIntegerField(default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('priority', models.PositiveSmallIntegerField(choices=[(0, 'Initial request'), (1, 'Follow up')], default=1)),
+                ('datetime_queued', models.DateTimeField(default=django.utils.timezone.now)),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('communication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_faxes', to='foia.FOIACommunication')),
+            ],
+            options={
+                'verbose_name_plural': 'queued faxes',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='queuedfax',
+            index_together=set([('priority', 'send_after')]),
+        ),
+    ]
@@ -8,6 +8,7 @@ from django.core.urlresolvers import reverse
 from django.core.validators import validate_email
 from django.db import models
 from django.forms import ValidationError
+from django.utils import timezone
 
 # Standard Library
 from email.utils import getaddresses, parseaddr
@@ -347,6 +348,36 @@ class FaxCommunication(models.Model):
         return None
 
 
+class QueuedFax(models.Model):
+    """A fax waiting to be sent by the fax dispatcher"""
+    communication = models.ForeignKey(
+        'foia.FOIACommunication',
+        related_name='queued_faxes',
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    # how many times the fax has failed to be delivered
+    error_count = models.PositiveSmallIntegerField(default=0)
+    # how many times the fax has failed to be sent to the API
+    attempts = models.PositiveSmallIntegerField(default=0)
+    priority = models.PositiveSmallIntegerField(
+        choices=(
+            (0, 'Initial request'),
+            (1, 'Follow up'),
+        ),
+        default=1,
+    )
+    datetime_queued = models.DateTimeField(default=timezone.now)
+    send_after = models.DateTimeField(default=timezone.now)
+
+    def __unicode__(self):
+        return u'Queued Fax: %s' % self.communication_id
+
+    class Meta:
+        verbose_name_plural = 'queued faxes'
+        index_together = (('priority', 'send_after'),)
+
+
 class MailCommunication(models.Model):
     """A snail mail sent or received to deliver a communication"""
     communication = models.ForeignKey(
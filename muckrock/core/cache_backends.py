@@ -0,0 +1,298 @@
+"""
+A two tier cache backend
+
+A small in process cache sits in front of a shared cache, such as
+memcached, so values read over and over, like the sidebar broadcasts, are
+only fetched over the network every few seconds by each worker.
+
+Each worker's local values expire after a short timeout.  Writes go to the
+shared cache, and bump a generation counter stored there - the workers
+check the counter at most once every `CHECK_INTERVAL` seconds, and clear
+their local values when it has changed, so changes made by one worker are
+seen by the others within that interval.  `incr` and `decr` do not bump the
+generation, so counters read through this cache may be off by up to the
+local timeout.
+
+As any write clears every worker's local values, only keys starting with
+one of `LOCAL_PREFIXES` are kept locally - values which are read far more
+often than they are written, and which are shared by every user rather
+than being cached per user.  All other keys, such as locks, sessions,
+metrics and per user values, are read and written straight through to the
+shared cache, and never bump the generation.  Without `LOCAL_PREFIXES` every key is kept
+locally.
+
+Configure it with the alias of the shared cache as its location:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'muckrock.core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'LOCAL_TIMEOUT': 5,
+                'LOCAL_MAX_ENTRIES': 1000,
+                'CHECK_INTERVAL': 1,
+                'LOCAL_PREFIXES': ('caching:sb:broadcast:', 'caching:hp:'),
+            },
+        },
+        'shared': {...},
+    }
+"""
+
+# Django
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Standard Library
+import cPickle as pickle
+import threading
+import time
+from collections import OrderedDict
+
+GENERATION_KEY = 'two_tier:generation'
+
+# the local values are shared by all of the threads in a process, while
+# the cache objects themselves are created per thread
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _LocalStore(object):
+    """A bounded, least recently used store of pickled values"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = None
+        self.checked = 0
+
+    def get(self, key):
+        """Get the pickled value, or None if it is missing or expired"""
+        with self.lock:
+            entry = self.values.pop(key, None)
+            if entry is None:
+                return None
+            pickled, expires = entry
+            if expires < time.time():
+                return None
+            self.values[key] = entry
+            return pickled
+
+    def set(self, key, pickled, timeout):
+        """Store the pickled value for up to `timeout` seconds"""
+        with self.lock:
+            self.values.pop(key, None)
+            self.values[key] = (pickled, time.time() + timeout)
+            while len(self.values) > self.max_entries:
+                self.values.popitem(last=False)
+
+    def delete(self, key):
+        """Remove the value"""
+        with self.lock:
+            self.values.pop(key, None)
+
+    def clear(self):
+        """Remove all values"""
+        with self.lock:
+            self.values.clear()
+
+
+class TwoTierCache(BaseCache):
+    """A process local cache in front of a shared cache"""
+
+    def __init__(self, location, params):
+        super(TwoTierCache, self).__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.check_interval = options.get('CHECK_INTERVAL', 1)
+        self.local_prefixes = options.get('LOCAL_PREFIXES')
+        if self.local_prefixes is not None:
+            self.local_prefixes = tuple(self.local_prefixes)
+        with _stores_lock:
+            self._store = _stores.setdefault(
+                location,
+                _LocalStore(options.get('LOCAL_MAX_ENTRIES', 1000)),
+            )
+
+    @property
+    def shared(self):
+        """The shared cache"""
+        return caches[self._shared_alias]
+
+    def _is_local(self, key):
+        """Is the key kept in the local tier?"""
+        return (
+            self.local_prefixes is None or key.startswith(self.local_prefixes)
+        )
+
+    def _split(self, keys):
+        """Split the keys into those kept locally and those which are not"""
+        local = [k for k in keys if self._is_local(k)]
+        shared = [k for k in keys if not self._is_local(k)]
+        return local, shared
+
+    def _local_key(self, key, version):
+        """The key for the local store"""
+        return self.make_key(key, version=version)
+
+    def _local_timeout(self, timeout):
+        """Local values never outlive the shared ones"""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _check_generation(self):
+        """Clear the local values if another worker has written to the
+        shared cache since they were stored"""
+        store = self._store
+        now = time.time()
+        if now - store.checked < self.check_interval:
+            return
+        store.checked = now
+        generation = self.shared.get(GENERATION_KEY)
+        if generation is None:
+            # nothing has been written since the counter was evicted
+            self.shared.add(GENERATION_KEY, 0, None)
+            generation = 0
+            store.clear()
+        elif generation != store.generation:
+            store.clear()
+        store.generation = generation
+
+    def _bump_generation(self):
+        """Tell the other workers to clear their local values"""
+        store = self._store
+        if self.shared.add(GENERATION_KEY, 1, None):
+            generation = 1
+        else:
+            try:
+                generation = self.shared.incr(GENERATION_KEY)
+            except ValueError:
+                # the key was evicted between the add and the incr
+                generation = None
+        if (
+            generation is None or store.generation is None
+            or generation != store.generation + 1
+        ):
+            # another worker has also written since we last checked
+            store.clear()
+        store.generation = generation
+
+    def _store_local(self, key, value, timeout, version):
+        """Store a copy of the value locally"""
+        timeout = self._local_timeout(timeout)
+        if timeout > 0:
+            self._store.set(
+                self._local_key(key, version),
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                timeout,
+            )
+
+    def get(self, key, default=None, version=None):
+        """Get the value locally if possible, otherwise from the shared
+        cache"""
+        if not self._is_local(key):
+            return self.shared.get(key, default, version=version)
+        self._check_generation()
+        pickled = self._store.get(self._local_key(key, version))
+        if pickled is not None:
+            return pickle.loads(pickled)
+        value = self.shared.get(key, self, version=version)
+        if value is self:
+            return default
+        self._store_local(key, value, None, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        """Get the values locally where possible, and fetch the rest from
+        the shared cache in one request"""
+        local_keys, missing = self._split(keys)
+        values = {}
+        if local_keys:
+            self._check_generation()
+        for key in local_keys:
+            pickled = self._store.get(self._local_key(key, version))
+            if pickled is not None:
+                values[key] = pickle.loads(pickled)
+            else:
+                missing.append(key)
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key, value in fetched.iteritems():
+                if self._is_local(key):
+                    self._store_local(key, value, None, version)
+            values.update(fetched)
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set the value in both tiers"""
+        self.shared.set(key, value, timeout, version=version)
+        if not self._is_local(key):
+            return
+        self._bump_generation()
+        self._store_local(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set the values in both tiers"""
+        failed = self.shared.set_many(data, timeout, version=version)
+        local_keys, _ = self._split(data)
+        if local_keys:
+            self._bump_generation()
+        for key in local_keys:
+            self._store_local(key, data[key], timeout, version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Add the value to the shared cache, so only one worker may add it"""
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self._is_local(key):
+            self._bump_generation()
+            self._store_local(key, value, timeout, version)
+        return added
+
+    def delete(self, key, version=None):
+        """Delete the value from both tiers"""
+        self.shared.delete(key, version=version)
+        if self._is_local(key):
+            self._store.delete(self._local_key(key, version))
+            self._bump_generation()
+
+    def delete_many(self, keys, version=None):
+        """Delete the values from both tiers"""
+        self.shared.delete_many(keys, version=version)
+        local_keys, _ = self._split(keys)
+        for key in local_keys:
+            self._store.delete(self._local_key(key, version))
+        if local_keys:
+            self._bump_generation()
+
+    def incr(self, key, delta=1, version=None):
+        """Increment the value in the shared cache"""
+        self._store.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        """Decrement the value in the shared cache"""
+        self._store.delete(self._local_key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        """Check the local values before the shared cache"""
+        if self._is_local(key):
+            self._check_generation()
+            if self._store.get(self._local_key(key, version)) is not None:
+                return True
+        return self.shared.has_key(key, version=version)
+
+    def clear(self):
+        """Clear both tiers"""
+        self.shared.clear()
+        self._store.clear()
+        self._bump_generation()
+
+    def close(self, **kwargs):
+        """Close the shared cache's connection"""
+        self.shared.close(**kwargs)
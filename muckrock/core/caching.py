@@ -0,0 +1,174 @@
+"""
+Caching of expensive values and template fragments
+
+Values are stored with the time they go stale, and kept in the cache for a
+while after that.  Once a value is stale, one worker takes a short lock and
+recomputes it, while the others keep serving the stale value, so an expiring
+value is not recomputed by every worker at once.  Timeouts are jittered so
+values cached together do not all expire together.
+
+Values may be tagged, and invalidating a tag makes every value cached with it
+a miss, without having to know their keys - for example all of the fragments
+of a request's detail page are tagged with the request.
+
+Entries are stored under their own prefix, as they are stored along with
+their stale time and tag versions, so values stored under the same keys
+before, or by plain cache calls, are never mistaken for them.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+# Standard Library
+import random
+import time
+import uuid
+
+ENTRY_KEY = 'caching:{}'
+LOCK_KEY = 'lock:{}'
+TAG_KEY = 'cache:tag:{}'
+METRIC_KEY = 'cache:metrics:{}'
+METRICS = ('hit', 'stale', 'miss', 'recompute')
+
+# how long to sleep between checks while waiting for another worker
+# to compute a missing value
+_WAIT_INTERVAL = 0.05
+
+
+def _count(cache, metric):
+    """Count a cache event"""
+    key = METRIC_KEY.format(metric)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # the key expired between the add and the incr
+            pass
+
+
+def get_metrics(cache=None):
+    """How many hits, stale hits, misses and recomputes there have been"""
+    cache = cache or default_cache
+    counts = cache.get_many([METRIC_KEY.format(m) for m in METRICS])
+    return {m: counts.get(METRIC_KEY.format(m), 0) for m in METRICS}
+
+
+def jitter(timeout):
+    """Randomly adjust a timeout so values set together expire apart"""
+    if not timeout:
+        return timeout
+    spread = timeout * settings.CACHE_TIMEOUT_JITTER
+    return int(timeout + random.uniform(-spread, spread))
+
+
+def _tag_versions(cache, tags, create=False):
+    """Get the current version of each tag
+    If `create` is set, tags without a version are given one, otherwise
+    None is returned if any tag is missing its version"""
+    if not tags:
+        return {}
+    keys = {TAG_KEY.format(t): t for t in tags}
+    versions = cache.get_many(keys.keys())
+    for key in keys:
+        if key not in versions:
+            if not create:
+                return None
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return {keys[k]: v for k, v in versions.iteritems()}
+
+
+def invalidate_tags(*tags, **kwargs):
+    """Invalidate all values cached with any of the tags"""
+    cache = kwargs.get('cache') or default_cache
+    cache.set_many({TAG_KEY.format(t): uuid.uuid4().hex for t in tags}, None)
+
+
+def _set(cache, key, value, timeout, tags):
+    """Store the value with the time it goes stale and its tag versions"""
+    key = ENTRY_KEY.format(key)
+    timeout = jitter(timeout)
+    if timeout is None:
+        stale_at = None
+    else:
+        stale_at = time.time() + timeout
+        timeout += settings.CACHE_STALE_TIMEOUT
+    cache.set(
+        key,
+        (value, stale_at, _tag_versions(cache, tags, create=True)),
+        timeout,
+    )
+
+
+def _get(cache, key, tags):
+    """Get the value and whether it is stale, or None if it is missing or
+    one of its tags has been invalidated"""
+    entry = cache.get(ENTRY_KEY.format(key))
+    if not isinstance(entry, tuple) or len(entry) != 3:
+        return None
+    value, stale_at, versions = entry
+    if tags and versions != _tag_versions(cache, tags):
+        return None
+    return value, stale_at is not None and stale_at < time.time()
+
+
+def delete(key, cache=None):
+    """Delete a cached value"""
+    cache = cache or default_cache
+    cache.delete(ENTRY_KEY.format(key))
+
+
+def refresh(key, update, timeout, tags=(), cache=None):
+    """Recompute the value and store it, so a background job may keep a
+    value fresh and visitors never compute it"""
+    cache = cache or default_cache
+    _count(cache, 'recompute')
+    value = update()
+    _set(cache, key, value, timeout, tags)
+    return value
+
+
+def get_or_set(key, update, timeout, tags=(), cache=None):
+    """Get the value from the cache, calling `update` to compute it if it is
+    missing or stale
+
+    A missing value is computed by one worker while the others wait for it,
+    up to a limit.  A stale value is served while one worker recomputes it.
+    """
+    cache = cache or default_cache
+    lock_key = LOCK_KEY.format(key)
+    entry = _get(cache, key, tags)
+    if entry is not None:
+        value, stale = entry
+        if not stale:
+            _count(cache, 'hit')
+            return value
+        if not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+            # another worker is already recomputing it
+            _count(cache, 'stale')
+            return value
+    else:
+        _count(cache, 'miss')
+        waited = 0
+        while not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+            if waited >= settings.CACHE_LOCK_WAIT:
+                # give up waiting and compute it ourselves
+                return update()
+            time.sleep(_WAIT_INTERVAL)
+            waited += _WAIT_INTERVAL
+            entry = _get(cache, key, tags)
+            if entry is not None:
+                return entry[0]
+    try:
+        # another worker may have stored a fresh value between our check
+        # and taking the lock
+        entry = _get(cache, key, tags)
+        if entry is not None and not entry[1]:
+            return entry[0]
+        _count(cache, 'recompute')
+        value = update()
+        _set(cache, key, value, timeout, tags)
+        return value
+    finally:
+        cache.delete(lock_key)
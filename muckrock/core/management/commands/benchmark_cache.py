@@ -0,0 +1,68 @@
+"""
+Benchmark the configured cache backends against each other
+"""
+
+# Django
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+# Standard Library
+import random
+import time
+
+
+class Command(BaseCommand):
+    """Time a read heavy workload against each of the given caches
+
+    Reads follow a skewed distribution, like the sidebar and homepage values
+    which are read on nearly every request, with a write for every
+    `--write-ratio` reads.  Compare a two tier cache against its shared
+    cache, and against a local memory cache, by passing all of their aliases.
+    """
+    help = 'Benchmark cache backends with a read heavy workload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='+', help='Cache aliases to test')
+        parser.add_argument('--operations', type=int, default=10000)
+        parser.add_argument('--keys', type=int, default=100)
+        parser.add_argument('--write-ratio', type=int, default=100)
+        parser.add_argument(
+            '--prefix',
+            default='caching:hp:',
+            help='Key prefix, which must be one of a two tier cache\'s '
+            'LOCAL_PREFIXES for its local tier to be used',
+        )
+
+    def handle(self, *args, **kwargs):
+        """Run the benchmark for each cache"""
+        keys = [
+            '%sbenchmark:%d' % (kwargs['prefix'], i)
+            for i in range(kwargs['keys'])
+        ]
+        value = {'html': 'x' * 2000}
+        # the same sequence of keys is used for every cache
+        rand = random.Random(0)
+        sequence = [
+            keys[min(int(rand.paretovariate(1.2)) - 1, len(keys) - 1)]
+            for _ in range(kwargs['operations'])
+        ]
+        for alias in kwargs['aliases']:
+            cache = caches[alias]
+            cache.set_many({k: value for k in keys}, 60)
+            start = time.time()
+            for i, key in enumerate(sequence):
+                if i % kwargs['write_ratio'] == 0:
+                    cache.set(key, value, 60)
+                else:
+                    cache.get(key)
+            elapsed = time.time() - start
+            cache.delete_many(keys)
+            self.stdout.write(
+                '{}: {:.3f}s, {:,.0f} operations per second, '
+                '{:.1f}us per operation'.format(
+                    alias,
+                    elapsed,
+                    len(sequence) / elapsed,
+                    elapsed / len(sequence) * 1000000,
+                )
+            )
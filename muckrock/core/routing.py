@@ -0,0 +1,128 @@
+"""
+Routing of inbound messages by regular expression rules
+
+A router combines an ordered list of rules into a single compiled pattern,
+so finding the first rule which matches a message is one regex match,
+instead of trying each rule in turn.  Routers should be created once per
+process, at import time or once per class, not once per message.
+
+Each rule is a pattern and a target, which may be anything - usually a
+handler or the name of one.  Rules keep the same precedence as trying them
+in order with `re.search` - the first rule in the list which matches
+anywhere in the text wins.  Rules may use named and numbered groups, but
+not numbered back references.
+"""
+
+# Django
+from django.core.cache import cache
+
+# Standard Library
+import re
+
+HIT_KEY = 'routing:{}:{}'
+MISS = 'miss'
+
+_NAMED_GROUP = re.compile(r'\(\?P<(\w+)>')
+_NAMED_BACKREF = re.compile(r'\(\?P=(\w+)\)')
+
+
+class RouteMatch(object):
+    """The match for a single rule, with the rule's own group numbers and
+    names, like a regex match object for the rule by itself"""
+
+    def __init__(self, match, base, count, names):
+        self._match = match
+        self._base = base
+        self._count = count
+        self._names = names
+
+    def group(self, *groups):
+        """Get the text matched by the given groups"""
+        if not groups:
+            groups = (0,)
+        values = [
+            self._match.group(self._names[g] if g in self._names else
+                              self._base + g) for g in groups
+        ]
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def groups(self):
+        """Get the text matched by all of the rule's numbered groups"""
+        return tuple(
+            self._match.group(self._base + i)
+            for i in range(1, self._count + 1)
+        )
+
+    def groupdict(self):
+        """Get the text matched by the rule's named groups"""
+        return {
+            name: self._match.group(group)
+            for name, group in self._names.iteritems()
+        }
+
+
+class Router(object):
+    """An ordered set of rules compiled into a single pattern"""
+
+    def __init__(self, name, rules, flags=0):
+        self.name = name
+        self.targets = []
+        self._rule_names = []
+        alternatives = []
+        group_counts = []
+        for i, (pattern, target) in enumerate(rules):
+            group_counts.append(re.compile(pattern, flags).groups)
+            self.targets.append(target)
+            self._rule_names.append(
+                target if isinstance(target, basestring) else
+                getattr(target, '__name__', str(i))
+            )
+            pattern = _NAMED_GROUP.sub(r'(?P<_r{}_\1>'.format(i), pattern)
+            pattern = _NAMED_BACKREF.sub(r'(?P=_r{}_\1)'.format(i), pattern)
+            # a lookahead from the start of the text matches the rule anywhere,
+            # and alternatives are tried in order, so the earliest rule wins
+            alternatives.append(r'(?=[\s\S]*?(?P<_r{}>{}))'.format(i, pattern))
+        self._pattern = re.compile(
+            r'\A(?:{})'.format('|'.join(alternatives)),
+            flags,
+        )
+        self._groups = []
+        for i, count in enumerate(group_counts):
+            prefix = '_r{}_'.format(i)
+            self._groups.append((
+                self._pattern.groupindex['_r{}'.format(i)],
+                count,
+                {
+                    name[len(prefix):]: name
+                    for name in self._pattern.groupindex
+                    if name.startswith(prefix)
+                },
+            ))
+
+    def match(self, text):
+        """Find the first rule matching the text
+        Returns the rule's target and match, or None and None"""
+        match = self._pattern.match(text)
+        if match is None:
+            self._count(MISS)
+            return None, None
+        rule = int(match.lastgroup[2:])
+        self._count(self._rule_names[rule])
+        return self.targets[rule], RouteMatch(match, *self._groups[rule])
+
+    def _count(self, rule_name):
+        """Count a hit for the rule"""
+        key = HIT_KEY.format(self.name, rule_name)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # the key expired between the add and the incr
+                pass
+
+    def hit_counts(self):
+        """How many times each rule, and no rule, has matched"""
+        names = self._rule_names + [MISS]
+        counts = cache.get_many([HIT_KEY.format(self.name, n) for n in names])
+        return [(n, counts.get(HIT_KEY.format(self.name, n), 0))
+                for n in names]
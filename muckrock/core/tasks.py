@@ -0,0 +1,19 @@
+"""
+Celery tasks for the core application
+"""
+
+# Django
+from celery.schedules import crontab
+from celery.task import periodic_task
+
+# MuckRock
+from muckrock.core.views import Homepage
+
+
+@periodic_task(
+    run_every=crontab(minute='*/10'),
+    name='muckrock.core.tasks.warm_homepage_cache',
+)
+def warm_homepage_cache():
+    """Rebuild the homepage fragments before they expire"""
+    Homepage().warm()
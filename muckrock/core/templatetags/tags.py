@@ -27,6 +27,7 @@ import bleach
 import markdown
 
 # MuckRock
+from muckrock.core import caching
 from muckrock.core.forms import NewsletterSignupForm, TagManagerForm
 from muckrock.project.forms import ProjectManagerForm
 
@@ -317,6 +318,7 @@ class CacheNode(Node):
         fragment_name,
         vary_on,
         cache_name,
+        tags,
         compress=False
     ):
         # pylint: disable=too-many-arguments
@@ -325,6 +327,7 @@ class CacheNode(Node):
         self.fragment_name = fragment_name
         self.vary_on = vary_on
         self.cache_name = cache_name
+        self.tags = tags
         self.compress = compress
 
     def _resolve_vars(self, context):
@@ -367,6 +370,20 @@ class CacheNode(Node):
 
         return (expire_time, fragment_cache)
 
+    def _resolve_tags(self, context):
+        """Resolve the tags, which may be a single tag or a list of them"""
+        if self.tags is None:
+            return ()
+        try:
+            tags = self.tags.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError(
+                '"cache" tag got an unknown variable: %r' % self.tags.var
+            )
+        if isinstance(tags, basestring):
+            return (tags,)
+        return tuple(tags)
+
     def render(self, context):
         """Render the cached fragment"""
         expire_time, fragment_cache = self._resolve_vars(context)
@@ -376,18 +393,23 @@ class CacheNode(Node):
         if expire_time != 0:
             vary_on = [var.resolve(context) for var in self.vary_on]
             cache_key = make_template_fragment_key(self.fragment_name, vary_on)
-            value = fragment_cache.get(cache_key)
-            if value is not None and self.compress:
-                value = zlib.decompress(value).decode('utf8')
-            if value is None:
+
+            def update():
+                """Render the fragment"""
                 value = self.nodelist.render(context)
                 if self.compress:
-                    fragment_cache.set(
-                        cache_key, zlib.compress(value.encode('utf8')),
-                        expire_time
-                    )
-                else:
-                    fragment_cache.set(cache_key, value, expire_time)
+                    value = zlib.compress(value.encode('utf8'))
+                return value
+
+            value = caching.get_or_set(
+                cache_key,
+                update,
+                expire_time,
+                self._resolve_tags(context),
+                fragment_cache,
+            )
+            if self.compress:
+                value = zlib.decompress(value).decode('utf8')
             return value
         else:
             return self.nodelist.render(context)
@@ -402,23 +424,25 @@ def parse_cache(parser, token):
         raise TemplateSyntaxError(
             "'%r' tag requires at least 2 arguments." % tokens[0]
         )
-    if len(tokens) > 3 and tokens[-1].startswith('using='):
-        cache_name = parser.compile_filter(tokens[-1][len('using='):])
-        tokens = tokens[:-1]
-    else:
-        cache_name = None
+    options = {}
+    while len(tokens) > 3 and tokens[-1].startswith(('using=', 'tags=')):
+        name, value = tokens.pop().split('=', 1)
+        options[name] = parser.compile_filter(value)
     return (
         nodelist,
         parser.compile_filter(tokens[1]),
         tokens[2],  # fragment_name can't be a variable.
         [parser.compile_filter(t) for t in tokens[3:]],
-        cache_name,
+        options.get('using'),
+        options.get('tags'),
     )
 
 
 @register.tag('cond_cache')
 def do_cache(parser, token):
-    """Cache tag that can use 0 expire time to not cache"""
+    """Cache tag that can use 0 expire time to not cache
+    Fragments may be tagged with `tags=`, to be invalidated with
+    `muckrock.core.caching.invalidate_tags`"""
     return CacheNode(*parse_cache(parser, token))
 
 
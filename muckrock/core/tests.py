@@ -5,9 +5,13 @@ Tests for site level functionality and helper functions for application tests
 # Django
 from django.conf import settings
 from django.contrib.sites.models import Site
+from django.core.cache import cache, caches
+from django.core.cache.utils import make_template_fragment_key
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
 
 # Standard Library
 import logging
@@ -20,13 +24,16 @@ from nose.tools import eq_, ok_
 
 # MuckRock
 from muckrock.accounts.models import Notification
+from muckrock.core import cache_backends, caching
 from muckrock.core.factories import AnswerFactory, UserFactory
 from muckrock.core.fields import EmailsListField
 from muckrock.core.forms import NewsletterSignupForm, StripeForm
+from muckrock.core.routing import Router
 from muckrock.core.templatetags import tags
 from muckrock.core.test_utils import http_get_response, http_post_response
 from muckrock.core.utils import new_action, notify
-from muckrock.core.views import DonationFormView, NewsletterSignupView
+from muckrock.core.views import DonationFormView, Homepage, NewsletterSignupView
+from muckrock.foia.factories import FOIARequestFactory
 
 # pylint: disable=too-many-public-methods
 
@@ -154,6 +161,278 @@ class TestUnit(TestCase):
         field.clean('a@example.com,an.email@foo.net', model_instance)
 
 
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestRouter(TestCase):
+    """Test the compiled routing rules"""
+
+    def setUp(self):
+        cache.clear()
+        self.router = Router(
+            'test',
+            [
+                (r'Request (?P<tracking_id>[0-9-]+) opened', 'opened'),
+                (r'Tracking Number: ([0-9a-zA-Z-]+)', 'tracking'),
+                (r'second', 'second'),
+                (r'first', 'first'),
+            ],
+        )
+
+    def test_named_groups(self):
+        """Named groups should be returned with their own names"""
+        target, match = self.router.match('Your Request 17-1 opened today')
+        eq_(target, 'opened')
+        eq_(match.groupdict(), {'tracking_id': '17-1'})
+
+    def test_numbered_groups(self):
+        """Numbered groups should be numbered from the start of their rule"""
+        target, match = self.router.match('Hi\nTracking Number: AB-12\n')
+        eq_(target, 'tracking')
+        eq_(match.group(1), 'AB-12')
+        eq_(match.groups(), ('AB-12',))
+        eq_(match.group(), 'Tracking Number: AB-12')
+
+    def test_precedence(self):
+        """The first matching rule should win, not the first match"""
+        target, _ = self.router.match('first then second')
+        eq_(target, 'second')
+
+    def test_hit_counts(self):
+        """Each rule's matches should be counted"""
+        self.router.match('first')
+        self.router.match('first')
+        self.router.match('nothing')
+        eq_(
+            dict(self.router.hit_counts()),
+            {
+                'opened': 0,
+                'tracking': 0,
+                'second': 0,
+                'first': 2,
+                'miss': 1,
+            },
+        )
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestCaching(TestCase):
+    """Test stale while revalidate caching"""
+
+    def setUp(self):
+        cache.clear()
+        self.update = Mock(return_value='value')
+
+    def test_hit(self):
+        """A fresh value should only be computed once"""
+        eq_(caching.get_or_set('key', self.update, 60), 'value')
+        eq_(caching.get_or_set('key', self.update, 60), 'value')
+        eq_(self.update.call_count, 1)
+        eq_(
+            caching.get_metrics(),
+            {'hit': 1, 'stale': 0, 'miss': 1, 'recompute': 1},
+        )
+
+    @patch('muckrock.core.caching.time.time')
+    def test_stale(self, mock_time):
+        """A stale value should be served while another worker holds the
+        lock, and recomputed otherwise"""
+        mock_time.return_value = 1000
+        caching.get_or_set('key', self.update, 60)
+        mock_time.return_value = 1100
+        self.update.return_value = 'new value'
+        cache.add(caching.LOCK_KEY.format('key'), True)
+        eq_(caching.get_or_set('key', self.update, 60), 'value')
+        eq_(self.update.call_count, 1)
+        cache.delete(caching.LOCK_KEY.format('key'))
+        eq_(caching.get_or_set('key', self.update, 60), 'new value')
+        eq_(self.update.call_count, 2)
+        eq_(caching.get_metrics()['stale'], 1)
+
+    def test_tags(self):
+        """Invalidating a tag should invalidate the values tagged with it"""
+        caching.get_or_set('key', self.update, 60, tags=['foia:1'])
+        caching.get_or_set('other', self.update, 60, tags=['foia:2'])
+        caching.invalidate_tags('foia:1')
+        caching.get_or_set('key', self.update, 60, tags=['foia:1'])
+        caching.get_or_set('other', self.update, 60, tags=['foia:2'])
+        eq_(self.update.call_count, 3)
+
+    def test_plain_values(self):
+        """Values stored by plain cache calls under the same key should not
+        be mistaken for cached entries"""
+        cache.set('key', ('a', 'b', 'c'))
+        eq_(caching.get_or_set('key', self.update, 60), 'value')
+        eq_(cache.get('key'), ('a', 'b', 'c'))
+        caching.delete('key')
+        caching.get_or_set('key', self.update, 60)
+        eq_(self.update.call_count, 2)
+
+    def test_recheck_after_lock(self):
+        """A value stored while waiting for the lock should not be
+        recomputed"""
+        original_add = cache.add
+
+        def add(key, *args, **kwargs):
+            """Store the value just before the lock is taken"""
+            if key == caching.LOCK_KEY.format('key'):
+                caching.refresh('key', lambda: 'other', 60)
+            return original_add(key, *args, **kwargs)
+
+        with patch.object(cache, 'add', add):
+            eq_(caching.get_or_set('key', self.update, 60), 'other')
+        eq_(self.update.call_count, 0)
+
+    def test_jitter(self):
+        """Timeouts should be adjusted by no more than the jitter"""
+        for _ in range(20):
+            timeout = caching.jitter(100)
+            ok_(90 <= timeout <= 110)
+        eq_(caching.jitter(None), None)
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'muckrock.core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'LOCAL_TIMEOUT': 60,
+                'CHECK_INTERVAL': 60,
+            },
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'two-tier-test',
+        },
+    }
+)
+class TestTwoTierCache(TestCase):
+    """Test the two tier cache backend"""
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.shared = caches['shared']
+        self.cache.clear()
+
+    def test_local_reads(self):
+        """Values should be read from the local tier once fetched"""
+        self.shared.set('key', 'value')
+        eq_(self.cache.get('key'), 'value')
+        self.shared.set('key', 'changed')
+        eq_(self.cache.get('key'), 'value')
+        eq_(self.cache.get_many(['key', 'missing']), {'key': 'value'})
+
+    def test_invalidation(self):
+        """Writes by another worker should clear the local tier once the
+        generation is next checked"""
+        self.cache.set('key', 'value')
+        eq_(self.cache.get('key'), 'value')
+        self.shared.set('key', 'changed')
+        self.shared.incr(cache_backends.GENERATION_KEY)
+        eq_(self.cache.get('key'), 'value')
+        self.cache._store.checked = 0
+        eq_(self.cache.get('key'), 'changed')
+
+    def test_own_writes(self):
+        """Writes by this worker should update the local tier"""
+        self.cache.set('key', 'value')
+        self.cache.set('key', 'changed')
+        eq_(self.cache.get('key'), 'changed')
+        self.cache.delete('key')
+        eq_(self.cache.get('key', 'default'), 'default')
+        ok_(self.cache.add('key', 'added'))
+        ok_(not self.cache.add('key', 'again'))
+        eq_(self.cache.get('key'), 'added')
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'muckrock.core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'LOCAL_PREFIXES': ('local:',),
+            },
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'two-tier-prefix-test',
+        },
+    }
+)
+class TestTwoTierCachePrefixes(TestCase):
+    """Test limiting the two tier cache's local tier to some keys"""
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.shared = caches['shared']
+        self.cache.clear()
+
+    def test_shared_keys(self):
+        """Keys without a local prefix should always be read from the
+        shared cache, and writing them should not bump the generation"""
+        self.cache.set('local:key', 'value')
+        generation = self.shared.get(cache_backends.GENERATION_KEY)
+        self.cache.set('lock', 'value')
+        ok_(self.cache.add('other_lock', 'value'))
+        self.cache.delete('lock')
+        eq_(self.shared.get(cache_backends.GENERATION_KEY), generation)
+        self.shared.set('other_lock', 'changed')
+        eq_(self.cache.get('other_lock'), 'changed')
+        eq_(
+            self.cache.get_many(['local:key', 'other_lock']),
+            {'local:key': 'value',
+             'other_lock': 'changed'},
+        )
+        self.shared.set('local:key', 'changed')
+        eq_(self.cache.get('local:key'), 'value')
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestHomepageCache(TestCase):
+    """Test pre-warming the homepage cache"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm(self):
+        """Warming the cache should render the homepage fragments"""
+        FOIARequestFactory(
+            status='done',
+            datetime_done=timezone.now(),
+            title='A completed request',
+        )
+        Homepage().warm()
+        top = cache.get(make_template_fragment_key('homepage_top'))
+        ok_('A completed request' in top)
+        ok_(cache.get(make_template_fragment_key('homepage_bottom')))
+
+    def test_reset(self):
+        """Resetting the cache should rebuild the fragments"""
+        cache.set(make_template_fragment_key('homepage_top'), 'old')
+        self.client.force_login(UserFactory(is_staff=True))
+        response = self.client.get(reverse('reset-cache'))
+        eq_(response.status_code, 302)
+        ok_(cache.get(make_template_fragment_key('homepage_top')) != 'old')
+
+
 class TestNewsletterSignupView(TestCase):
     """By submitting an email, users can subscribe to our MailChimp newsletter list."""
 
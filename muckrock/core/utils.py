@@ -5,7 +5,6 @@ Miscellanous utilities
 # Django
 from django.conf import settings
 from django.contrib.auth.models import Group, User
-from django.core.cache import cache
 from django.template import Context
 from django.template.loader_tags import BlockNode, ExtendsNode
 from django.utils.module_loading import import_string
@@ -23,6 +22,7 @@ import actstream
 import stripe
 
 # MuckRock
+from muckrock.core import caching
 from muckrock.core.storage import QueuedS3DietStorage
 
 logger = logging.getLogger(__name__)
@@ -124,13 +124,10 @@ def get_stripe_token(card_number='4242424242424242'):
     return token.id
 
 
-def cache_get_or_set(key, update, timeout):
-    """Get the value from the cache if present, otherwise update it"""
-    value = cache.get(key)
-    if value is None:
-        value = update()
-        cache.set(key, value, timeout)
-    return value
+def cache_get_or_set(key, update, timeout, tags=()):
+    """Get the value from the cache if present, otherwise update it
+    See `muckrock.core.caching` for how stale values are handled"""
+    return caching.get_or_set(key, update, timeout, tags)
 
 
 def get_image_storage():
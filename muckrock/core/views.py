@@ -5,11 +5,12 @@ Views for muckrock project
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
-from django.core.cache import cache
+from django.core.cache import InvalidCacheBackendError, cache, caches
 from django.core.cache.utils import make_template_fragment_key
 from django.core.urlresolvers import reverse
 from django.db.models import F, Sum
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator
 from django.utils.html import escape
 from django.views.generic import FormView, ListView, TemplateView, View
@@ -96,6 +97,15 @@ class ModelFilterMixin(object):
             request=self.request,
         )
 
+    def get_filtered_queryset(self, _filter=None):
+        """Get the queryset with the filter applied"""
+        if _filter is None:
+            _filter = self.get_filter()
+        queryset = _filter.qs
+        if any(_filter.data.values()):
+            queryset = queryset.distinct()
+        return queryset
+
     def get_context_data(self, **kwargs):
         """
         Adds the filter to the context and overrides the
@@ -104,9 +114,7 @@ class ModelFilterMixin(object):
         """
         context = super(ModelFilterMixin, self).get_context_data(**kwargs)
         _filter = self.get_filter()
-        queryset = _filter.qs
-        if any(_filter.data.values()):
-            queryset = queryset.distinct()
+        queryset = self.get_filtered_queryset(_filter)
         try:
             page_size = self.get_paginate_by(queryset)
         except AttributeError:
@@ -303,6 +311,12 @@ class LandingView(TemplateView):
 class Homepage(object):
     """Control caching for the homepage"""
 
+    # the cached fragments of the homepage, and the templates they render
+    fragments = (
+        ('homepage_top', 'homepage/top.html'),
+        ('homepage_bottom', 'homepage/bottom.html'),
+    )
+
     def get_cached_values(self):
         """Return all the methods used to generate the cached values"""
         return [
@@ -362,6 +376,41 @@ class Homepage(object):
                 lambda: Agency.objects.get_approved().count(),
         }
 
+    def get_values(self):
+        """Evaluate all of the values, for when the fragments are rendered
+        outside of a visitor's request"""
+        values = {}
+        for name, value in self.get_cached_values():
+            value = value()
+            if callable(value):
+                value = value()
+            elif isinstance(value, dict):
+                value = {
+                    k: v() if callable(v) else v
+                    for k, v in value.iteritems()
+                }
+            else:
+                value = list(value)
+            values[name] = value
+        return values
+
+    def warm(self):
+        """Render the cached fragments in the background, replacing the
+        cached ones all at once, so visitors never render them"""
+        try:
+            fragment_cache = caches['template_fragments']
+        except InvalidCacheBackendError:
+            fragment_cache = caches['default']
+        values = self.get_values()
+        fragment_cache.set_many(
+            {
+                make_template_fragment_key(name):
+                    render_to_string(template, values)
+                for name, template in self.fragments
+            },
+            settings.DEFAULT_CACHE_TIMEOUT,
+        )
+
 
 def homepage(request):
     """Get all the details needed for the homepage"""
@@ -373,17 +422,10 @@ def homepage(request):
 
 @user_passes_test(lambda u: u.is_staff)
 def reset_homepage_cache(request):
-    """Reset the homepage cache"""
+    """Rebuild the homepage cache"""
     # pylint: disable=unused-argument
-
-    template_keys = (
-        'homepage_top',
-        'homepage_bottom',
-        'dropdown_recent_articles',
-    )
-    for key in template_keys:
-        cache.delete(make_template_fragment_key(key))
-
+    Homepage().warm()
+    cache.delete(make_template_fragment_key('dropdown_recent_articles'))
     return redirect('index')
 
 
@@ -4,7 +4,6 @@ Models for the crowdfund application
 
 # Django
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import models
 from django.db.models import Q, Sum
@@ -20,6 +19,7 @@ import stripe
 
 # MuckRock
 from muckrock.accounts.utils import stripe_get_customer
+from muckrock.core import caching
 from muckrock.core.utils import new_action, stripe_retry_on_error
 from muckrock.message.email import TemplateEmail
 
@@ -153,7 +153,7 @@ class Crowdfund(models.Model):
             charge_id=charge.id,
             recurring=recurring,
         )
-        cache.delete('cf:%s:crowdfund_widget_data' % self.pk)
+        caching.delete('cf:%s:crowdfund_widget_data' % self.pk)
         logger.info(payment)
         self.update_payment_received()
         return payment
@@ -9,4 +9,8 @@ from django.apps import AppConfig
 
 class CrowdsourceConfig(AppConfig):
     """Crowdsource config"""
-    name = 'crowdsource'
+    name = 'muckrock.crowdsource'
+
+    def ready(self):
+        """Connect the signal handlers"""
+        import muckrock.crowdsource.signals  # pylint: disable=unused-import,unused-variable
@@ -2,6 +2,7 @@
 
 # Django
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.validators import URLValidator
 
@@ -123,6 +124,7 @@ class CrowdsourceForm(forms.ModelForm):
         if data_csv:
             reader = csv.reader(data_csv)
             headers = [h.lower() for h in next(reader)]
+            new_data = []
             for line in reader:
                 data = dict(zip(headers, line))
                 url = data.pop('url', '')
@@ -148,10 +150,17 @@ class CrowdsourceForm(forms.ModelForm):
                     except forms.ValidationError:
                         pass
                     else:
-                        crowdsource.data.create(
-                            url=url,
-                            metadata=data,
+                        new_data.append(
+                            CrowdsourceData(
+                                crowdsource=crowdsource,
+                                url=url,
+                                metadata=data,
+                            )
                         )
+            CrowdsourceData.objects.bulk_create(
+                new_data,
+                batch_size=settings.CROWDSOURCE_BULK_SIZE,
+            )
 
     def clean_form_json(self):
         """Ensure the form JSON is in the correct format"""
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-04 11:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crowdsource', '0017_auto_20180530_1227'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crowdsourcedata',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterIndexTogether(
+            name='crowdsourcedata',
+            index_together=set([('crowdsource', 'response_count')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='crowdsourceresponse',
+            index_together=set([('data', 'user')]),
+        ),
+        migrations.RunSQL(
+            'UPDATE crowdsource_crowdsourcedata AS d SET response_count = '
+            '(SELECT COUNT(DISTINCT r.user_id) '
+            'FROM crowdsource_crowdsourceresponse AS r WHERE r.data_id = d.id)',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -2,18 +2,21 @@
 """Models for the Crowdsource application"""
 
 # Django
+from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.core.mail import send_mail
 from django.core.urlresolvers import reverse
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
 # Standard Library
 import json
+from collections import defaultdict
 from HTMLParser import HTMLParser
 from random import choice
 
@@ -24,6 +27,7 @@ from pyembed.core.consumer import PyEmbedConsumerError
 from taggit.managers import TaggableManager
 
 # MuckRock
+from muckrock.core.utils import cache_get_or_set
 from muckrock.crowdsource import fields
 from muckrock.crowdsource.constants import DOCUMENT_URL_RE
 from muckrock.tags.models import TaggedItemBase
@@ -43,6 +47,11 @@ DOCCLOUD_EMBED = """
 </div>
 """
 
+# the number of data items at the front of the queue to choose from
+DATA_QUEUE_SPREAD = 10
+
+FIELD_IDS_CACHE_KEY = 'crowdsource:{}:field_ids'
+
 
 class CrowdsourceQuerySet(models.QuerySet):
     """Object manager for crowdsources"""
@@ -125,8 +134,16 @@ class Crowdsource(models.Model):
         )
 
     def get_data_to_show(self, user):
-        """Get the crowdsource data to show"""
-        options = self.data.get_choices(self.data_limit, user)
+        """Get the crowdsource data to show
+
+        The least answered data items are at the front of the queue.  Pick
+        randomly from the first few, so that volunteers working at the same
+        time tend not to be given the same item.
+        """
+        options = list(
+            self.data.get_choices(self.data_limit, user)
+            .order_by('response_count', 'pk')[:DATA_QUEUE_SPREAD]
+        )
         if options:
             return choice(options)
         else:
@@ -179,6 +196,15 @@ class Crowdsource(models.Model):
         """Get the form JSON for editing the form"""
         return json.dumps([f.get_json() for f in self.fields.all()])
 
+    def get_field_ids(self):
+        """Get a mapping of field labels to field IDs, cached until the
+        fields change"""
+        return cache_get_or_set(
+            FIELD_IDS_CACHE_KEY.format(self.pk),
+            lambda: dict(self.fields.values_list('label', 'pk')),
+            settings.DEFAULT_CACHE_TIMEOUT,
+        )
+
     def get_header_values(self, metadata_keys):
         """Get header values for CSV export"""
         values = ['user', 'datetime', 'skip', 'flag', 'gallery', 'tags']
@@ -198,6 +224,36 @@ class Crowdsource(models.Model):
         else:
             return []
 
+    def get_response_values(self, metadata_keys, batch_size=1000):
+        """Iterate over the values of every response for CSV export
+
+        Responses are fetched in primary key ordered batches, and each
+        batch's users, data, tags and values are loaded in bulk, so the
+        number of queries does not grow with the number of responses
+        """
+        field_ids = list(self.fields.values_list('pk', flat=True))
+        responses = (
+            self.responses.select_related('user', 'data')
+            .prefetch_related('tags').order_by('pk')
+        )
+        last_pk = 0
+        while True:
+            batch = list(responses.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return
+            values = defaultdict(dict)
+            for response_id, field_id, value in (
+                CrowdsourceValue.objects.filter(response__in=batch)
+                .values_list('response_id', 'field_id', 'value')
+            ):
+                values[response_id][field_id] = value
+            for response in batch:
+                yield response.get_values(
+                    metadata_keys,
+                    [values[response.pk].get(f, '') for f in field_ids],
+                )
+            last_pk = batch[-1].pk
+
     def total_assignments(self):
         """Total assignments to be completed"""
         if not self.data.all():
@@ -213,14 +269,39 @@ class CrowdsourceDataQuerySet(models.QuerySet):
 
     def get_choices(self, data_limit, user):
         """Get choices for data to show"""
-        choices = (
-            self.annotate(count=models.Count('responses__user', distinct=True))
-            .filter(count__lt=data_limit)
-        )
+        choices = self.filter(response_count__lt=data_limit)
         if user is not None:
             choices = choices.exclude(responses__user=user)
         return choices
 
+    def update_response_count(self, data_id, user_id, amount):
+        """Change the response count for a data item if this is the user's
+        only response to it"""
+        others = CrowdsourceResponse.objects.filter(
+            data_id=data_id,
+            user_id=user_id,
+        )
+        # a created response is already in the database, a deleted one is not
+        if others.count() == (1 if amount > 0 else 0):
+            self.filter(pk=data_id).update(
+                response_count=F('response_count') + amount
+            )
+
+    def reset_response_counts(self):
+        """Recalculate the response counts from the responses"""
+        self.update(
+            response_count=Coalesce(
+                Subquery(
+                    CrowdsourceResponse.objects.filter(data=OuterRef('pk'))
+                    .order_by().values('data').annotate(
+                        count=models.Count('user', distinct=True)
+                    ).values('count'),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            )
+        )
+
 
 class CrowdsourceData(models.Model):
     """A source of data to show with the crowdsource questions"""
@@ -228,6 +309,9 @@ class CrowdsourceData(models.Model):
     crowdsource = models.ForeignKey(Crowdsource, related_name='data')
     url = models.URLField(max_length=255, verbose_name='Data URL')
     metadata = JSONField(default=dict, blank=True)
+    # the number of distinct users who have responded to this data item,
+    # maintained by the response signal handlers
+    response_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = CrowdsourceDataQuerySet.as_manager()
 
@@ -256,6 +340,7 @@ class CrowdsourceData(models.Model):
 
     class Meta:
         verbose_name = 'assignment data'
+        index_together = (('crowdsource', 'response_count'),)
 
 
 class CrowdsourceField(models.Model):
@@ -362,26 +447,30 @@ class CrowdsourceResponse(models.Model):
             self.datetime,
         )
 
-    def get_values(self, metadata_keys):
-        """Get the values for this response for CSV export"""
+    def get_values(self, metadata_keys, field_values=None):
+        """Get the values for this response for CSV export
+
+        The field values may be passed in, ordered by field, if they have
+        already been loaded
+        """
         values = [
             self.user.username,
             self.datetime.strftime('%Y-%m-%d %H:%M:%S'),
             self.skip,
             self.flag,
             self.gallery,
-            ', '.join(self.tags.values_list('name', flat=True)),
+            ', '.join(t.name for t in self.tags.all()),
         ]
         if self.crowdsource.multiple_per_page:
             values.append(self.number)
         if self.data:
             values.append(self.data.url)
             values.extend(self.data.metadata.get(k, '') for k in metadata_keys)
-        values += list(
-            self.values.order_by('field__order').values_list(
+        if field_values is None:
+            field_values = self.values.order_by('field__order').values_list(
                 'value', flat=True
             )
-        )
+        values += list(field_values)
         return values
 
     def create_values(self, data):
@@ -390,18 +479,14 @@ class CrowdsourceResponse(models.Model):
         # values created for them
         for key in ['data_id', 'full_name', 'email', 'newsletter']:
             data.pop(key, None)
-        for label, value in data.iteritems():
-            try:
-                field = CrowdsourceField.objects.get(
-                    crowdsource=self.crowdsource,
-                    label=label,
-                )
-                self.values.create(
-                    field=field,
-                    value=value if value is not None else '',
-                )
-            except CrowdsourceField.DoesNotExist:
-                pass
+        field_ids = self.crowdsource.get_field_ids()
+        CrowdsourceValue.objects.bulk_create([
+            CrowdsourceValue(
+                response=self,
+                field_id=field_ids[label],
+                value=value if value is not None else '',
+            ) for label, value in data.iteritems() if label in field_ids
+        ])
 
     def send_email(self, email):
         """Send an email of this response"""
@@ -424,6 +509,7 @@ class CrowdsourceResponse(models.Model):
 
     class Meta:
         verbose_name = 'assignment response'
+        index_together = (('data', 'user'),)
 
 
 class CrowdsourceValue(models.Model):
@@ -0,0 +1,66 @@
+"""Model signal handlers for the crowdsource application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.core import caching
+from muckrock.crowdsource.models import (
+    FIELD_IDS_CACHE_KEY,
+    CrowdsourceData,
+    CrowdsourceField,
+    CrowdsourceResponse,
+)
+
+
+def response_count_add(sender, instance, created, **kwargs):
+    """Count a new response towards its data item's response count"""
+    # pylint: disable=unused-argument
+    if created and instance.data_id is not None:
+        CrowdsourceData.objects.update_response_count(
+            instance.data_id,
+            instance.user_id,
+            1,
+        )
+
+
+def response_count_remove(sender, instance, **kwargs):
+    """Remove a deleted response from its data item's response count"""
+    # pylint: disable=unused-argument
+    if instance.data_id is not None:
+        CrowdsourceData.objects.update_response_count(
+            instance.data_id,
+            instance.user_id,
+            -1,
+        )
+
+
+def field_ids_clear(sender, instance, **kwargs):
+    """Clear the cached field label mapping when the fields change"""
+    # pylint: disable=unused-argument
+    caching.delete(FIELD_IDS_CACHE_KEY.format(instance.crowdsource_id))
+
+
+post_save.connect(
+    response_count_add,
+    sender=CrowdsourceResponse,
+    dispatch_uid='muckrock.crowdsource.signals.response_count_add',
+)
+
+post_delete.connect(
+    response_count_remove,
+    sender=CrowdsourceResponse,
+    dispatch_uid='muckrock.crowdsource.signals.response_count_remove',
+)
+
+post_save.connect(
+    field_ids_clear,
+    sender=CrowdsourceField,
+    dispatch_uid='muckrock.crowdsource.signals.field_ids_clear_save',
+)
+
+post_delete.connect(
+    field_ids_clear,
+    sender=CrowdsourceField,
+    dispatch_uid='muckrock.crowdsource.signals.field_ids_clear_delete',
+)
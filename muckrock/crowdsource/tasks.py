@@ -3,7 +3,8 @@ Celery tasks for the crowdsource application
 """
 
 # Django
-from celery.task import task
+from celery.schedules import crontab
+from celery.task import periodic_task, task
 from django.conf import settings
 
 # Standard Library
@@ -14,26 +15,43 @@ from urllib import quote_plus
 import requests
 
 # MuckRock
-from muckrock.crowdsource.models import Crowdsource
+from muckrock.crowdsource.models import Crowdsource, CrowdsourceData
 
 logger = logging.getLogger(__name__)
 
 
-@task(name='muckrock.crowdsource.tasks.datum_per_page')
-def datum_per_page(crowdsource_pk, doc_id, metadata, **kwargs):
-    """Create a crowdsource data item for each page of the document"""
+def page_data(crowdsource, doc_id, pages, metadata):
+    """Create, but do not save, a crowdsource data item for each page"""
+    return [
+        CrowdsourceData(
+            crowdsource=crowdsource,
+            url=u'https://www.documentcloud.org/documents/'
+            u'{}/pages/{}.html'.format(doc_id, i),
+            metadata=metadata,
+        ) for i in xrange(1, pages + 1)
+    ]
 
-    crowdsource = Crowdsource.objects.get(pk=crowdsource_pk)
 
-    doc_id = quote_plus(doc_id.encode('utf-8'))
-    resp = requests.get(
+def get_page_count(session, doc_id):
+    """Get the page count for a document from DocumentCloud"""
+    resp = session.get(
         u'https://www.documentcloud.org'
         u'/api/documents/{}.json'.format(
             doc_id,
         )
     )
+    return resp.json()['document']['pages']
+
+
+@task(name='muckrock.crowdsource.tasks.datum_per_page')
+def datum_per_page(crowdsource_pk, doc_id, metadata, **kwargs):
+    """Create a crowdsource data item for each page of the document"""
+
+    crowdsource = Crowdsource.objects.get(pk=crowdsource_pk)
+
+    doc_id = quote_plus(doc_id.encode('utf-8'))
     try:
-        resp_json = resp.json()
+        pages = get_page_count(requests.Session(), doc_id)
     except ValueError as exc:
         datum_per_page.retry(
             args=[crowdsource_pk, doc_id, metadata],
@@ -41,16 +59,38 @@ def datum_per_page(crowdsource_pk, doc_id, metadata, **kwargs):
             kwargs=kwargs,
             exc=exc,
         )
-    pages = resp_json['document']['pages']
-    for i in xrange(1, pages + 1):
-        url = (
-            u'https://www.documentcloud.org/documents/'
-            u'{}/pages/{}.html'.format(doc_id, i)
-        )
-        crowdsource.data.create(
-            url=url,
-            metadata=metadata,
-        )
+    CrowdsourceData.objects.bulk_create(
+        page_data(crowdsource, doc_id, pages, metadata),
+        batch_size=settings.CROWDSOURCE_BULK_SIZE,
+    )
+
+
+@task(name='muckrock.crowdsource.tasks.datum_per_page_batch')
+def datum_per_page_batch(crowdsource_pk, doc_ids, metadata, **kwargs):
+    """Create a crowdsource data item for each page of several documents,
+    reusing a single connection to DocumentCloud"""
+
+    crowdsource = Crowdsource.objects.get(pk=crowdsource_pk)
+
+    data = []
+    session = requests.Session()
+    for doc_id in doc_ids:
+        doc_id = quote_plus(doc_id.encode('utf-8'))
+        try:
+            pages = get_page_count(session, doc_id)
+        except ValueError as exc:
+            # nothing has been saved yet, so the whole batch may be retried
+            datum_per_page_batch.retry(
+                args=[crowdsource_pk, doc_ids, metadata],
+                countdown=300,
+                kwargs=kwargs,
+                exc=exc,
+            )
+        data.extend(page_data(crowdsource, doc_id, pages, metadata))
+    CrowdsourceData.objects.bulk_create(
+        data,
+        batch_size=settings.CROWDSOURCE_BULK_SIZE,
+    )
 
 
 @task(name='muckrock.crowdsource.tasks.import_doccloud_proj')
@@ -72,7 +112,7 @@ def import_doccloud_proj(
         resp_json = resp.json()
     except ValueError as exc:
         import_doccloud_proj.retry(
-            args=[crowdsource_pk, proj_id, metadata],
+            args=[crowdsource_pk, proj_id, metadata, doccloud_each_page],
             countdown=300,
             kwargs=kwargs,
             exc=exc,
@@ -81,16 +121,36 @@ def import_doccloud_proj(
         if 'error' in resp_json:
             logger.warn('Error importing DocCloud project: %s', proj_id)
             return
-        for doc_id in resp_json['project']['document_ids']:
-            if doccloud_each_page:
-                datum_per_page.delay(
+        doc_ids = resp_json['project']['document_ids']
+        if doccloud_each_page:
+            size = settings.CROWDSOURCE_DOCCLOUD_BATCH_SIZE
+            for i in xrange(0, len(doc_ids), size):
+                datum_per_page_batch.delay(
                     crowdsource.pk,
-                    doc_id,
+                    doc_ids[i:i + size],
                     metadata,
                 )
-            else:
-                crowdsource.data.create(
-                    url='https://www.documentcloud.org/documents/{}.html'
-                    .format(doc_id),
-                    metadata=metadata,
-                )
+        else:
+            CrowdsourceData.objects.bulk_create(
+                [
+                    CrowdsourceData(
+                        crowdsource=crowdsource,
+                        url='https://www.documentcloud.org/documents/{}.html'
+                        .format(doc_id),
+                        metadata=metadata,
+                    ) for doc_id in doc_ids
+                ],
+                batch_size=settings.CROWDSOURCE_BULK_SIZE,
+            )
+
+
+@periodic_task(
+    run_every=crontab(hour=4, minute=10),
+    name='muckrock.crowdsource.tasks.reconcile_response_counts',
+)
+def reconcile_response_counts():
+    """Recalculate the maintained response counts for open crowdsources,
+    in case any updates were missed"""
+    CrowdsourceData.objects.filter(
+        crowdsource__status='open'
+    ).reset_response_counts()
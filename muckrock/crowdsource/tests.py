@@ -11,6 +11,7 @@ import json
 from datetime import datetime
 
 # Third Party
+import requests_mock
 from nose.tools import (
     assert_false,
     assert_in,
@@ -30,7 +31,8 @@ from muckrock.crowdsource.factories import (
     CrowdsourceTextFieldFactory,
     CrowdsourceValueFactory,
 )
-from muckrock.crowdsource.models import Crowdsource
+from muckrock.crowdsource.models import Crowdsource, CrowdsourceData
+from muckrock.crowdsource.tasks import import_doccloud_proj
 
 
 class TestCrowdsource(TestCase):
@@ -202,6 +204,39 @@ class TestCrowdsource(TestCase):
         data.save()
         eq_(set(crowdsource.get_metadata_keys()), {'foo', 'muck'})
 
+    def test_get_response_values(self):
+        """Get the values for all responses, pivoted by field"""
+        crowdsource = CrowdsourceFactory()
+        fields = [
+            CrowdsourceTextFieldFactory(crowdsource=crowdsource, order=1),
+            CrowdsourceTextFieldFactory(crowdsource=crowdsource, order=0),
+        ]
+        responses = CrowdsourceResponseFactory.create_batch(
+            3,
+            crowdsource=crowdsource,
+            data=None,
+        )
+        for response in responses:
+            CrowdsourceValueFactory(
+                response=response,
+                field=fields[0],
+                value='Second',
+            )
+        CrowdsourceValueFactory(
+            response=responses[0],
+            field=fields[1],
+            value='First',
+        )
+        responses[1].tags.add('foo')
+
+        values = list(crowdsource.get_response_values([], batch_size=2))
+        eq_(len(values), 3)
+        eq_(values[0][0], responses[0].user.username)
+        eq_(values[0][-2:], ['First', 'Second'])
+        eq_(values[1][5], 'foo')
+        eq_(values[1][-2:], ['', 'Second'])
+        eq_(values[2][-2:], ['', 'Second'])
+
     def test_get_viewable(self):
         """Get the list of viewable crowdsources for the user"""
         project = ProjectFactory()
@@ -301,6 +336,30 @@ class TestCrowdsourceData(TestCase):
             set(data[2:]),
         )
 
+    def test_response_count(self):
+        """The response count should track distinct responding users"""
+        data = CrowdsourceDataFactory()
+        user = UserFactory()
+        CrowdsourceResponseFactory.create_batch(
+            2,
+            crowdsource=data.crowdsource,
+            data=data,
+            user=user,
+        )
+        response = CrowdsourceResponseFactory(
+            crowdsource=data.crowdsource,
+            data=data,
+        )
+        data.refresh_from_db()
+        eq_(data.response_count, 2)
+        response.delete()
+        data.refresh_from_db()
+        eq_(data.response_count, 1)
+        CrowdsourceData.objects.filter(pk=data.pk).update(response_count=5)
+        CrowdsourceData.objects.filter(pk=data.pk).reset_response_counts()
+        data.refresh_from_db()
+        eq_(data.response_count, 1)
+
 
 class TestCrowdsourceResponse(TestCase):
     """Test the Crowdsource Response model"""
@@ -338,3 +397,70 @@ class TestCrowdsourceResponse(TestCase):
                 'Value',
             ],
         )
+
+    def test_create_values(self):
+        """Test creating the values from form data"""
+        crowdsource = CrowdsourceFactory()
+        response = CrowdsourceResponseFactory(crowdsource=crowdsource)
+        CrowdsourceTextFieldFactory(
+            crowdsource=crowdsource,
+            label='Name',
+            order=0,
+        )
+        CrowdsourceTextFieldFactory(
+            crowdsource=crowdsource,
+            label='Age',
+            order=1,
+        )
+        response.create_values({
+            'data_id': 1,
+            'Name': 'Foo',
+            'Age': None,
+            'Missing': 'Bar',
+        })
+        eq_(
+            list(
+                response.values.order_by('field__order')
+                .values_list('value', flat=True)
+            ),
+            ['Foo', ''],
+        )
+
+
+class TestCrowdsourceTasks(TestCase):
+    """Test the crowdsource tasks"""
+
+    @requests_mock.Mocker()
+    def test_import_doccloud_proj(self, mock):
+        """Importing a project should create a data item per page"""
+        crowdsource = CrowdsourceFactory()
+        mock.get(
+            'https://www.documentcloud.org/api/projects/1.json',
+            json={'project': {
+                'document_ids': ['1-foo', '2-bar']
+            }},
+        )
+        mock.get(
+            'https://www.documentcloud.org/api/documents/1-foo.json',
+            json={'document': {
+                'pages': 2
+            }},
+        )
+        mock.get(
+            'https://www.documentcloud.org/api/documents/2-bar.json',
+            json={'document': {
+                'pages': 3
+            }},
+        )
+        import_doccloud_proj(crowdsource.pk, 1, {'meta': 'data'}, True)
+        eq_(crowdsource.data.count(), 5)
+        ok_(
+            crowdsource.data.filter(
+                url='https://www.documentcloud.org/documents/'
+                '2-bar/pages/3.html',
+                metadata={'meta': 'data'},
+            ).exists()
+        )
+
+        import_doccloud_proj(crowdsource.pk, 1, {}, False)
+        eq_(crowdsource.data.count(), 7)
@@ -63,6 +63,13 @@ class CrowdsourceDetailView(DetailView):
         )
     )
 
+    def get_queryset(self):
+        """Do not prefetch every response when exporting them"""
+        queryset = super(CrowdsourceDetailView, self).get_queryset()
+        if self.request.GET.get('csv'):
+            queryset = queryset.prefetch_related(None)
+        return queryset
+
     def dispatch(self, *args, **kwargs):
         """Redirect to assignment page for non owner, non staff"""
         crowdsource = self.get_object()
@@ -105,8 +112,8 @@ class CrowdsourceDetailView(DetailView):
             chain(
                 [writer.writerow(crowdsource.get_header_values(metadata_keys))],
                 (
-                    writer.writerow(csr.get_values(metadata_keys))
-                    for csr in crowdsource.responses.all()
+                    writer.writerow(values) for values in
+                    crowdsource.get_response_values(metadata_keys)
                 ),
             ),
             content_type='text/csv',
@@ -114,7 +121,7 @@ class CrowdsourceDetailView(DetailView):
         response['Content-Disposition'] = (
             'attachment; '
             'filename="results-{}-{}.csv"'.format(
-                self.get_object().slug,
+                crowdsource.slug,
                 date.today().isoformat(),
             )
         )
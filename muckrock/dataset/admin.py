@@ -20,6 +20,7 @@ class DataFieldInline(admin.TabularInline):
     """Inline for a data field"""
     model = DataField
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ('null_rate', 'distinct_count', 'min_value', 'max_value')
     extra = 0
 
 
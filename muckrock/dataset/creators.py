@@ -2,10 +2,30 @@
 Creator objects for creating data sets
 """
 
+# Standard Library
+import shutil
+import zipfile
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
+from xml.etree import cElementTree as ElementTree
+
 # Third Party
 import unicodecsv as csv
 import xlrd
 
+# files are copied to local temporary files before being read, as the
+# spreadsheet formats need random access - up to this size they are kept
+# in memory, larger files are written to disk
+SPOOL_SIZE = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = (
+    '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+)
+XLSX_PKG_REL_NS = (
+    '{http://schemas.openxmlformats.org/package/2006/relationships}'
+)
+
 
 class CsvCreator(object):
     """Create a dataset from a csv"""
@@ -30,14 +50,168 @@ class CsvCreator(object):
             yield row[:header_len]
 
 
+def _sheet_name(name, sheet_name, sheet_count):
+    """Name each sheet's dataset after the sheet if there is more than one"""
+    if sheet_count > 1:
+        return u'{} - {}'.format(name, sheet_name)
+    return name
+
+
 class XlsCreator(object):
-    """Create a dataset from a csv"""
+    """Create a dataset from a sheet of an xls file"""
+
+    def __init__(self, name, book, index):
+        self.name = _sheet_name(name, book.sheet_names()[index], book.nsheets)
+        self.book = book
+        self.index = index
+
+    @classmethod
+    def from_file(cls, name, file_):
+        """Get a creator for each sheet of the file
+
+        The file is copied to disk, and the workbook is opened from there,
+        so sheets are loaded one at a time instead of all being read into
+        memory
+        """
+        temp_file = NamedTemporaryFile(suffix='.xls')
+        shutil.copyfileobj(file_, temp_file, CHUNK_SIZE)
+        temp_file.flush()
+        book = xlrd.open_workbook(temp_file.name, on_demand=True)
+        # keep the temporary file open for as long as the book is used
+        book.temp_file = temp_file
+        return [cls(name, book, i) for i in xrange(book.nsheets)]
 
-    def __init__(self, name, file_):
+    def get_name(self):
+        """Get the name of the dataset"""
+        return self.name
+
+    def get_headers(self):
+        """Get the header values of the dataset"""
+        return self.book.sheet_by_index(self.index).row_values(0)
+
+    def get_rows(self):
+        """Return an iterator of the datasets row values"""
+        sheet = self.book.sheet_by_index(self.index)
+        for i in xrange(1, sheet.nrows):
+            yield [unicode(v) for v in sheet.row_values(i)]
+        self.book.unload_sheet(self.index)
+
+
+def _column_index(ref):
+    """The zero based column index of a cell reference, such as `AB12`"""
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+class XlsxWorkbook(object):
+    """Read the rows of an xlsx workbook's sheets, streaming them from its
+    xml, so only the current row and the workbook's shared strings are held
+    in memory"""
+
+    def __init__(self, file_):
+        self.file = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        shutil.copyfileobj(file_, self.file, CHUNK_SIZE)
+        self.file.seek(0)
+        self.zip = zipfile.ZipFile(self.file)
+        self.shared_strings = self._read_shared_strings()
+
+    def _read_shared_strings(self):
+        """Cells with text refer to it by its index in the shared strings"""
+        if 'xl/sharedStrings.xml' not in self.zip.namelist():
+            return []
+        strings = []
+        with self.zip.open('xl/sharedStrings.xml') as xml_file:
+            for _, elem in ElementTree.iterparse(xml_file):
+                if elem.tag == XLSX_NS + 'si':
+                    # rich text is split into runs, each with their own text
+                    texts = elem.iter(XLSX_NS + 't')
+                    strings.append(u''.join(t.text or u'' for t in texts))
+                    elem.clear()
+        return strings
+
+    def get_sheets(self):
+        """Get the name and path of each sheet, in order"""
+        with self.zip.open('xl/_rels/workbook.xml.rels') as xml_file:
+            targets = {
+                rel.get('Id'): rel.get('Target')
+                for rel in ElementTree.parse(xml_file)
+                .iter(XLSX_PKG_REL_NS + 'Relationship')
+            }
+        with self.zip.open('xl/workbook.xml') as xml_file:
+            sheets = ElementTree.parse(xml_file).iter(XLSX_NS + 'sheet')
+            return [(
+                sheet.get('name'),
+                self._sheet_path(targets[sheet.get(XLSX_REL_NS + 'id')]),
+            ) for sheet in sheets]
+
+    @staticmethod
+    def _sheet_path(target):
+        """Targets are relative to the workbook, unless they are absolute"""
+        if target.startswith('/'):
+            return target[1:]
+        return 'xl/' + target
+
+    def _cell_value(self, cell):
+        """Get a cell's value as text"""
+        type_ = cell.get('t')
+        if type_ == 'inlineStr':
+            return u''.join(t.text or u'' for t in cell.iter(XLSX_NS + 't'))
+        value = cell.find(XLSX_NS + 'v')
+        if value is None or value.text is None:
+            return u''
+        if type_ == 's':
+            return self.shared_strings[int(value.text)]
+        elif type_ == 'b':
+            return u'TRUE' if value.text == '1' else u'FALSE'
+        return unicode(value.text)
+
+    def iter_rows(self, path):
+        """Iterate over the value of each row in the sheet"""
+        with self.zip.open(path) as xml_file:
+            sheet_data = None
+            for event, elem in ElementTree.iterparse(
+                xml_file, events=('start', 'end')
+            ):
+                if event == 'start' and elem.tag == XLSX_NS + 'sheetData':
+                    sheet_data = elem
+                elif event == 'end' and elem.tag == XLSX_NS + 'row':
+                    row = []
+                    for cell in elem.iter(XLSX_NS + 'c'):
+                        ref = cell.get('r')
+                        index = _column_index(ref) if ref else len(row)
+                        # empty cells may be left out
+                        row.extend([u''] * (index - len(row)))
+                        row.append(self._cell_value(cell))
+                    # drop the rows we have read
+                    sheet_data.clear()
+                    yield row
+
+
+class XlsxCreator(object):
+    """Create a dataset from a sheet of an xlsx file"""
+
+    def __init__(self, name, workbook, path):
         self.name = name
-        book = xlrd.open_workbook(file_contents=file_.read())
-        self.sheet = book.sheet_by_index(0)
-        self.headers = next(self.csv_reader)
+        self.workbook = workbook
+        self.path = path
+        # the sheet is not opened until it is read, as the sheets share the
+        # workbook's file, and must be read one at a time
+        self.rows = None
+        self.headers = None
+
+    @classmethod
+    def from_file(cls, name, file_):
+        """Get a creator for each sheet of the file"""
+        workbook = XlsxWorkbook(file_)
+        sheets = workbook.get_sheets()
+        return [
+            cls(_sheet_name(name, sheet_name, len(sheets)), workbook, path)
+            for sheet_name, path in sheets
+        ]
 
     def get_name(self):
         """Get the name of the dataset"""
@@ -45,12 +219,16 @@ class XlsCreator(object):
 
     def get_headers(self):
         """Get the header values of the dataset"""
-        return self.sheet.row_values(0)
+        if self.rows is None:
+            self.rows = self.workbook.iter_rows(self.path)
+            self.headers = next(self.rows, [])
+        return self.headers
 
     def get_rows(self):
         """Return an iterator of the datasets row values"""
-        for i in xrange(1, self.sheet.nrows):
-            yield [unicode(v) for v in self.sheet.row_values(i)]
+        header_len = len(self.get_headers())
+        for row in self.rows:
+            yield row[:header_len]
 
 
 class CrowdsourceCreator(object):
@@ -70,5 +248,4 @@ class CrowdsourceCreator(object):
 
     def get_rows(self):
         """Return an iterator of the datasets row values"""
-        for response in self.crowdsource.responses.all():
-            yield response.get_values(self.metadata_keys)
+        return self.crowdsource.get_response_values(self.metadata_keys)
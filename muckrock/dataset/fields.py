@@ -27,6 +27,32 @@ class Field(object):
         else:
             return True
 
+    @classmethod
+    def validate_all(cls, values):
+        """Are all of these values valid for this type?
+
+        Values checked by a regular expression are checked all at once, by
+        matching it line by line against all of the values joined together
+        """
+        values = [unicode(v) for v in values if v != '']
+        if not values:
+            # a column of only blanks is valid for any type which
+            # allows blanks
+            return cls.validate('')
+        validator = getattr(cls, 'validator', None)
+        # subclasses, such as the url validator, do more than match the regex
+        if (
+            type(validator) is RegexValidator  # pylint: disable=unidiomatic-typecheck
+            and not validator.inverse_match
+            and not any('\n' in v for v in values)
+        ):
+            regex = re.compile(
+                validator.regex.pattern,
+                validator.regex.flags | re.MULTILINE,
+            )
+            return len(regex.findall('\n'.join(values))) == len(values)
+        return all(cls.validate(v) for v in values)
+
 
 class TextField(Field):
     """A text field"""
@@ -41,6 +67,11 @@ class TextField(Field):
         """Is this value valid for this type?"""
         return True
 
+    @classmethod
+    def validate_all(cls, values):
+        """Are all of these values valid for this type?"""
+        return True
+
 
 class MultiTextField(Field):
     """A text field"""
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataset', '0004_datafield_hidden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datafield',
+            name='distinct_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datafield',
+            name='max_value',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='datafield',
+            name='min_value',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='datafield',
+            name='null_rate',
+            field=models.FloatField(blank=True, help_text=b'The fraction of rows which are blank for this field', null=True),
+        ),
+    ]
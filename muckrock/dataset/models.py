@@ -8,6 +8,7 @@ from django.contrib.postgres.fields import JSONField
 from django.contrib.postgres.fields.jsonb import KeyTransform
 from django.core.urlresolvers import reverse
 from django.db import models
+from django.db.models import Case, F, Value, When
 from django.db.models.expressions import OrderBy, RawSQL
 from django.template.defaultfilters import slugify
 
@@ -18,8 +19,14 @@ from collections import defaultdict
 from itertools import izip_longest
 
 # MuckRock
-from muckrock.dataset.creators import CrowdsourceCreator, CsvCreator, XlsCreator
+from muckrock.dataset.creators import (
+    CrowdsourceCreator,
+    CsvCreator,
+    XlsCreator,
+    XlsxCreator,
+)
 from muckrock.dataset.fields import FIELD_DICT, FIELDS
+from muckrock.dataset.profiler import ColumnProfiler
 
 logger = logging.getLogger(__name__)
 
@@ -46,15 +53,28 @@ class DataSetQuerySet(models.QuerySet):
         return self._create_from(creator, user)
 
     def create_from_xls(self, name, user, file_):
-        """Create a data set from an xls file"""
-        creator = XlsCreator(name, file_)
-        return self._create_from(creator, user)
+        """Create a data set from each sheet of an xls file"""
+        return [
+            self._create_from(creator, user)
+            for creator in XlsCreator.from_file(name, file_)
+        ]
+
+    def create_from_xlsx(self, name, user, file_):
+        """Create a data set from each sheet of an xlsx file"""
+        return [
+            self._create_from(creator, user)
+            for creator in XlsxCreator.from_file(name, file_)
+        ]
 
     def create_from_crowdsource(self, user, crowdsource):
         """Create a data set from crowdsource's responses"""
         creator = CrowdsourceCreator(crowdsource)
         return self._create_from(creator, user)
 
+    def bump_version(self, dataset_id):
+        """Invalidate the data set's cached data"""
+        self.filter(pk=dataset_id).update(version=F('version') + 1)
+
     def _create_from(self, creator, user):
         """Create a data set from some source"""
         # pylint: disable=broad-except
@@ -72,17 +92,17 @@ class DataSetQuerySet(models.QuerySet):
                     slug=slug,
                     field_number=i,
                 )
+            profiler = ColumnProfiler(slug_headers)
             for i, row in enumerate(creator.get_rows()):
-                dataset.rows.create(
-                    data=dict(izip_longest(
-                        slug_headers,
-                        row,
-                        fillvalue='',
-                    )),
-                    row_number=i,
-                )
-
-            dataset.detect_field_types()
+                data = dict(izip_longest(
+                    slug_headers,
+                    row,
+                    fillvalue='',
+                ))
+                dataset.rows.create(data=data, row_number=i)
+                profiler.add(data)
+
+            dataset.detect_field_types(profiler)
         except Exception as exc:
             logger.error(
                 'DataSet creation: %s',
@@ -120,6 +140,8 @@ class DataSet(models.Model):
         ),
         default='ready',
     )
+    # bumped whenever the rows or fields change, to invalidate cached data
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = DataSetQuerySet.as_manager()
 
@@ -134,29 +156,19 @@ class DataSet(models.Model):
                     'idx': self.pk},
         )
 
-    def detect_field_types(self):
-        """Auto detect column types"""
-        # only look at first 100 rows, as there could be a lot of data
-        rows = self.rows.all()[:100]
-        fields = self.fields.all()
+    def detect_field_types(self, profiler=None):
+        """Auto detect column types and profile the columns
+
+        If no profiler is given, one is fed all of the rows now"""
+        fields = list(self.fields.all())
+        if profiler is None:
+            profiler = ColumnProfiler([f.slug for f in fields])
+            for data in self.rows.values_list('data', flat=True).iterator():
+                profiler.add(data)
         for field in fields:
-            for field_type in FIELDS:
-                has_validate_all = hasattr(field_type, 'validate_all')
-                validate_all = (
-                    has_validate_all and field_type.validate_all([
-                        row.data[field.slug] for row in rows
-                    ])
-                )
-                all_valid = (
-                    not has_validate_all and all(
-                        field_type.validate(row.data[field.slug])
-                        for row in rows
-                    )
-                )
-                if validate_all or all_valid:
-                    field.type = field_type.slug
-                    field.save()
-                    break
+            for attr, value in profiler.profile(field.slug).iteritems():
+                setattr(field, attr, value)
+        DataField.objects.update_profiles(fields)
 
     def save(self, *args, **kwargs):
         """Save the slug"""
@@ -174,6 +186,29 @@ class DataFieldQuerySet(models.QuerySet):
         """Return all visible fields"""
         return self.filter(hidden=False)
 
+    def update_profiles(self, fields):
+        """Save the type and profile of all of the fields in one query"""
+        if not fields:
+            return
+
+        def case(attr, output_field):
+            """Set the attribute to each field's own value"""
+            return Case(
+                *[
+                    When(pk=f.pk, then=Value(getattr(f, attr)))
+                    for f in fields
+                ],
+                output_field=output_field
+            )
+
+        self.filter(pk__in=[f.pk for f in fields]).update(
+            type=case('type', models.CharField()),
+            null_rate=case('null_rate', models.FloatField()),
+            distinct_count=case('distinct_count', models.IntegerField()),
+            min_value=case('min_value', models.CharField()),
+            max_value=case('max_value', models.CharField()),
+        )
+
 
 class DataField(models.Model):
     """A column of a data set"""
@@ -192,6 +227,16 @@ class DataField(models.Model):
     )
     hidden = models.BooleanField(default=False)
 
+    # profile of the column's values, set when the type is detected
+    null_rate = models.FloatField(
+        blank=True,
+        null=True,
+        help_text='The fraction of rows which are blank for this field',
+    )
+    distinct_count = models.PositiveIntegerField(blank=True, null=True)
+    min_value = models.CharField(max_length=255, blank=True)
+    max_value = models.CharField(max_length=255, blank=True)
+
     objects = DataFieldQuerySet.as_manager()
 
     def __unicode__(self):
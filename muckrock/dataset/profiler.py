@@ -0,0 +1,130 @@
+"""
+Profiling of data set columns
+
+The profiler is fed every row of a data set as it is ingested.  It keeps a
+uniform random sample of the rows (reservoir sampling), so types are
+detected from rows across the whole data set instead of only its first
+rows, along with stats over every row - the number of blank values, the
+number of distinct values (up to a limit) and the smallest and largest
+values.
+"""
+
+# Standard Library
+import random
+
+# MuckRock
+from muckrock.dataset.fields import FIELDS
+
+# how many rows to sample for detecting the column types
+SAMPLE_SIZE = 1000
+# stop counting the distinct values of a column after this many, to bound
+# the memory used for very large data sets
+MAX_DISTINCT = 100000
+
+
+def _number(value):
+    """The value as a number, or None if it is not a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ColumnStats(object):
+    """Stats over every value of a single column"""
+
+    def __init__(self, max_distinct=MAX_DISTINCT):
+        self.blank_count = 0
+        # store hashes rather than the values themselves to save memory,
+        # and only up to `max_distinct` of them
+        self.hashes = set()
+        self.max_distinct = max_distinct
+        self.min_text = None
+        self.max_text = None
+        self.min_number = None
+        self.max_number = None
+
+    def add(self, value):
+        """Add a value to the stats"""
+        if value == '':
+            self.blank_count += 1
+            return
+        # rows may hold other types, such as the booleans and numbers in
+        # crowdsource responses, but the stats are kept as text
+        value = unicode(value)
+        if self.hashes is not None:
+            self.hashes.add(hash(value))
+            if len(self.hashes) > self.max_distinct:
+                self.hashes = None
+        if self.min_text is None or value < self.min_text:
+            self.min_text = value
+        if self.max_text is None or value > self.max_text:
+            self.max_text = value
+        number = _number(value)
+        if number is not None:
+            if self.min_number is None or number < self.min_number[0]:
+                self.min_number = (number, value)
+            if self.max_number is None or number > self.max_number[0]:
+                self.max_number = (number, value)
+
+    def min_max(self, type_):
+        """The smallest and largest values, compared as numbers for
+        numeric types and as text otherwise"""
+        if type_ in ('number', 'money') and self.min_number is not None:
+            return self.min_number[1], self.max_number[1]
+        return self.min_text, self.max_text
+
+    def distinct_count(self):
+        """The number of distinct values, or None if there were too many
+        to count"""
+        return len(self.hashes) if self.hashes is not None else None
+
+
+class ColumnProfiler(object):
+    """Profile the columns of a data set from its rows"""
+
+    def __init__(self, slugs, sample_size=SAMPLE_SIZE, seed=None):
+        self.slugs = slugs
+        self.sample_size = sample_size
+        self.sample = []
+        self.row_count = 0
+        self.stats = {slug: ColumnStats() for slug in slugs}
+        self._random = random.Random(seed)
+
+    def add(self, data):
+        """Add a row, as a dictionary of values keyed by column slug"""
+        self.row_count += 1
+        for slug in self.slugs:
+            self.stats[slug].add(data.get(slug, ''))
+        if len(self.sample) < self.sample_size:
+            self.sample.append(data)
+        else:
+            # keep each row seen so far with equal probability
+            i = self._random.randint(0, self.row_count - 1)
+            if i < self.sample_size:
+                self.sample[i] = data
+
+    def detect_type(self, slug):
+        """Detect the column's type from the sampled rows"""
+        # each distinct value only needs to be checked once
+        values = set(data.get(slug, '') for data in self.sample)
+        for field_type in FIELDS:
+            if field_type.validate_all(values):
+                return field_type.slug
+        return 'text'
+
+    def profile(self, slug):
+        """The detected type and stats for the column"""
+        stats = self.stats[slug]
+        type_ = self.detect_type(slug)
+        min_value, max_value = stats.min_max(type_)
+        return {
+            'type': type_,
+            'null_rate': (
+                float(stats.blank_count) / self.row_count
+                if self.row_count else None
+            ),
+            'distinct_count': stats.distinct_count(),
+            'min_value': (min_value or '')[:255],
+            'max_value': (max_value or '')[:255],
+        }
@@ -0,0 +1,40 @@
+"""Model signal handlers for the dataset application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.dataset.models import DataField, DataRow, DataSet
+
+
+def dataset_bump_version(sender, instance, **kwargs):
+    """Invalidate the data set's cached data when a row or field changes"""
+    # pylint: disable=unused-argument
+    if kwargs.get('raw'):
+        return
+    # the cache is not used until the data set is ready, so do not bump
+    # the version for each row as it is being created
+    if instance.dataset.status == 'processing':
+        return
+    DataSet.objects.bump_version(instance.dataset_id)
+
+
+post_save.connect(
+    dataset_bump_version,
+    sender=DataRow,
+    dispatch_uid='muckrock.dataset.signals.row_bump_version',
+)
+
+post_save.connect(
+    dataset_bump_version,
+    sender=DataField,
+    dispatch_uid='muckrock.dataset.signals.field_bump_version',
+)
+
+# rows are only deleted along with their data set, and a delete handler
+# would stop them from being deleted in bulk, so only fields are handled
+post_delete.connect(
+    dataset_bump_version,
+    sender=DataField,
+    dispatch_uid='muckrock.dataset.signals.field_delete_bump_version',
+)
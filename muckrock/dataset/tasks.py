@@ -18,7 +18,8 @@ from smart_open import smart_open
 from muckrock.dataset.models import DataSet
 
 CSV_FILES = ('.csv',)
-EXCEL_FILES = ('.xls', '.xlsx')
+XLS_FILES = ('.xls',)
+XLSX_FILES = ('.xlsx',)
 
 
 @task(name='muckrock.dataset.tasks.process_dataset_file')
@@ -26,7 +27,7 @@ def process_dataset_file(file_key, user_pk):
     """Generate a dataset from a file stored on S3"""
     base_name = os.path.basename(file_key)
     title, ext = os.path.splitext(base_name)
-    if ext not in CSV_FILES + EXCEL_FILES:
+    if ext not in CSV_FILES + XLS_FILES + XLSX_FILES:
         # don't bother continuing if it is an illegal file type
         return
     user = User.objects.get(pk=user_pk)
@@ -39,5 +40,7 @@ def process_dataset_file(file_key, user_pk):
     with smart_open(key) as data_file:
         if ext in CSV_FILES:
             DataSet.objects.create_from_csv(title, user, data_file)
-        elif ext in EXCEL_FILES:
+        elif ext in XLS_FILES:
             DataSet.objects.create_from_xls(title, user, data_file)
+        elif ext in XLSX_FILES:
+            DataSet.objects.create_from_xlsx(title, user, data_file)
@@ -11,6 +11,7 @@ from django.test import RequestFactory, TestCase
 
 # Standard Library
 import random
+import zipfile
 from cStringIO import StringIO
 
 # Third Party
@@ -19,8 +20,67 @@ from nose.tools import assert_false, assert_true, eq_
 # MuckRock
 from muckrock.core.factories import UserFactory
 from muckrock.core.test_utils import mock_middleware
+from muckrock.crowdsource.factories import (
+    CrowdsourceFactory,
+    CrowdsourceResponseFactory,
+)
 from muckrock.dataset import fields, views
 from muckrock.dataset.models import DataField, DataRow, DataSet
+from muckrock.dataset.profiler import ColumnProfiler, ColumnStats
+
+
+def make_xlsx(sheets):
+    """Make a minimal xlsx file, with inline strings, from a dictionary of
+    sheet names to lists of rows"""
+    main_ns = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    rel_ns = (
+        'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    )
+    file_ = StringIO()
+    with zipfile.ZipFile(file_, 'w') as xlsx:
+        names = sorted(sheets)
+        xlsx.writestr(
+            'xl/workbook.xml',
+            '<workbook xmlns="{}" xmlns:r="{}"><sheets>{}</sheets></workbook>'
+            .format(
+                main_ns,
+                rel_ns,
+                ''.join(
+                    '<sheet name="{}" sheetId="{}" r:id="rId{}"/>'.format(
+                        name, i, i
+                    ) for i, name in enumerate(names, 1)
+                ),
+            ),
+        )
+        xlsx.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+            '2006/relationships">{}</Relationships>'.format(
+                ''.join(
+                    '<Relationship Id="rId{}" '
+                    'Target="worksheets/sheet{}.xml"/>'.format(i, i)
+                    for i in xrange(1, len(names) + 1)
+                )
+            ),
+        )
+        for i, name in enumerate(names, 1):
+            xlsx.writestr(
+                'xl/worksheets/sheet{}.xml'.format(i),
+                '<worksheet xmlns="{}"><sheetData>{}</sheetData></worksheet>'
+                .format(
+                    main_ns,
+                    ''.join(
+                        '<row>{}</row>'.format(
+                            ''.join(
+                                '<c t="inlineStr"><is><t>{}</t></is></c>'
+                                .format(value) for value in row
+                            )
+                        ) for row in sheets[name]
+                    ),
+                ),
+            )
+    file_.seek(0)
+    return file_
 
 
 class TestDataSetModels(TestCase):
@@ -96,12 +156,103 @@ class TestDataSetModels(TestCase):
             csv,
         )
 
+    def test_create_from_xlsx(self):
+        """Test creating a dataset from each sheet of an xlsx file"""
+        xlsx = make_xlsx({
+            'People': [['d', 'e'], ['doug', '24'], ['eric', '45']],
+            'Places': [['f'], ['boston']],
+        })
+        datasets = DataSet.objects.create_from_xlsx('Name', self.user, xlsx)
+        eq_(
+            ['Name - People', 'Name - Places'],
+            [d.name for d in datasets],
+        )
+        eq_(['d', 'e'], [f.name for f in datasets[0].fields.all()])
+        eq_(['24', '45'], [r.data['e'] for r in datasets[0].rows.all()])
+        eq_(['boston'], [r.data['f'] for r in datasets[1].rows.all()])
+
     def test_detect_field_types(self):
         """Test detecting the field types"""
         self.dataset.detect_field_types()
         field_names = self.dataset.fields.all()
         eq_(['choice', 'number', 'choice'], [f.type for f in field_names])
 
+    def test_profile_fields(self):
+        """Test the profile stats are saved on the fields"""
+        DataRow.objects.create(
+            dataset=self.dataset,
+            row_number=3,
+            data={'a': 'alice',
+                  'b': '',
+                  'c': 'qux'},
+        )
+        self.dataset.detect_field_types()
+        field = self.dataset.fields.get(name='b')
+        eq_(field.null_rate, 0.25)
+        eq_(field.distinct_count, 3)
+        eq_(field.min_value, '102')
+        eq_(field.max_value, '901')
+        field = self.dataset.fields.get(name='a')
+        eq_(field.distinct_count, 3)
+        eq_(field.min_value, 'alice')
+        eq_(field.max_value, 'charlie')
+
+    def test_profiler_sample(self):
+        """The profiler should sample rows from the whole data set"""
+        profiler = ColumnProfiler(['a'], sample_size=10, seed=42)
+        for i in xrange(1000):
+            profiler.add({'a': str(i)})
+        eq_(len(profiler.sample), 10)
+        assert_true(any(int(d['a']) >= 10 for d in profiler.sample))
+        eq_(profiler.row_count, 1000)
+        eq_(profiler.profile('a')['distinct_count'], 1000)
+        eq_(profiler.profile('a')['type'], 'number')
+        # numbers are compared as numbers, not text
+        eq_(profiler.profile('a')['max_value'], '999')
+        profiler.add({'a': '1000'})
+        eq_(profiler.profile('a')['max_value'], '1000')
+
+    def test_profiler_blank_column(self):
+        """A column of only blanks should not be detected as multiline"""
+        profiler = ColumnProfiler(['a'])
+        for _ in xrange(10):
+            profiler.add({'a': ''})
+        eq_(profiler.profile('a')['type'], 'number')
+        eq_(profiler.profile('a')['distinct_count'], 0)
+
+    def test_profiler_max_distinct(self):
+        """Distinct values should stop being counted past the limit"""
+        stats = ColumnStats(max_distinct=10)
+        for i in xrange(10):
+            stats.add(str(i))
+        eq_(stats.distinct_count(), 10)
+        stats.add('10')
+        eq_(stats.distinct_count(), None)
+        stats.add('11')
+        eq_(stats.blank_count, 0)
+        eq_(stats.max_text, '9')
+
+    def test_profile_crowdsource(self):
+        """Crowdsource responses with non text values should be profiled"""
+        crowdsource = CrowdsourceFactory(multiple_per_page=True)
+        CrowdsourceResponseFactory(
+            crowdsource=crowdsource,
+            data__crowdsource=crowdsource,
+            skip=True,
+            number=2,
+        )
+        dataset = DataSet.objects.create_from_crowdsource(
+            self.user,
+            crowdsource,
+        )
+        eq_(dataset.status, 'ready')
+        field = dataset.fields.get(name='skip')
+        eq_(field.min_value, 'True')
+        eq_(field.type, 'bool')
+        field = dataset.fields.get(name='number')
+        eq_(field.max_value, '2')
+        eq_(field.type, 'number')
+
     def test_choices(self):
         """Test getting the choice options for a choice field"""
         field = self.dataset.fields.get(name='a')
@@ -225,6 +376,17 @@ class TestDataSetFields(TestCase):
         ]
         assert_false(fields.ChoiceField.validate_all(bad))
 
+    def test_regex_field_validate_all(self):
+        """Test validating many values for a regex field at once"""
+        assert_true(fields.NumberField.validate_all(['1', '', '-2.5']))
+        assert_false(fields.NumberField.validate_all(['1', '2x', '3']))
+        assert_false(fields.NumberField.validate_all(['1', '2\n3']))
+        assert_true(fields.DateField.validate_all(['2017-01-13', '12/31/12']))
+        assert_false(fields.URLField.validate_all(['example.limo']))
+        assert_false(fields.MultiTextField.validate_all(['', '']))
+        assert_false(fields.MultiTextField.validate_all([]))
+        assert_true(fields.NumberField.validate_all(['', '']))
+
     def test_date_field_validate(self):
         """Test date field validate"""
         assert_true(fields.DateField.validate('2017-01-13'))
@@ -315,6 +477,29 @@ class TestDataSetViews(TestCase):
         )
         eq_(response.status_code, 200)
 
+    def test_data_etag(self):
+        """Repeat requests for the same data should get a 304, until the
+        data set changes"""
+        url = reverse(
+            'dataset-data',
+            kwargs={'slug': self.dataset.slug,
+                    'idx': self.dataset.pk}
+        )
+        request = mock_middleware(self.request_factory.get(url))
+        response = views.data(request, self.dataset.slug, self.dataset.pk)
+        etag = response['ETag']
+        request = mock_middleware(
+            self.request_factory.get(url, HTTP_IF_NONE_MATCH=etag)
+        )
+        response = views.data(request, self.dataset.slug, self.dataset.pk)
+        eq_(response.status_code, 304)
+        field = self.dataset.fields.first()
+        field.hidden = True
+        field.save()
+        response = views.data(request, self.dataset.slug, self.dataset.pk)
+        eq_(response.status_code, 200)
+        assert_true(response['ETag'] != etag)
+
     def test_parse_params(self):
         """Test the tabulator parameter parsing function"""
         # pylint: disable=protected-access
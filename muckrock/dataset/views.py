@@ -7,16 +7,21 @@ Views for the dataset application
 from django.conf import settings
 from django.contrib.auth.decorators import user_passes_test
 from django.core.urlresolvers import reverse
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 
 # Standard Library
+import hashlib
+import json
 import re
 
 # Third Party
 from djangosecure.decorators import frame_deny_exempt
 
 # MuckRock
+from muckrock.core import caching
 from muckrock.dataset.models import DataSet
 
 
@@ -75,8 +80,16 @@ def _parse_params(get, name, fields):
     return dicts
 
 
+DATA_CACHE_KEY = 'dataset:{}:{}:data:{}'
+
+
 def data(request, slug, idx):
-    """Get the raw data"""
+    """Get the raw data
+
+    A data set's rows do not change once it has been created, so each page
+    of data is cached, and served with an ETag, under the data set's
+    version, which is bumped if its rows or fields are edited
+    """
 
     def get_int(qdict, key, default):
         """Get an integer from a GET/POST query dict"""
@@ -92,20 +105,47 @@ def data(request, slug, idx):
     sorters = _parse_params(request.GET, 'sorters', ('field', 'dir'))
     filters = _parse_params(request.GET, 'filters', ('field', 'type', 'value'))
 
-    offset = (page - 1) * size
-    fields = {f.slug: f for f in dataset.fields.all()}
-
-    json_data = dataset.rows.values_list('data', flat=True)
-    json_data = json_data.sort(fields, sorters)
-    json_data = json_data.tabulator_filter(fields, filters)
-
-    total_rows = json_data.count()
-    json_data = list(json_data[offset:offset + size])
-    last_page = (total_rows + size - 1) / size
-    return JsonResponse({
-        'data': json_data,
-        'last_page': last_page,
-    })
+    def get_content():
+        """Query the page of data"""
+        offset = (page - 1) * size
+        fields = {f.slug: f for f in dataset.fields.all()}
+
+        json_data = dataset.rows.values_list('data', flat=True)
+        json_data = json_data.sort(fields, sorters)
+        json_data = json_data.tabulator_filter(fields, filters)
+
+        total_rows = json_data.count()
+        json_data = list(json_data[offset:offset + size])
+        last_page = (total_rows + size - 1) / size
+        return JsonResponse({
+            'data': json_data,
+            'last_page': last_page,
+        }).content
+
+    if dataset.status != 'ready':
+        return HttpResponse(get_content(), content_type='application/json')
+
+    params_hash = hashlib.md5(
+        json.dumps([page, size, sorters, filters], sort_keys=True)
+    ).hexdigest()
+    key = DATA_CACHE_KEY.format(dataset.pk, dataset.version, params_hash)
+    etag = quote_etag(hashlib.md5(key).hexdigest())
+    # check the etag before the cache, as it only depends on the key
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            caching.get_or_set(
+                key, get_content, settings.DATASET_DATA_CACHE_TIMEOUT
+            ),
+            content_type='application/json',
+        )
+    response['ETag'] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.DATASET_DATA_MAX_AGE,
+    )
+    return response
 
 
 @user_passes_test(lambda u: u.is_staff)
@@ -10,16 +10,18 @@ from django.test import RequestFactory, TestCase
 import json
 
 # Third Party
+from mock import patch
 from nose.tools import assert_false, eq_
 
 # MuckRock
 from muckrock.core.factories import UserFactory
 from muckrock.fine_uploader import views
 from muckrock.foia.factories import (
+    FOIACommunicationFactory,
     FOIARequestFactory,
     OutboundRequestAttachmentFactory,
 )
-from muckrock.foia.models import OutboundRequestAttachment
+from muckrock.foia.models import FOIAFile, OutboundRequestAttachment
 
 
 class TestFineUploaderSuccessView(TestCase):
@@ -42,6 +44,25 @@ class TestFineUploaderSuccessView(TestCase):
         eq_(attachment.user, foia.user)
         assert_false(attachment.sent)
 
+    @patch('muckrock.fine_uploader.views.transaction.on_commit', lambda f: f())
+    @patch('muckrock.foia.tasks.finalize_upload.delay')
+    def test_success_comm(self, mock_finalize):
+        """Files uploaded to a communication should be finalized"""
+        comm = FOIACommunicationFactory()
+        request_factory = RequestFactory()
+        request = request_factory.post(
+            reverse('fine-uploader-success-comm'),
+            {'id': comm.pk,
+             'key': 'dir/file_key.pdf'},
+        )
+        request.user = comm.foia.user
+        response = views.success_comm(request)
+        eq_(response.status_code, 200)
+        file_ = FOIAFile.objects.get(comm=comm)
+        eq_(file_.ffile.name, 'dir/file_key.pdf')
+        eq_(file_.title, 'file_key.pdf')
+        mock_finalize.assert_called_once_with(file_.pk)
+
     def test_success_bad_comm(self):
         """Test a post to the success view with a non-existent foia"""
         request_factory = RequestFactory()
@@ -4,6 +4,7 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.http import (
     HttpResponse,
     HttpResponseBadRequest,
@@ -30,6 +31,7 @@ from muckrock.foia.models import (
     OutboundComposerAttachment,
     OutboundRequestAttachment,
 )
+from muckrock.foia.tasks import finalize_upload
 
 
 def _success(request, model, attachment_model, fk_name):
@@ -104,6 +106,7 @@ def success_comm(request):
     )
     file_.ffile.name = request.POST['key']
     file_.save()
+    transaction.on_commit(lambda: finalize_upload.delay(file_.pk))
 
     return HttpResponse()
 
@@ -88,13 +88,23 @@ class FOIAFileInline(admin.StackedInline):
     """FOIA File Inline admin options"""
     model = FOIAFile
     form = FOIAFileAdminForm
-    readonly_fields = ('doc_id', 'pages', 'access', 'source')
+    readonly_fields = (
+        'doc_id',
+        'pages',
+        'access',
+        'source',
+        'size',
+        'content_type',
+        'content_hash',
+    )
     fields = (
         ('title', 'datetime'),
         'ffile',
         'description',
         ('doc_id', 'pages'),
         ('source', 'access'),
+        ('size', 'content_type'),
+        'content_hash',
     )
     extra = 0
 
@@ -0,0 +1,267 @@
+"""
+Dispatching faxes through the Phaxio API
+
+Faxes are queued in the database and sent in batches by a periodic task.
+Initial requests are sent before follow ups, and the number of faxes sent
+per batch adapts to how Phaxio is responding - it grows by one after every
+full batch sent without errors, and halves whenever Phaxio returns an error.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+# Standard Library
+import logging
+import sys
+import uuid
+from datetime import timedelta
+
+# Third Party
+from phaxio import PhaxioApi
+from phaxio.exceptions import PhaxioError
+
+# MuckRock
+from muckrock.communication.models import FaxCommunication, FaxError, QueuedFax
+from muckrock.task.models import ReviewAgencyTask
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY = 'fax:rate'
+LATENCY_KEY = 'fax:latency'
+LOCK_KEY = 'fax:dispatch_lock'
+# the dispatch task's time limit - the lock and the claim on a batch of
+# faxes last at least as long as a run may, so no two runs send the same fax
+DISPATCH_TIME_LIMIT = 10 * 60
+
+FATAL_ERRORS = {
+    (
+        'Phone number is not formatted correctly or invalid. '
+        'Please check the number and try again.'
+    ),
+}
+
+
+class FakePhaxioApi(object):
+    """A stand in for the Phaxio API for local development and testing
+
+    Sent faxes are recorded instead of sent, and error messages added to
+    `errors` are raised by the following sends, in order
+    """
+    sent = []
+    errors = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def send(self, **kwargs):
+        """Record the fax"""
+        if self.errors:
+            raise PhaxioError(self.errors.pop(0))
+        self.sent.append(kwargs)
+        return {'success': True, 'faxId': len(self.sent)}
+
+    @classmethod
+    def reset(cls):
+        """Clear the sent faxes and errors"""
+        del cls.sent[:]
+        del cls.errors[:]
+
+
+def get_phaxio_api():
+    """Get the Phaxio API client"""
+    api_class = FakePhaxioApi if settings.PHAXIO_FAKE else PhaxioApi
+    return api_class(
+        settings.PHAXIO_KEY,
+        settings.PHAXIO_SECRET,
+        raise_errors=True,
+    )
+
+
+def queue_fax(comm, subject, body, error_count=0, countdown=0):
+    """Queue a fax to be sent by the dispatcher"""
+    is_initial = (
+        comm.foia is not None and not comm.foia.communications.filter(
+            datetime__lt=comm.datetime,
+        ).exists()
+    )
+    return QueuedFax.objects.create(
+        communication=comm,
+        subject=subject[:255],
+        body=body,
+        error_count=error_count,
+        priority=0 if is_initial else 1,
+        send_after=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def get_rate():
+    """How many faxes to send per batch"""
+    return cache.get(RATE_KEY, settings.PHAXIO_RATE)
+
+
+def _set_rate(rate):
+    """Set the number of faxes to send per batch, within the limits"""
+    rate = max(settings.PHAXIO_MIN_RATE, min(rate, settings.PHAXIO_MAX_RATE))
+    cache.set(RATE_KEY, rate, None)
+    return rate
+
+
+def _record_latency(queued):
+    """Keep a moving average of the time faxes spend in the queue"""
+    latency = (timezone.now() - queued.datetime_queued).total_seconds()
+    average = cache.get(LATENCY_KEY)
+    if average is not None:
+        latency = 0.8 * average + 0.2 * latency
+    cache.set(LATENCY_KEY, latency, None)
+
+
+def send_queued_fax(api, queued):
+    """Send a single queued fax
+    Returns True if the fax was accepted by Phaxio, or was dropped
+    because it could never be sent"""
+    comm = queued.communication
+    callback_url = 'https://%s%s' % (
+        settings.MUCKROCK_URL,
+        reverse('phaxio-callback'),
+    )
+    fax = FaxCommunication.objects.create(
+        communication=comm,
+        sent_datetime=timezone.now(),
+        to_number=comm.foia.fax,
+    )
+    try:
+        results = api.send(
+            to=comm.foia.fax.as_e164,
+            header_text=queued.subject[:45],
+            string_data=queued.body,
+            string_data_type='text',
+            files=[f.ffile for f in comm.files.all()],
+            batch=True,
+            batch_delay=settings.PHAXIO_BATCH_DELAY,
+            batch_collision_avoidance=True,
+            callback_url=callback_url,
+            **{
+                'tag[fax_id]': fax.pk,
+                'tag[error_count]': queued.error_count,
+            }
+        )
+    except PhaxioError as exc:
+        FaxError.objects.create(
+            fax=fax,
+            datetime=timezone.now(),
+            recipient=comm.foia.fax,
+            error_type='apiError',
+            error_code=exc.args[0],
+        )
+        if exc.args[0] in FATAL_ERRORS:
+            comm.foia.fax.status = 'error'
+            comm.foia.fax.save()
+            ReviewAgencyTask.objects.ensure_one_created(
+                agency=comm.foia.agency,
+                resolved=False,
+            )
+            queued.delete()
+            return True
+        queued.attempts += 1
+        if queued.attempts >= settings.PHAXIO_MAX_ATTEMPTS:
+            logger.error(
+                'Send fax error, giving up: %s',
+                exc,
+                exc_info=sys.exc_info(),
+            )
+            queued.delete()
+        else:
+            logger.warning('Send fax error, will retry: %s', exc)
+            queued.send_after = timezone.now() + timedelta(minutes=5)
+            queued.save()
+        return False
+    else:
+        fax.fax_id = results['faxId']
+        fax.save()
+        _record_latency(queued)
+        queued.delete()
+        return True
+
+
+def _claim_batch(rate):
+    """Claim the next batch of queued faxes, by moving their send after time
+    past the end of this run.  Faxes which are sent are deleted, and ones
+    which fail are rescheduled, so only faxes left by a killed run become
+    available again."""
+    with transaction.atomic():
+        pks = list(
+            QueuedFax.objects.select_for_update(skip_locked=True)
+            .filter(send_after__lte=timezone.now())
+            .order_by('priority', 'send_after', 'pk')
+            .values_list('pk', flat=True)[:rate]
+        )
+        QueuedFax.objects.filter(pk__in=pks).update(
+            send_after=timezone.now() +
+            timedelta(seconds=DISPATCH_TIME_LIMIT)
+        )
+    batch = (
+        QueuedFax.objects.filter(pk__in=pks)
+        .select_related('communication__foia__fax')
+    )
+    return sorted(batch, key=lambda q: pks.index(q.pk))
+
+
+def send_next_batch():
+    """Send the next batch of queued faxes"""
+    # the lock expires once a run would have been killed
+    token = uuid.uuid4().hex
+    if not cache.add(LOCK_KEY, token, DISPATCH_TIME_LIMIT):
+        logger.info('Fax dispatch already running')
+        return
+    try:
+        rate = get_rate()
+        batch = _claim_batch(rate)
+        if not batch:
+            return
+        api = get_phaxio_api()
+        for i, queued in enumerate(batch):
+            if not send_queued_fax(api, queued):
+                # back off and leave the rest for the next batch
+                rate = _set_rate(rate // 2)
+                QueuedFax.objects.filter(
+                    pk__in=[q.pk for q in batch[i + 1:]]
+                ).update(send_after=timezone.now())
+                break
+        else:
+            if len(batch) == rate:
+                rate = _set_rate(rate + 1)
+        logger.info('Fax queue: %s', get_stats())
+    finally:
+        # only release the lock if it has not expired and been taken by
+        # another run
+        if cache.get(LOCK_KEY) == token:
+            cache.delete(LOCK_KEY)
+
+
+def get_stats():
+    """Queue depth and latency metrics for the fax queue"""
+    queue = QueuedFax.objects.aggregate(
+        depth=Count('pk'),
+        oldest=Min('datetime_queued'),
+    )
+    depths = dict(
+        QueuedFax.objects.order_by().values_list('priority')
+        .annotate(Count('pk'))
+    )
+    if queue['oldest'] is not None:
+        oldest_age = (timezone.now() - queue['oldest']).total_seconds()
+    else:
+        oldest_age = 0
+    return {
+        'depth': queue['depth'],
+        'initial_depth': depths.get(0, 0),
+        'follow_up_depth': depths.get(1, 0),
+        'oldest_age': oldest_age,
+        'average_latency': cache.get(LATENCY_KEY),
+        'rate': get_rate(),
+    }
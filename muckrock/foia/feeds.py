@@ -1,21 +1,95 @@
 """
 Feeds for the FOIA application
+
+The rendered feeds are cached until the requests in them change, and are
+served with an ETag and Last-Modified date so feed readers which already
+have the latest version get a 304 reply
 """
 
 # Django
 # pylint: disable=no-name-in-module
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.syndication.views import Feed
-from django.http import Http404
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.template.defaultfilters import escape, linebreaks
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Standard Library
+import hashlib
+import time
 
 # MuckRock
 from muckrock.foia.models import FOIACommunication, FOIARequest
 
+FEED_CACHE_KEY = 'feed:{}:{}'
+
+
+def _feed_cache_key(name, arg=u''):
+    """The cache key for a feed, hashing the argument as usernames may
+    contain characters which are not allowed in cache keys"""
+    arg_hash = hashlib.md5(unicode(arg).encode('utf8')).hexdigest()
+    return FEED_CACHE_KEY.format(name, arg_hash)
+
+
+def clear_feed_cache(foia=None, username=None, lists=False):
+    """Clear the cached feeds which may include the given request or user,
+    and the site wide request lists if `lists` is set"""
+    keys = []
+    if lists:
+        keys.append(_feed_cache_key('submitted'))
+        keys.append(_feed_cache_key('done'))
+    if foia is not None:
+        keys.append(_feed_cache_key('foia', foia.pk))
+    if username is not None:
+        keys.append(_feed_cache_key('user-submitted', username))
+        keys.append(_feed_cache_key('user-done', username))
+        keys.append(_feed_cache_key('user', username))
+    cache.delete_many(keys)
+
+
+class CachedFeed(Feed):
+    """A feed which caches its rendered XML and supports conditional GETs
+
+    `cache_name` names the feed's cache key, which also includes the
+    feed's URL argument, if it has one
+    """
+    cache_name = None
+
+    def __call__(self, request, *args, **kwargs):
+        key = _feed_cache_key(self.cache_name, u''.join(kwargs.values()))
+        cached = cache.get(key)
+        if cached is None:
+            response = super(CachedFeed, self).__call__(
+                request, *args, **kwargs
+            )
+            cached = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+                'last_modified': int(time.time()),
+            }
+            cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+        response = HttpResponse(
+            cached['content'],
+            content_type=cached['content_type'],
+        )
+        response['ETag'] = cached['etag']
+        response['Last-Modified'] = http_date(cached['last_modified'])
+        return get_conditional_response(
+            request,
+            etag=cached['etag'],
+            last_modified=cached['last_modified'],
+            response=response,
+        )
+
 
-class LatestSubmittedRequests(Feed):
+class LatestSubmittedRequests(CachedFeed):
     """An RSS Feed for submitted FOIA requests"""
+    cache_name = 'submitted'
     title = 'Muckrock Submitted Requests'
     link = '/foi/'
     description = 'Recently submitted FOI requests on MuckRock'
@@ -25,17 +99,17 @@ class LatestSubmittedRequests(Feed):
         return (
             FOIARequest.objects.get_public()
             .order_by('-composer__datetime_submitted')
-            .select_related('agency__jurisdiction')
-            .prefetch_related('communications')[:25]
+            .select_related('agency__jurisdiction')[:25]
         )
 
     def item_description(self, item):
         """The description of each rss item"""
-        return linebreaks(escape(item.first_request_text()))
+        return linebreaks(escape(item.first_request_excerpt))
 
 
-class LatestDoneRequests(Feed):
+class LatestDoneRequests(CachedFeed):
     """An RSS Feed for completed FOIA requests"""
+    cache_name = 'done'
     title = 'Muckrock Completed Requests'
     link = '/foi/'
     description = 'Recently completed FOI requests on MuckRock'
@@ -44,17 +118,18 @@ class LatestDoneRequests(Feed):
         """Return the items for the rss feed"""
         return (
             FOIARequest.objects.get_done().get_public()
-            .order_by('-datetime_done').select_related('agency__jurisdiction')
-            .prefetch_related('communications')[:25]
+            .order_by('-datetime_done')
+            .select_related('agency__jurisdiction')[:25]
         )
 
     def item_description(self, item):
         """The description of each rss item"""
-        return linebreaks(escape(item.first_request_text()))
+        return linebreaks(escape(item.first_request_excerpt))
 
 
-class FOIAFeed(Feed):
+class FOIAFeed(CachedFeed):
     """Feed for an individual FOI request"""
+    cache_name = 'foia'
 
     def get_object(self, request, idx):
         """Get the FOIA Request for this feed"""
@@ -85,8 +160,9 @@ class FOIAFeed(Feed):
         return linebreaks(escape(item.communication))
 
 
-class UserSubmittedFeed(Feed):
+class UserSubmittedFeed(CachedFeed):
     """Feed for a user's new submitted requests"""
+    cache_name = 'user-submitted'
 
     def get_object(self, request, username):
         """Get the user for this feed"""
@@ -113,17 +189,17 @@ class UserSubmittedFeed(Feed):
                 embargo=False,
             ).order_by(
                 '-composer__datetime_submitted',
-            ).select_related('agency__jurisdiction')
-            .prefetch_related('communications')[:25]
+            ).select_related('agency__jurisdiction')[:25]
         )
 
     def item_description(self, item):
         """The description of each rss item"""
-        return linebreaks(escape(item.first_request_text()))
+        return linebreaks(escape(item.first_request_excerpt))
 
 
-class UserDoneFeed(Feed):
+class UserDoneFeed(CachedFeed):
     """Feed for a user's completed requests"""
+    cache_name = 'user-done'
 
     def get_object(self, request, username):
         """Get the user for this feed"""
@@ -149,18 +225,18 @@ class UserDoneFeed(Feed):
                 composer__user=obj,
                 embargo=False,
             ).order_by(
-                '-datetime_submitted',
-            ).select_related('agency__jurisdiction')
-            .prefetch_related('communications')[:25]
+                '-datetime_done',
+            ).select_related('agency__jurisdiction')[:25]
         )
 
     def item_description(self, item):
         """The description of each rss item"""
-        return linebreaks(escape(item.first_request_text()))
+        return linebreaks(escape(item.first_request_excerpt))
 
 
-class UserUpdateFeed(Feed):
+class UserUpdateFeed(CachedFeed):
     """Feed for updates to all of user's requests"""
+    cache_name = 'user'
 
     def get_object(self, request, username):
         """Get the user for this feed"""
@@ -184,7 +260,8 @@ class UserUpdateFeed(Feed):
         communications = (
             FOIACommunication.objects.filter(foia__composer__user=obj)
             .exclude(foia__embargo=True)
-            .select_related('foia__agency__jurisdiction').order_by('-date')
+            .select_related('foia__agency__jurisdiction')
+            .order_by('-datetime')
         )
         return communications[:25]
 
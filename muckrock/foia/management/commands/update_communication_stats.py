@@ -0,0 +1,37 @@
+"""
+Fill in the communication stats for existing requests
+
+Run this once after migrating, outside of the migration, so that the
+request table is not locked while every request is updated
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# MuckRock
+from muckrock.foia.models import FOIARequest
+
+
+class Command(BaseCommand):
+    """Recompute the latest response and request dates and communication
+    counts for every request, in batches so no single update locks the
+    whole table"""
+    help = 'Backfill the communication stats on all requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **kwargs):
+        """Update the requests a batch at a time"""
+        pks = list(
+            FOIARequest.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        batch_size = kwargs['batch_size']
+        for i in range(0, len(pks), batch_size):
+            FOIARequest.objects.filter(
+                pk__in=pks[i:i + batch_size],
+            ).update_communication_stats()
+            self.stdout.write(
+                'Updated %d of %d requests' %
+                (min(i + batch_size, len(pks)), len(pks))
+            )
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-05-01 10:12
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('foia', '0059_auto_20180426_1112'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FOIAExport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_hash', models.CharField(db_index=True, max_length=40)),
+                ('compressed', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[(b'pending', b'Pending'), (b'done', b'Done'), (b'failed', b'Failed')], default=b'pending', max_length=7)),
+                ('ffile', models.FileField(blank=True, max_length=255, upload_to=b'foia_exports/%Y/%m/%d', verbose_name=b'File')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('datetime_created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('datetime_done', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='foia_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'FOIA Export',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-05 14:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0060_foiaexport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='foiafile',
+            name='ffile',
+            field=models.FileField(db_index=True, max_length=255, upload_to=b'foia_files/%Y/%m/%d', verbose_name=b'File'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+# fill in the excerpt from each request's first communication
+BACKFILL = """
+UPDATE foia_foiarequest AS foia
+SET first_request_excerpt = LEFT(first_comm.communication, 2000)
+FROM (
+    SELECT DISTINCT ON (foia_id) foia_id, communication
+    FROM foia_foiacommunication
+    WHERE foia_id IS NOT NULL
+    ORDER BY foia_id, datetime, id
+) AS first_comm
+WHERE first_comm.foia_id = foia.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0061_auto_20180605_1405'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foiarequest',
+            name='first_request_excerpt',
+            field=models.TextField(blank=True, editable=False, help_text=b'The start of the first communication, used for feeds'),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
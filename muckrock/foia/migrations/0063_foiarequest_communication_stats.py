@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0062_foiarequest_first_request_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foiarequest',
+            name='datetime_last_response',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text=b'Date of the latest response from the agency', null=True),
+        ),
+        migrations.AddField(
+            model_name='foiarequest',
+            name='datetime_last_request',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text=b'Date of the latest communication sent to the agency', null=True),
+        ),
+        migrations.AddField(
+            model_name='foiarequest',
+            name='communication_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='foiarequest',
+            name='requests_since_response',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text=b'Number of communications sent to the agency since its latest response, or zero if it has never responded'),
+        ),
+    ]
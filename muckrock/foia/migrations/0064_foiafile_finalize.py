@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0063_foiarequest_communication_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foiafile',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text=b"SHA-256 hash of the file's contents", max_length=64),
+        ),
+        migrations.AddField(
+            model_name='foiafile',
+            name='content_type',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='foiafile',
+            name='datetime_finalized',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='foiafile',
+            name='size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='foiafile',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, max_length=255, upload_to=b'foia_files/thumbnails/%Y/%m/%d'),
+        ),
+    ]
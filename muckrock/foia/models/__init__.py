@@ -6,6 +6,7 @@ Models for the FOIA application
 from muckrock.foia.models.attachment import *
 from muckrock.foia.models.communication import *
 from muckrock.foia.models.composer import *
+from muckrock.foia.models.export import *
 from muckrock.foia.models.file import *
 from muckrock.foia.models.multirequest import *
 from muckrock.foia.models.request import *
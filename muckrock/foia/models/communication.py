@@ -13,17 +13,38 @@ from django.utils import timezone
 import logging
 import mimetypes
 import os
-import re
 
 # Third Party
-import chardet
+from chardet.universaldetector import UniversalDetector
 
 # MuckRock
+from muckrock.core.caching import invalidate_tags
+from muckrock.core.routing import Router
 from muckrock.core.utils import new_action
-from muckrock.foia.models.request import STATUS, FOIARequest
+from muckrock.foia.models.file import FOIAFile
+from muckrock.foia.models.request import (
+    FIRST_REQUEST_EXCERPT_LENGTH,
+    STATUS,
+    FOIARequest,
+)
 
 logger = logging.getLogger(__name__)
 
+# communications from these agencies are cut off at the given string
+AGENCY_CUT_OFFS = {
+    # BoP: strip everything after '>>>'
+    'Bureau of Prisons': '>>>',
+    # Phoneix Police: strip everything after '_'*32
+    'Phoenix Police Department': '_' * 32,
+}
+
+TRACKING_ID_ROUTER = Router(
+    'tracking_id',
+    [
+        (r'Tracking Number:\s+([0-9a-zA-Z-]+)', 'tracking_number'),
+    ],
+)
+
 DELIVERED = (
     ('fax', 'Fax'),
     ('email', 'Email'),
@@ -32,6 +53,37 @@ DELIVERED = (
 )
 
 
+def _clone_fields(obj, *exclude):
+    """Get the field values needed to create a copy of a model instance"""
+    fields = {}
+    for field in obj._meta.concrete_fields:
+        if field.primary_key or field.name in exclude:
+            continue
+        value = getattr(obj, field.attname)
+        if isinstance(field, models.FileField):
+            # copy the name, not the file bound to the original
+            value = value.name
+        fields[field.attname] = value
+    return fields
+
+
+def _read_attachment(ffile, mimetype):
+    """Read a stored file into a single buffer, decoding text files using
+    a sample from the start of the file to detect their encoding"""
+    ffile.open('rb')
+    try:
+        content = ffile.read()
+    finally:
+        ffile.close()
+    if mimetype and mimetype.startswith('text/'):
+        detector = UniversalDetector()
+        detector.feed(content[:settings.EMAIL_CHARSET_SAMPLE_SIZE])
+        detector.close()
+        encoding = detector.result['encoding'] or 'utf-8'
+        content = content.decode(encoding, 'replace')
+    return content
+
+
 class FOIACommunicationQuerySet(models.QuerySet):
     """Object manager for FOIA Communications"""
 
@@ -40,6 +92,19 @@ class FOIACommunicationQuerySet(models.QuerySet):
         return self.filter(hidden=False)
 
 
+def _clear_request_caches(foias):
+    """Invalidate the cached fragments and feeds which show the requests"""
+    # avoid circular imports
+    from muckrock.foia.feeds import clear_feed_cache
+    invalidate_tags(*[foia.cache_tag() for foia in foias])
+    usernames = dict(
+        FOIARequest.objects.filter(pk__in=[foia.pk for foia in foias])
+        .values_list('pk', 'composer__user__username')
+    )
+    for foia in foias:
+        clear_feed_cache(foia=foia, username=usernames.get(foia.pk))
+
+
 class FOIACommunication(models.Model):
     """A single communication of a FOIA request"""
 
@@ -119,6 +184,35 @@ class FOIACommunication(models.Model):
 
     def save(self, *args, **kwargs):
         """Remove controls characters from text before saving"""
+        self._clean_communication()
+        update_foia = False
+        # update foia's date updated if this is the latest communication
+        if (
+            self.foia and (
+                self.foia.datetime_updated is None
+                or self.datetime > self.foia.datetime_updated
+            )
+        ):
+            self.foia.datetime_updated = self.datetime
+            update_foia = True
+        # keep the start of the first communication on the foia for feeds
+        if (
+            self.foia and self.pk is None
+            and not self.foia.first_request_excerpt
+        ):
+            self.foia.first_request_excerpt = (
+                self.communication[:FIRST_REQUEST_EXCERPT_LENGTH]
+            )
+            update_foia = True
+        if update_foia:
+            self.foia.save(comment='update request due to new comm')
+        super(FOIACommunication, self).save(*args, **kwargs)
+        if self.foia:
+            self.foia.update_communication_stats()
+
+    def _clean_communication(self):
+        """Remove control characters, limit the length and apply any
+        agency specific handling to the communication text"""
         remove_control = dict.fromkeys(
             range(0, 9) + range(11, 13) + range(14, 32)
         )
@@ -129,16 +223,6 @@ class FOIACommunication(models.Model):
         self.communication = self.communication[:150000]
         # special handling for certain agencies
         self._presave_special_handling()
-        # update foia's date updated if this is the latest communication
-        if (
-            self.foia and (
-                self.foia.datetime_updated is None
-                or self.datetime > self.foia.datetime_updated
-            )
-        ):
-            self.foia.datetime_updated = self.datetime
-            self.foia.save(comment='update datetime_updated due to new comm')
-        super(FOIACommunication, self).save(*args, **kwargs)
 
     def anchor(self):
         """Anchor name"""
@@ -160,8 +244,11 @@ class FOIACommunication(models.Model):
         the requests. Returns the moved and cloned communications.
         """
         # avoid circular imports
-        from muckrock.foia.tasks import upload_document_cloud
-        foias = FOIARequest.objects.filter(pk__in=foia_pks)
+        from muckrock.foia.tasks import upload_document_cloud_batch
+        foias = list(
+            FOIARequest.objects.filter(pk__in=foia_pks)
+            .select_related('agency')
+        )
         if not foias:
             raise ValueError('Expected a request to move the communication to.')
         old_foia = self.foia
@@ -171,14 +258,20 @@ class FOIACommunication(models.Model):
         change = old_foia is not None
 
         access = 'private' if self.foia.embargo else 'public'
-        for file_ in self.files.all():
-            file_.access = access
-            file_.source = self.get_source()
-            file_.save()
-            upload_document_cloud.apply_async(
-                args=[file_.pk, change], countdown=3
+        file_pks = list(self.files.values_list('pk', flat=True))
+        self.files.update(access=access, source=self.get_source())
+        for file_ in self.files.exclude(thumbnail=''):
+            file_.update_thumbnail_access()
+        if file_pks:
+            upload_document_cloud_batch.apply_async(
+                args=[file_pks, change], countdown=3
             )
         self.save()
+        if old_foia is not None:
+            old_foia.update_communication_stats()
+        # the files were updated in bulk, so clear the caches the file and
+        # communication signals would have
+        _clear_request_caches([f for f in (old_foia, self.foia) if f])
         CommunicationMoveLog.objects.create(
             communication=self,
             foia=old_foia,
@@ -187,60 +280,115 @@ class FOIACommunication(models.Model):
         logger.info(
             'Communication #%d moved to request #%d', self.id, self.foia.id
         )
-        # if cloning happens, self gets overwritten. so we save it to a variable here
-        comm = FOIACommunication.objects.get(pk=self.pk)
-        moved = [comm]
         cloned = []
         if foias[1:]:
             cloned = self.clone(foias[1:], user)
-        return moved + cloned
+        return [self] + cloned
 
     def clone(self, foias, user):
         """
         Copies the communication to each request in the list,
         then returns all the new communications.
         ---
-        When setting self.pk to None and then calling self.save(),
-        Django will clone the communication along with all of its data
-        and give it a new primary key. On the next iteration of the loop,
-        the clone will be cloned along with its data, and so on. Same thing
-        goes for each file attached to the communication.
+        The clones, their sub communications, files and move logs are each
+        created with a single bulk insert, and the Document Cloud uploads for
+        all of the cloned files are queued as a single task.
         """
         # pylint: disable=too-many-locals
+        # avoid circular imports
+        from muckrock.foia.tasks import upload_document_cloud_batch
         if not foias:
             raise ValueError('No valid request(s) provided for cloning.')
-        cloned_comms = []
-        original_pk = self.pk
-        files = self.files.all()
-        emails = self.emails.all()
-        faxes = self.faxes.all()
-        mails = self.mails.all()
-        web_comms = self.web_comms.all()
-        for foia in foias:
-            clone = FOIACommunication.objects.get(pk=original_pk)
-            clone.pk = None
-            clone.foia = foia
-            clone.save()
-            CommunicationMoveLog.objects.create(
-                communication=clone,
-                foia=self.foia,
-                user=user,
+        # bulk inserts skip save, so clean the text here once for all clones
+        self._clean_communication()
+        fields = _clone_fields(self, 'foia')
+        clones = [FOIACommunication(foia=foia, **fields) for foia in foias]
+        original_files = list(self.files.all())
+        with transaction.atomic():
+            clones = FOIACommunication.objects.bulk_create(clones)
+            CommunicationMoveLog.objects.bulk_create(
+                CommunicationMoveLog(
+                    communication=clone,
+                    foia=self.foia,
+                    user=user,
+                ) for clone in clones
             )
-            for file_ in files:
-                file_.clone(clone)
-            # clone all sub communications as well
-            for comms in [emails, faxes, mails, web_comms]:
-                for comm in comms:
-                    comm.pk = None
-                    comm.communication = clone
-                    comm.save()
-            # for each clone, self gets overwritten. each clone needs to be stored explicitly.
-            cloned_comms.append(clone)
-            logger.info(
-                'Communication #%d cloned to request #%d', original_pk,
-                clone.foia.id
+            self._clone_sub_communications(clones)
+            files = [
+                file_.build_clone(clone)
+                for clone in clones
+                for file_ in original_files
+            ]
+            files = FOIAFile.objects.bulk_create(
+                f for f in files if f is not None
+            )
+            # update each request's date updated if this is its latest
+            # communication, as save would have
+            FOIARequest.objects.filter(
+                models.Q(datetime_updated=None)
+                | models.Q(datetime_updated__lt=self.datetime),
+                pk__in=[foia.pk for foia in foias],
+            ).update(datetime_updated=self.datetime)
+            FOIARequest.objects.filter(
+                pk__in=[foia.pk for foia in foias],
+            ).update_communication_stats()
+        # bulk inserts do not send signals, so clear the caches the
+        # communication and file signals would have
+        _clear_request_caches(foias)
+        # the clones share their thumbnails, which may now be public
+        for file_ in original_files:
+            if file_.thumbnail:
+                file_.update_thumbnail_access()
+        if files:
+            upload_document_cloud_batch.apply_async(
+                args=[[f.pk for f in files], False], countdown=3
+            )
+        logger.info(
+            'Communication #%d cloned to requests %s',
+            self.pk,
+            ', '.join('#%d' % foia.pk for foia in foias),
+        )
+        return clones
+
+    def _clone_sub_communications(self, clones):
+        """Copy all of the sub communications to each of the clones"""
+        # avoid circular imports
+        from muckrock.communication.models import EmailCommunication
+        for comms in [self.emails, self.faxes, self.mails, self.web_comms]:
+            comms = list(comms.all())
+            if not comms:
+                continue
+            model = comms[0].__class__
+            new_comms = model.objects.bulk_create(
+                model(
+                    communication=clone,
+                    **_clone_fields(comm, 'communication')
+                ) for clone in clones
+                for comm in comms
+            )
+            if model is EmailCommunication:
+                self._clone_email_addresses(comms, new_comms)
+
+    @staticmethod
+    def _clone_email_addresses(emails, new_emails):
+        """Copy the to and cc addresses from the emails to their copies,
+        which were created in the same order, one set per clone"""
+        # avoid circular imports
+        from muckrock.communication.models import EmailCommunication
+        for field in ('to_emails', 'cc_emails'):
+            through = getattr(EmailCommunication, field).through
+            addresses = [
+                list(getattr(email, field).values_list('pk', flat=True))
+                for email in emails
+            ]
+            through.objects.bulk_create(
+                through(
+                    emailcommunication_id=new_email.pk,
+                    emailaddress_id=address_pk,
+                )
+                for i, new_email in enumerate(new_emails)
+                for address_pk in addresses[i % len(emails)]
             )
-        return cloned_comms
 
     def make_sender_primary_contact(self):
         """Makes the communication's sender the primary contact of its FOIA."""
@@ -271,37 +419,12 @@ class FOIACommunication(models.Model):
     def _presave_special_handling(self):
         """Special handling before saving
         For example, strip out BoP excessive quoting"""
-
-        def test_agency_name(name):
-            """Match on agency name"""
-            return (
-                self.foia and self.foia.agency and self.foia.agency.name == name
-            )
-
-        def until_string(string):
-            """Cut communication off after string"""
-
-            def modify():
-                """Run the modification on self.communication"""
-                if string in self.communication:
-                    idx = self.communication.index(string)
-                    self.communication = self.communication[:idx]
-
-            return modify
-
-        special_cases = [
-            # BoP: strip everything after '>>>'
-            (test_agency_name('Bureau of Prisons'), until_string('>>>')),
-            # Phoneix Police: strip everything after '_'*32
-            (
-                test_agency_name('Phoenix Police Department'),
-                until_string('_' * 32)
-            ),
-        ]
-
-        for test, modify in special_cases:
-            if test:
-                modify()
+        if not self.foia or not self.foia.agency:
+            return
+        cut_off = AGENCY_CUT_OFFS.get(self.foia.agency.name)
+        if cut_off is not None and cut_off in self.communication:
+            idx = self.communication.index(cut_off)
+            self.communication = self.communication[:idx]
 
     def process_attachments(self, files):
         """Given uploaded files, turn them into FOIAFiles attached to the comm"""
@@ -357,15 +480,23 @@ class FOIACommunication(models.Model):
         return foia_file
 
     def attach_files_to_email(self, msg):
-        """Attach all of this communications files to the email message"""
+        """Attach this communication's files to the email message, while they
+        fit within the attachment size budget.  Returns the files which did
+        not fit, which should be sent as links instead."""
+        budget = settings.EMAIL_ATTACHMENT_MAX_SIZE
+        linked_files = []
         for file_ in self.files.all():
+            # check the size before reading any of the file, from storage
+            # if the file has not been finalized yet
+            size = file_.size if file_.size is not None else file_.ffile.size
+            if size > budget:
+                linked_files.append(file_)
+                continue
+            budget -= size
             name = file_.name()
-            content = file_.ffile.read()
             mimetype, _ = mimetypes.guess_type(name)
-            if mimetype and mimetype.startswith('text/'):
-                enc = chardet.detect(content)['encoding']
-                content = content.decode(enc)
-            msg.attach(name, content)
+            msg.attach(name, _read_attachment(file_.ffile, mimetype), mimetype)
+        return linked_files
 
     def get_raw_email(self):
         """Get the raw email associated with this communication, if there is one"""
@@ -435,22 +566,17 @@ class FOIACommunication(models.Model):
         if self.foia.tracking_ids.exists():
             # do not try to extract a tracking ID if one is already set
             return
-        patterns = [
-            re.compile(r'Tracking Number:\s+([0-9a-zA-Z-]+)'),
-        ]
-        for pattern in patterns:
-            match = pattern.search(self.communication)
-            if match:
-                tracking_id = match.group(1).strip()[:255]
-                self.foia.add_tracking_id(tracking_id)
-                logger.info(
-                    'FOIA Tracking ID set: FOIA PK: %d - Comm PK: %d - '
-                    'Tracking ID: %s',
-                    self.foia.id,
-                    self.id,
-                    tracking_id,
-                )
-                break
+        _, match = TRACKING_ID_ROUTER.match(self.communication)
+        if match:
+            tracking_id = match.group(1).strip()[:255]
+            self.foia.add_tracking_id(tracking_id)
+            logger.info(
+                'FOIA Tracking ID set: FOIA PK: %d - Comm PK: %d - '
+                'Tracking ID: %s',
+                self.foia.id,
+                self.id,
+                tracking_id,
+            )
 
     class Meta:
         ordering = ['datetime']
@@ -25,7 +25,7 @@ from itertools import izip_longest
 from taggit.managers import TaggableManager
 
 # MuckRock
-from muckrock.accounts.models import Profile
+from muckrock.accounts.models import Profile, RequestCredit
 from muckrock.foia.constants import COMPOSER_EDIT_DELAY, COMPOSER_SUBMIT_DELAY
 from muckrock.foia.models import FOIARequest
 from muckrock.foia.querysets import FOIAComposerQuerySet
@@ -181,20 +181,45 @@ class FOIAComposer(models.Model):
                 Profile.objects.select_for_update()
                 .get(pk=self.user.profile.id)
             )
+            profile.reset_monthly_requests()
             profile.num_requests += return_amts['regular']
-            profile.get_monthly_requests()
             profile.monthly_requests += return_amts['monthly']
+            RequestCredit.objects.record(
+                return_amts['regular'],
+                'regular',
+                'return',
+                profile=profile,
+            )
+            RequestCredit.objects.record(
+                return_amts['monthly'],
+                'monthly',
+                'return',
+                profile=profile,
+            )
             if profile.organization:
                 org = (
                     Organization.objects.select_for_update().get(
                         pk=profile.organization.pk
                     )
                 )
-                org.get_requests()
+                org.reset_requests()
                 org.num_requests += return_amts['org']
                 org.save()
+                RequestCredit.objects.record(
+                    return_amts['org'],
+                    'org',
+                    'return',
+                    organization=org,
+                    profile=profile,
+                )
             else:
                 profile.monthly_requests += return_amts['org']
+                RequestCredit.objects.record(
+                    return_amts['org'],
+                    'monthly',
+                    'return',
+                    profile=profile,
+                )
             profile.save()
 
     def _calc_return_requests(self, num_requests):
@@ -0,0 +1,240 @@
+"""
+Models for exporting lists of FOIA requests in the background
+"""
+
+# Django
+from django.conf import settings
+from django.contrib.postgres.aggregates.general import StringAgg
+from django.core.files import File
+from django.core.urlresolvers import reverse
+from django.db import models
+from django.db.models import DurationField, F
+from django.db.models.functions import Cast, Now
+from django.utils import timezone
+
+# Standard Library
+import gzip
+import hashlib
+import tempfile
+import uuid
+from datetime import timedelta
+
+# Third Party
+import unicodecsv as csv
+
+# MuckRock
+from muckrock.core.models import ExtractDay
+
+# query arguments which do not change the set of requests being exported
+EXPORT_IGNORED_ARGS = ('page', 'per_page', 'content_type', 'sort', 'order')
+
+EXPORT_FIELDS = (
+    (lambda f: f.user.username, 'User'),
+    (lambda f: f.title, 'Title'),
+    (lambda f: f.get_status_display(), 'Status'),
+    (lambda f: settings.MUCKROCK_URL + f.get_absolute_url(), 'URL'),
+    (lambda f: f.jurisdiction.name, 'Jurisdiction'),
+    (lambda f: f.jurisdiction.pk, 'Jurisdiction ID'),
+    (
+        lambda f: f.jurisdiction.get_level_display(),
+        'Jurisdiction Level',
+    ),
+    (
+        lambda f: f.jurisdiction.parent.name
+        if f.jurisdiction.level == 'l' else f.jurisdiction.name,
+        'Jurisdiction State',
+    ),
+    (lambda f: f.agency.name if f.agency else '', 'Agency'),
+    (lambda f: f.agency.pk if f.agency else '', 'Agency ID'),
+    (lambda f: f.date_followup, 'Followup Date'),
+    (lambda f: f.date_estimate, 'Estimated Completion Date'),
+    (lambda f: f.composer.requested_docs, 'Requested Documents'),
+    (lambda f: f.current_tracking_id(), 'Tracking Number'),
+    (lambda f: f.embargo, 'Embargo'),
+    (lambda f: f.days_since_submitted, 'Days since submitted'),
+    (lambda f: f.days_since_updated, 'Days since updated'),
+    (lambda f: f.project_names, 'Projects'),
+    (lambda f: f.tag_names, 'Tags'),
+)
+
+
+def export_queryset(queryset):
+    """Limit the columns and add the annotations needed for the export"""
+    return (
+        queryset.select_related(None).select_related(
+            'composer__user',
+            'agency__jurisdiction__parent',
+        ).prefetch_related(
+            'tracking_ids',
+        ).only(
+            'composer__user__username',
+            'title',
+            'status',
+            'slug',
+            'agency__jurisdiction__name',
+            'agency__jurisdiction__slug',
+            'agency__jurisdiction__id',
+            'agency__jurisdiction__level',
+            'agency__jurisdiction__parent__name',
+            'agency__name',
+            'agency__id',
+            'date_followup',
+            'date_estimate',
+            'embargo',
+            'composer__requested_docs',
+        ).annotate(
+            days_since_submitted=ExtractDay(
+                Cast(
+                    Now() - F('composer__datetime_submitted'),
+                    DurationField()
+                )
+            ),
+            days_since_updated=ExtractDay(
+                Cast(Now() - F('datetime_updated'), DurationField())
+            ),
+            project_names=StringAgg('projects__title', ',', distinct=True),
+            tag_names=StringAgg('tags__name', ',', distinct=True),
+        )
+    )
+
+
+def export_hash(user, view_path, view_kwargs, query_dict):
+    """Hash the user, the list view with its URL arguments and the query
+    arguments to identify identical exports"""
+    args = sorted(
+        (key, sorted(values))
+        for key, values in query_dict.iterlists()
+        if key not in EXPORT_IGNORED_ARGS
+    )
+    return hashlib.sha1(
+        repr((user.pk, view_path, sorted(view_kwargs.items()), args))
+    ).hexdigest()
+
+
+class FOIAExportQuerySet(models.QuerySet):
+    """Object manager for FOIA exports"""
+
+    def get_recent(self, user, query_hash, compressed):
+        """Get a recent, non failed export matching this query, if one exists"""
+        cutoff = timezone.now() - timedelta(
+            hours=settings.EXPORT_CSV_REUSE_HOURS
+        )
+        return (
+            self.filter(
+                user=user,
+                query_hash=query_hash,
+                compressed=compressed,
+                datetime_created__gte=cutoff,
+            ).exclude(status='failed').order_by('-datetime_created').first()
+        )
+
+
+class FOIAExport(models.Model):
+    """A CSV export of a list of requests, generated in the background"""
+
+    user = models.ForeignKey('auth.User', related_name='foia_exports')
+    query_hash = models.CharField(max_length=40, db_index=True)
+    compressed = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=7,
+        default='pending',
+        choices=(
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ),
+    )
+    ffile = models.FileField(
+        upload_to='foia_exports/%Y/%m/%d',
+        verbose_name='File',
+        max_length=255,
+        blank=True,
+    )
+    row_count = models.PositiveIntegerField(default=0)
+    datetime_created = models.DateTimeField(default=timezone.now)
+    datetime_done = models.DateTimeField(blank=True, null=True)
+
+    objects = FOIAExportQuerySet.as_manager()
+
+    def __unicode__(self):
+        return u'FOIA Export #{} by {}'.format(self.pk, self.user)
+
+    def get_absolute_url(self):
+        """The download link for this export"""
+        return reverse('foia-export', kwargs={'idx': self.pk})
+
+    def iter_requests(self, queryset):
+        """Iterate over the requests in key ordered batches, so that
+        the export never holds more than a batch in memory and the
+        database never has to sort and offset the whole result"""
+        queryset = export_queryset(queryset).order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                [:settings.EXPORT_CSV_BATCH_SIZE]
+            )
+            if not batch:
+                return
+            for foia in batch:
+                yield foia
+            last_pk = batch[-1].pk
+
+    def generate(self, queryset):
+        """Write the requests out to a CSV file and save it to storage"""
+        with tempfile.TemporaryFile() as temp_file:
+            if self.compressed:
+                out_file = gzip.GzipFile(fileobj=temp_file, mode='wb')
+            else:
+                out_file = temp_file
+            writer = csv.writer(out_file)
+            writer.writerow(f[1] for f in EXPORT_FIELDS)
+            row_count = 0
+            for foia in self.iter_requests(queryset):
+                writer.writerow(f[0](foia) for f in EXPORT_FIELDS)
+                row_count += 1
+            if self.compressed:
+                out_file.close()
+            temp_file.seek(0)
+            file_name = '{}/requests.csv{}'.format(
+                uuid.uuid4().hex,
+                '.gz' if self.compressed else '',
+            )
+            self.ffile.save(file_name, File(temp_file), save=False)
+        self._make_private()
+        self.row_count = row_count
+        self.status = 'done'
+        self.datetime_done = timezone.now()
+        self.save()
+
+    def _s3_key(self):
+        """The S3 key of the stored file, or None if it is not stored on S3"""
+        # pylint: disable=protected-access
+        storage = self.ffile.storage
+        if not hasattr(storage, 'bucket'):
+            return None
+        return storage.bucket.new_key(
+            storage._normalize_name(storage._clean_name(self.ffile.name))
+        )
+
+    def _make_private(self):
+        """Exports may list embargoed requests, so they must not be left
+        publicly readable like other files"""
+        key = self._s3_key()
+        if key is not None:
+            key.set_canned_acl('private')
+
+    def get_download_url(self):
+        """A link to download the file which expires shortly, or None if
+        the file is not stored on S3 and must be served directly"""
+        key = self._s3_key()
+        if key is None:
+            return None
+        return key.generate_url(
+            settings.EXPORT_CSV_URL_EXPIRE,
+            query_auth=True,
+        )
+
+    class Meta:
+        verbose_name = 'FOIA Export'
+        app_label = 'foia'
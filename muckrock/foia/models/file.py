@@ -5,15 +5,35 @@ Models for the FOIA application
 
 # Django
 from django.conf import settings
+from django.core import signing
 from django.core.files.base import ContentFile
+from django.core.urlresolvers import reverse
 from django.db import models
+from django.utils import timezone
 
 # Standard Library
+import hashlib
 import logging
 import os
+import uuid
+from cStringIO import StringIO
+from mimetypes import guess_type
+from tempfile import SpooledTemporaryFile
+
+# Third Party
+from PIL import Image
+from PyPDF2 import PdfFileReader
 
 logger = logging.getLogger(__name__)
 
+FILE_LINK_SALT = 'muckrock.foia.file_link'
+
+# files are copied to a local temporary file while being finalized, so they
+# are only downloaded once - up to this size they are kept in memory
+SPOOL_SIZE = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+THUMBNAIL_SIZE = (180, 240)
+
 
 class FOIAFile(models.Model):
     """An arbitrary file attached to a FOIA request"""
@@ -28,7 +48,10 @@ class FOIAFile(models.Model):
         null=True,
     )
     ffile = models.FileField(
-        upload_to='foia_files/%Y/%m/%d', verbose_name='File', max_length=255
+        upload_to='foia_files/%Y/%m/%d',
+        verbose_name='File',
+        max_length=255,
+        db_index=True,
     )
     title = models.CharField(max_length=255)
     datetime = models.DateTimeField(null=True, db_index=True)
@@ -43,6 +66,31 @@ class FOIAFile(models.Model):
     )
     doc_id = models.SlugField(max_length=80, blank=True, editable=False)
     pages = models.PositiveIntegerField(default=0, editable=False)
+    # set once the file has been uploaded, by the finalize upload task
+    size = models.BigIntegerField(null=True, blank=True, editable=False)
+    content_type = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text='SHA-256 hash of the file\'s contents',
+    )
+    thumbnail = models.ImageField(
+        upload_to='foia_files/thumbnails/%Y/%m/%d',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    datetime_finalized = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     def __unicode__(self):
         return self.title
@@ -84,6 +132,8 @@ class FOIAFile(models.Model):
                 'https://assets.documentcloud.org/documents/' + num +
                 '/pages/' + name + '-p1-small.gif'
             )
+        elif self.is_public() and self.thumbnail:
+            return self.thumbnail.url
         else:
             filename = mimetypes.get(self.get_extension(), 'file-document.png')
             return '%simg/%s' % (settings.STATIC_URL, filename)
@@ -111,29 +161,177 @@ class FOIAFile(models.Model):
         """Anchor name"""
         return 'file-%d' % self.pk
 
+    def get_signed_url(self):
+        """A time limited link to download this file, for files which are
+        too large to be attached to an email"""
+        token = signing.dumps(self.pk, salt=FILE_LINK_SALT)
+        return settings.MUCKROCK_URL + reverse(
+            'foia-file-download', kwargs={'token': token}
+        )
+
     def clone(self, new_comm):
-        """Clone this file to a new communication"""
+        """Clone this file to a new communication
+
+        Clones are byte for byte identical, so by default the clone
+        references the same stored file as the original instead of copying
+        it.  The stored file is only removed once the last file referencing
+        it is deleted.
+        """
         from muckrock.foia.tasks import upload_document_cloud
-        access = 'private' if new_comm.foia.embargo else 'public'
-        original_id = self.pk
-        self.pk = None
-        self.comm = new_comm
-        self.access = access
-        self.source = new_comm.get_source()
-        # make a copy of the file on the storage backend
-        try:
-            new_ffile = ContentFile(self.ffile.read())
-        except ValueError:
+        clone = self.build_clone(new_comm)
+        if clone is not None:
+            clone.save()
+            upload_document_cloud.apply_async(
+                args=[clone.pk, False], countdown=3
+            )
+
+    def build_clone(self, new_comm):
+        """Build an unsaved clone of this file for a new communication,
+        so that many clones may be inserted at once"""
+        if not self.ffile:
             error_msg = (
                 'FOIAFile #%s has no data in its ffile field. '
                 'It has not been cloned.'
             )
-            logger.error(error_msg, original_id)
+            logger.error(error_msg, self.pk)
+            return None
+        ffile_name = self.ffile.name
+        if not settings.CLONE_FILES_BY_REFERENCE:
+            ffile_name = self.copy_ffile()
+        return FOIAFile(
+            comm=new_comm,
+            ffile=ffile_name,
+            title=self.title,
+            datetime=self.datetime,
+            source=new_comm.get_source(),
+            description=self.description,
+            doc_id=self.doc_id,
+            pages=self.pages,
+            size=self.size,
+            content_type=self.content_type,
+            content_hash=self.content_hash,
+            thumbnail=self.thumbnail.name,
+            datetime_finalized=self.datetime_finalized,
+            access='private' if new_comm.foia.embargo else 'public',
+        )
+
+    def copy_ffile(self):
+        """Make a physical copy of the stored file and return its name.
+        On S3 the copy is made server side, without downloading the file."""
+        # pylint: disable=protected-access
+        storage = self.ffile.storage
+        name = storage.get_available_name(self.ffile.name)
+        if hasattr(storage, 'bucket'):
+            storage.bucket.copy_key(
+                storage._normalize_name(storage._clean_name(name)),
+                storage.bucket.name,
+                storage._normalize_name(storage._clean_name(self.ffile.name)),
+                preserve_acl=True,
+            )
+            return name
+        else:
+            return storage.save(name, self.ffile)
+
+    def finalize(self):
+        """Record the size, content type, hash and page count of the stored
+        file and generate its thumbnail, so they are never computed while
+        rendering.  Raises IOError if the file has not been stored yet."""
+        self.size, self.content_type = self._head_ffile()
+        sha256 = hashlib.sha256()
+        with SpooledTemporaryFile(max_size=SPOOL_SIZE) as local_file:
+            try:
+                for chunk in self.ffile.chunks(CHUNK_SIZE):
+                    sha256.update(chunk)
+                    local_file.write(chunk)
+            finally:
+                self.ffile.close()
+            local_file.seek(0)
+            if self.get_extension().lower() == 'pdf':
+                self.pages = _pdf_pages(local_file) or self.pages
+            elif self.content_type.startswith('image/'):
+                self._save_thumbnail(local_file)
+        self.content_hash = sha256.hexdigest()
+        self.datetime_finalized = timezone.now()
+        self.save(
+            update_fields=[
+                'size',
+                'content_type',
+                'content_hash',
+                'pages',
+                'thumbnail',
+                'datetime_finalized',
+            ]
+        )
+        self.update_thumbnail_access()
+
+    def _head_ffile(self):
+        """Get the size and content type of the stored file.
+        On S3 they are read from the key's headers, without downloading it."""
+        # pylint: disable=protected-access
+        storage = self.ffile.storage
+        if hasattr(storage, 'bucket'):
+            key = storage.bucket.get_key(
+                storage._normalize_name(storage._clean_name(self.ffile.name))
+            )
+            if key is None:
+                raise IOError('%s has not been uploaded' % self.ffile.name)
+            return key.size, key.content_type or ''
+        return self.ffile.size, guess_type(self.ffile.name)[0] or ''
+
+    def _save_thumbnail(self, local_file):
+        """Save a thumbnail of an image file"""
+        try:
+            image = Image.open(local_file)
+            image.thumbnail(THUMBNAIL_SIZE)
+            if image.mode not in ('1', 'L', 'P', 'RGB', 'RGBA'):
+                image = image.convert('RGB')
+            thumbnail = StringIO()
+            image.save(thumbnail, 'PNG')
+        except (IOError, ValueError):
+            logger.warning(
+                'FOIAFile #%s: could not generate a thumbnail',
+                self.pk,
+                exc_info=True,
+            )
+            return
+        # the random part of the name keeps the thumbnails of private files
+        # from being found by guessing their names
+        self.thumbnail.save(
+            '%s-%s.png' % (os.path.splitext(self.name())[0], uuid.uuid4().hex),
+            ContentFile(thumbnail.getvalue()),
+            save=False,
+        )
+
+    def update_thumbnail_access(self):
+        """Only allow the thumbnail to be read publicly if a file using it
+        is public.  Clones share their thumbnail, along with their stored
+        file, so it is public if any of them are."""
+        # pylint: disable=protected-access
+        storage = self.thumbnail.storage
+        if not self.thumbnail or not hasattr(storage, 'bucket'):
             return
-        new_ffile.name = self.ffile.name
-        self.ffile = new_ffile
-        self.save()
-        upload_document_cloud.apply_async(args=[self.pk, False], countdown=3)
+        public = FOIAFile.objects.filter(
+            thumbnail=self.thumbnail.name,
+            access='public',
+        ).exists()
+        key = storage.bucket.new_key(
+            storage._normalize_name(storage._clean_name(self.thumbnail.name))
+        )
+        key.set_canned_acl('public-read' if public else 'private')
+
+    def is_shared(self):
+        """Is the stored file referenced by any other files?"""
+        return (
+            FOIAFile.objects.filter(ffile=self.ffile.name)
+            .exclude(pk=self.pk).exists()
+        )
+
+    def is_thumbnail_shared(self):
+        """Is the thumbnail referenced by any other files?"""
+        return (
+            FOIAFile.objects.filter(thumbnail=self.thumbnail.name)
+            .exclude(pk=self.pk).exists()
+        )
 
     class Meta:
         verbose_name = 'FOIA Document File'
@@ -141,6 +339,16 @@ class FOIAFile(models.Model):
         app_label = 'foia'
 
 
+def _pdf_pages(file_):
+    """Count the pages of a PDF, or return None if it can not be read"""
+    try:
+        return PdfFileReader(file_, strict=False).getNumPages()
+    except Exception:  # pylint: disable=broad-except
+        # malformed PDFs may raise almost anything from PyPDF2
+        logger.warning('Could not count the pages of a PDF', exc_info=True)
+        return None
+
+
 # This needs to stick around for migration purposes
 def attachment_path(instance, filename):
     """Generate path for attachment file"""
@@ -60,6 +60,18 @@ STATUS = [
 
 END_STATUS = ['rejected', 'no_docs', 'done', 'partial', 'abandoned']
 
+# how much of the first communication to keep on the request for feeds
+FIRST_REQUEST_EXCERPT_LENGTH = 2000
+
+# these are maintained from the request's communications by
+# `update_communication_stats`, and are not written by `save`
+COMMUNICATION_STAT_FIELDS = (
+    'datetime_last_response',
+    'datetime_last_request',
+    'communication_count',
+    'requests_since_response',
+)
+
 
 class FOIARequest(models.Model):
     """A Freedom of Information Act request"""
@@ -83,6 +95,30 @@ class FOIARequest(models.Model):
         db_index=True,
         verbose_name='Date response received',
     )
+    datetime_last_response = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        help_text='Date of the latest response from the agency',
+    )
+    datetime_last_request = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        help_text='Date of the latest communication sent to the agency',
+    )
+    communication_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    requests_since_response = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of communications sent to the agency since its '
+        'latest response, or zero if it has never responded',
+    )
     date_due = models.DateField(blank=True, null=True, db_index=True)
     days_until_due = models.IntegerField(blank=True, null=True)
     date_followup = models.DateField(blank=True, null=True)
@@ -99,6 +135,11 @@ class FOIARequest(models.Model):
     featured = models.BooleanField(default=False)
     sidebar_html = models.TextField(blank=True)
     mail_id = models.CharField(blank=True, max_length=255, editable=False)
+    first_request_excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        help_text='The start of the first communication, used for feeds',
+    )
 
     portal = models.ForeignKey(
         'portal.Portal',
@@ -202,8 +243,26 @@ class FOIARequest(models.Model):
             comment = kwargs.pop('comment')
             if reversion.revision_context_manager.is_active():
                 reversion.set_comment(comment)
+        # do not overwrite the communication stats with the values loaded
+        # with this instance, as they may have changed since
+        if (
+            not self._state.adding and not args
+            and 'update_fields' not in kwargs
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in COMMUNICATION_STAT_FIELDS
+            ]
         super(FOIARequest, self).save(*args, **kwargs)
 
+    def update_communication_stats(self):
+        """Recompute the communication stats after a communication on this
+        request has been added, changed, moved or deleted"""
+        FOIARequest.objects.filter(pk=self.pk).update_communication_stats()
+        self.refresh_from_db(fields=COMMUNICATION_STAT_FIELDS)
+
     @property
     def user(self):
         """The request's user is its composer's user"""
@@ -293,6 +352,10 @@ class FOIARequest(models.Model):
         from muckrock.foia.models.file import FOIAFile
         return FOIAFile.objects.filter(comm__foia=self)
 
+    def cache_tag(self):
+        """The tag for cached fragments which show this request"""
+        return 'foia:%d' % self.pk
+
     def first_request_text(self):
         """Return the first request text"""
         try:
@@ -302,6 +365,8 @@ class FOIARequest(models.Model):
 
     def last_response(self):
         """Return the most recent response"""
+        if self.datetime_last_response is None:
+            return None
         return (
             self.communications.filter(response=True)
             .order_by('-datetime').first()
@@ -309,6 +374,8 @@ class FOIARequest(models.Model):
 
     def last_request(self):
         """Return the most recent request"""
+        if self.datetime_last_request is None:
+            return None
         return (
             self.communications.filter(response=False)
             .order_by('-datetime').first()
@@ -353,11 +420,18 @@ class FOIARequest(models.Model):
         except FOIARequest.DoesNotExist:
             return None
 
+    def datetime_last_communication(self):
+        """The date of the most recent communication in either direction"""
+        datetimes = [
+            d for d in (self.datetime_last_response, self.datetime_last_request)
+            if d is not None
+        ]
+        return max(datetimes) if datetimes else None
+
     def latest_response(self):
         """How many days since the last response"""
-        response = self.last_response()
-        if response:
-            return (date.today() - response.datetime.date()).days
+        if self.datetime_last_response:
+            return (date.today() - self.datetime_last_response.date()).days
 
     def processing_length(self):
         """How many days since the request was set as processing"""
@@ -738,17 +812,35 @@ class FOIARequest(models.Model):
                 },
             }
         )
-        msg.attach_alternative(linebreaks(escape(body)), 'text/html')
-        # atach all files from the latest communication
-        comm.attach_files_to_email(msg)
+        # atach all files from the latest communication, linking to any
+        # which are too large to attach
+        linked_files = comm.attach_files_to_email(msg)
+        if linked_files:
+            msg.body += render_to_string(
+                'text/foia/attachment_links.txt',
+                {
+                    'files': linked_files,
+                    'days': settings.EMAIL_ATTACHMENT_LINK_DAYS,
+                },
+            )
+        msg.attach_alternative(linebreaks(escape(msg.body)), 'text/html')
 
         msg.send(fail_silently=False)
 
+        # the attachments are already stored as files, so replace their
+        # contents before storing the raw email instead of encoding them again
+        msg.attachments = [
+            (
+                name,
+                u'[{} attachment omitted]'.format(mimetype),
+                'text/plain',
+            ) for name, _, mimetype in msg.attachments
+        ]
         email_comm.set_raw_email(msg.message())
 
     def _send_fax(self, comm, **kwargs):
         """Send the message as a fax"""
-        from muckrock.foia.tasks import send_fax
+        from muckrock.foia.fax import queue_fax
 
         switch = (
             kwargs.get('switch')
@@ -773,10 +865,7 @@ class FOIARequest(models.Model):
         else:
             countdown = 0
 
-        send_fax.apply_async(
-            args=[comm.pk, comm.subject, body, error_count],
-            countdown=countdown,
-        )
+        queue_fax(comm, comm.subject, body, error_count, countdown)
 
     def _send_snail_mail(self, comm, **kwargs):
         """Send the message as a snail mail"""
@@ -885,7 +974,7 @@ class FOIARequest(models.Model):
             self.date_followup = None
         # if we need to respond, pause the count down until we do
         if self.status in ['fix', 'payment'] and self.date_due:
-            last_datetime = self.communications.last().datetime
+            last_datetime = self.datetime_last_communication()
             if not last_datetime:
                 last_datetime = timezone.now()
             self.days_until_due = cal.business_days_between(
@@ -896,19 +985,16 @@ class FOIARequest(models.Model):
 
     def _update_followup_date(self):
         """Update the follow up date"""
-        try:
-            new_date = self.communications.last().datetime.date() + timedelta(
-                self._followup_days()
-            )
-            if self.date_due and self.date_due > new_date:
-                new_date = self.date_due
-
-            if not self.date_followup or self.date_followup < new_date:
-                self.date_followup = new_date
-
-        except IndexError:
+        last_datetime = self.datetime_last_communication()
+        if last_datetime is None:
             # This request has no communications at the moment, cannot asign a follow up date
-            pass
+            return
+        new_date = last_datetime.date() + timedelta(self._followup_days())
+        if self.date_due and self.date_due > new_date:
+            new_date = self.date_due
+
+        if not self.date_followup or self.date_followup < new_date:
+            self.date_followup = new_date
 
     def _followup_days(self):
         """How many days do we wait until we follow up?"""
@@ -1037,7 +1123,7 @@ class FOIARequest(models.Model):
 
     def has_ack(self):
         """Has this request been acknowledged?"""
-        return self.communications.filter(response=True).exists()
+        return self.datetime_last_response is not None
 
     def proxy_reject(self):
         """Mark this request as being rejected due to a proxy being required"""
@@ -6,6 +6,7 @@ QuerySets for the FOIA application
 from django.contrib.auth.models import AnonymousUser
 from django.db import models
 from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -190,26 +191,57 @@ class FOIARequestQuerySet(models.QuerySet):
 
     def get_stale(self):
         """Get stale requests"""
+        return self.filter(
+            Q(
+                status__in=['processed', 'appealing'],
+                datetime_last_response__isnull=False,
+                requests_since_response__gt=STALE_REPLIES,
+            ) | Q(status='ack', communication_count__gt=STALE_REPLIES)
+        )
+
+    def update_communication_stats(self):
+        """Recompute the latest response and request dates and the
+        communication counts from the requests' communications"""
         from muckrock.foia.models import FOIACommunication
-        with_response = (
-            self.filter(
-                communications__response=False,
-                communications__datetime__gt=Subquery(
-                    FOIACommunication.objects.filter(
-                        foia=OuterRef('pk'),
-                        response=True,
-                    ).order_by().values('foia').annotate(max=Max('datetime'))
-                    .values('max')
-                )
-            ).annotate(count=Count('communications')).filter(
-                count__gt=STALE_REPLIES, status__in=['processed', 'appealing']
-            )
+        comms = (
+            FOIACommunication.objects.filter(foia=OuterRef('pk'))
+            .order_by().values('foia')
+        )
+        # the latest response of the outer communication's request
+        last_response = (
+            FOIACommunication.objects.filter(
+                foia=OuterRef('foia'),
+                response=True,
+            ).order_by().values('foia').annotate(max=Max('datetime'))
+            .values('max')
         )
-        without_response = (
-            self.annotate(count=Count('communications'))
-            .filter(status='ack', count__gt=STALE_REPLIES)
+        return self.update(
+            datetime_last_response=Subquery(
+                comms.filter(response=True).annotate(max=Max('datetime'))
+                .values('max')
+            ),
+            datetime_last_request=Subquery(
+                comms.filter(response=False).annotate(max=Max('datetime'))
+                .values('max')
+            ),
+            communication_count=Coalesce(
+                Subquery(
+                    comms.annotate(count=Count('pk')).values('count'),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+            requests_since_response=Coalesce(
+                Subquery(
+                    comms.filter(
+                        response=False,
+                        datetime__gt=Subquery(last_response),
+                    ).annotate(count=Count('pk')).values('count'),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
         )
-        return with_response.union(without_response)
 
 
 class FOIAComposerQuerySet(models.QuerySet):
@@ -2,14 +2,18 @@
 
 # Django
 from django.conf import settings
-from django.db.models.signals import post_delete, pre_save
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
 
 # Third Party
 import boto
 from boto.s3.connection import S3Connection
 
 # MuckRock
+from muckrock.core.caching import invalidate_tags
+from muckrock.foia.feeds import clear_feed_cache
 from muckrock.foia.models import (
+    FOIACommunication,
     FOIAFile,
     FOIARequest,
     OutboundRequestAttachment,
@@ -32,16 +36,92 @@ def foia_update_embargo(sender, **kwargs):
                 upload_document_cloud.apply_async(
                     args=[doc.pk, True], countdown=3
                 )
+            elif doc.thumbnail and doc.access != access:
+                doc.access = access
+                doc.save()
+                doc.update_thumbnail_access()
+
+
+def _get_username(foia):
+    """Get the username of the request's owner without loading the
+    composer and user"""
+    return (
+        User.objects.filter(composers=foia.composer_id)
+        .values_list('username', flat=True).first()
+    )
+
+
+def foia_clear_feeds(sender, **kwargs):
+    """Clear the cached feeds for the request if any field shown in
+    them, or which decides if it is shown in them, has changed"""
+    # pylint: disable=unused-argument
+    request = kwargs['instance']
+    old_request = request.get_saved()
+    fields = (
+        'title',
+        'status',
+        'embargo',
+        'datetime_done',
+        'first_request_excerpt',
+    )
+    if old_request is None or any(
+        getattr(request, f) != getattr(old_request, f) for f in fields
+    ):
+        clear_feed_cache(
+            foia=request if request.pk else None,
+            username=_get_username(request),
+            lists=True,
+        )
+
+
+def communication_clear_feeds(sender, **kwargs):
+    """Clear the cached feeds for the communication's request"""
+    # pylint: disable=unused-argument
+    comm = kwargs['instance']
+    if comm.foia_id:
+        clear_feed_cache(foia=comm.foia, username=_get_username(comm.foia))
+
+
+def foia_invalidate_cache(sender, **kwargs):
+    """Invalidate the cached fragments showing the request"""
+    # pylint: disable=unused-argument
+    invalidate_tags(kwargs['instance'].cache_tag())
+
+
+def communication_invalidate_cache(sender, **kwargs):
+    """Invalidate the cached fragments showing the communication's request"""
+    # pylint: disable=unused-argument
+    comm = kwargs['instance']
+    if comm.foia:
+        invalidate_tags(comm.foia.cache_tag())
+
+
+def file_invalidate_cache(sender, **kwargs):
+    """Invalidate the cached fragments showing the file's request"""
+    # pylint: disable=unused-argument
+    foia_file = kwargs['instance']
+    if foia_file.comm and foia_file.comm.foia:
+        invalidate_tags(foia_file.comm.foia.cache_tag())
 
 
 def foia_file_delete_s3(sender, **kwargs):
     """Delete file from S3 after the model is deleted"""
     # pylint: disable=unused-argument
 
+    foia_file = kwargs['instance']
+    if foia_file.thumbnail and foia_file.is_thumbnail_shared():
+        # the files still using the thumbnail may all be private
+        foia_file.update_thumbnail_access()
+    elif foia_file.thumbnail and settings.CLEAN_S3_ON_FOIA_DELETE:
+        foia_file.thumbnail.delete(save=False)
+
+    if foia_file.ffile and foia_file.is_shared():
+        # cloned files share their stored file, only delete it once
+        # the last reference to it is gone
+        return
+
     if settings.CLEAN_S3_ON_FOIA_DELETE:
         # only delete if we are using s3
-        foia_file = kwargs['instance']
-
         conn = S3Connection(
             settings.AWS_ACCESS_KEY_ID,
             settings.AWS_SECRET_ACCESS_KEY,
@@ -87,12 +167,53 @@ def attachment_delete_s3(sender, **kwargs):
             key.delete()
 
 
+def communication_update_stats(sender, **kwargs):
+    """Update the request's communication stats when one of its
+    communications is deleted"""
+    # pylint: disable=unused-argument
+    comm = kwargs['instance']
+    if comm.foia_id:
+        FOIARequest.objects.filter(
+            pk=comm.foia_id,
+        ).update_communication_stats()
+
+
 pre_save.connect(
     foia_update_embargo,
     sender=FOIARequest,
     dispatch_uid='muckrock.foia.signals.embargo',
 )
 
+pre_save.connect(
+    foia_clear_feeds,
+    sender=FOIARequest,
+    dispatch_uid='muckrock.foia.signals.clear_feeds',
+)
+
+post_save.connect(
+    communication_clear_feeds,
+    sender=FOIACommunication,
+    dispatch_uid='muckrock.foia.signals.communication_clear_feeds',
+)
+
+post_save.connect(
+    foia_invalidate_cache,
+    sender=FOIARequest,
+    dispatch_uid='muckrock.foia.signals.invalidate_cache',
+)
+
+post_save.connect(
+    communication_invalidate_cache,
+    sender=FOIACommunication,
+    dispatch_uid='muckrock.foia.signals.communication_invalidate_cache',
+)
+
+post_save.connect(
+    file_invalidate_cache,
+    sender=FOIAFile,
+    dispatch_uid='muckrock.foia.signals.file_invalidate_cache',
+)
+
 post_delete.connect(
     foia_file_delete_s3,
     sender=FOIAFile,
@@ -104,3 +225,9 @@ post_delete.connect(
     sender=OutboundRequestAttachment,
     dispatch_uid='muckrock.foia.signals.attachment_delete_s3',
 )
+
+post_delete.connect(
+    communication_update_stats,
+    sender=FOIACommunication,
+    dispatch_uid='muckrock.foia.signals.communication_update_stats',
+)
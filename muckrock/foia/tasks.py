@@ -8,9 +8,9 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.storage import default_storage
 from django.core.mail import send_mail
-from django.core.urlresolvers import reverse
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.module_loading import import_string
 
 # Standard Library
 import base64
@@ -21,7 +21,7 @@ import os.path
 import re
 import sys
 import urllib2
-from datetime import date, datetime, time
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 from random import randint
 from urllib import quote_plus
@@ -33,28 +33,25 @@ import requests
 from boto.s3.connection import S3Connection
 from constance import config
 from django_mailgun import MailgunAPIError
-from phaxio import PhaxioApi
-from phaxio.exceptions import PhaxioError
 from raven import Client
 from raven.contrib.celery import register_logger_signal, register_signal
 from scipy.sparse import hstack
 
 # MuckRock
-from muckrock.communication.models import (
-    FaxCommunication,
-    FaxError,
-    MailCommunication,
-)
+from muckrock.communication.models import MailCommunication
 from muckrock.core.utils import generate_status_action
 from muckrock.foia.codes import CODES
 from muckrock.foia.exceptions import SizeError
+from muckrock.foia.fax import DISPATCH_TIME_LIMIT, queue_fax, send_next_batch
 from muckrock.foia.models import (
     FOIACommunication,
     FOIAComposer,
+    FOIAExport,
     FOIAFile,
     FOIARequest,
 )
-from muckrock.task.models import ResponseTask, ReviewAgencyTask
+from muckrock.message.email import TemplateEmail
+from muckrock.task.models import ResponseTask
 from muckrock.vendor import MultipartPostHandler
 
 foia_url = r'(?P<jurisdiction>[\w\d_-]+)-(?P<jidx>\d+)/(?P<slug>[\w\d_-]+)-(?P<idx>\d+)'
@@ -151,6 +148,55 @@ def upload_document_cloud(doc_pk, change, **kwargs):
         )
 
 
+@task(
+    ignore_result=True,
+    max_retries=5,
+    time_limit=600,
+    name='muckrock.foia.tasks.finalize_upload'
+)
+def finalize_upload(doc_pk, **kwargs):
+    """Finalize a file uploaded directly to S3 - record its size, content
+    type, hash and page count and generate its thumbnail, then upload it to
+    Document Cloud"""
+
+    try:
+        doc = FOIAFile.objects.get(pk=doc_pk)
+    except FOIAFile.DoesNotExist as exc:
+        # give database time to sync
+        finalize_upload.retry(
+            countdown=300, args=[doc_pk], kwargs=kwargs, exc=exc
+        )
+
+    try:
+        doc.finalize()
+    except IOError as exc:
+        # the upload may not be visible on S3 yet
+        logger.warn('Finalize upload error: %s', doc.pk)
+        finalize_upload.retry(
+            countdown=(2 ** finalize_upload.request.retries) * 60,
+            args=[doc_pk],
+            kwargs=kwargs,
+            exc=exc,
+        )
+
+    if doc.is_doccloud():
+        upload_document_cloud.delay(doc.pk, False)
+
+
+@task(
+    ignore_result=True,
+    name='muckrock.foia.tasks.upload_document_cloud_batch'
+)
+def upload_document_cloud_batch(doc_pks, change, **kwargs):
+    """Queue the uploads for many documents to Document Cloud at once,
+    so that moving or cloning a communication only sends a single task.
+    Each document is still uploaded by its own task, so that it is retried
+    independently."""
+    # pylint: disable=unused-argument
+    for doc_pk in doc_pks:
+        upload_document_cloud.delay(doc_pk, change)
+
+
 @task(
     ignore_result=True,
     max_retries=10,
@@ -308,92 +354,25 @@ def classify_status(task_pk, **kwargs):
     resp_task.save()
 
 
-@task(
-    ignore_result=True,
-    max_retries=5,
-    name='muckrock.foia.tasks.send_fax',
-    rate_limit='15/m',
-)
+@task(ignore_result=True, name='muckrock.foia.tasks.send_fax')
 def send_fax(comm_id, subject, body, error_count, **kwargs):
-    """Send a fax using the Phaxio API"""
-    api = PhaxioApi(
-        settings.PHAXIO_KEY,
-        settings.PHAXIO_SECRET,
-        raise_errors=True,
-    )
-
-    try:
-        comm = FOIACommunication.objects.get(pk=comm_id)
-    except FOIACommunication.DoesNotExist as exc:
-        send_fax.retry(
-            countdown=300,
-            args=[comm_id, subject, body, error_count],
-            kwargs=kwargs,
-            exc=exc,
-        )
+    """Queue a fax to be sent by the fax dispatcher
+    Faxes are no longer sent by this task, it is kept so that any
+    faxes already waiting to be sent by it are still queued"""
+    # pylint: disable=unused-argument
+    comm = FOIACommunication.objects.get(pk=comm_id)
+    queue_fax(comm, subject, body, error_count)
 
-    files = [f.ffile for f in comm.files.all()]
-    callback_url = 'https://%s%s' % (
-        settings.MUCKROCK_URL,
-        reverse('phaxio-callback'),
-    )
 
-    fax = FaxCommunication.objects.create(
-        communication=comm,
-        sent_datetime=timezone.now(),
-        to_number=comm.foia.fax,
-    )
-    try:
-        results = api.send(
-            to=comm.foia.fax.as_e164,
-            header_text=subject[:45],
-            string_data=body,
-            string_data_type='text',
-            files=files,
-            batch=True,
-            batch_delay=settings.PHAXIO_BATCH_DELAY,
-            batch_collision_avoidance=True,
-            callback_url=callback_url,
-            **{
-                'tag[fax_id]': fax.pk,
-                'tag[error_count]': error_count,
-            }
-        )
-        fax.fax_id = results['faxId']
-        fax.save()
-    except PhaxioError as exc:
-        FaxError.objects.create(
-            fax=fax,
-            datetime=timezone.now(),
-            recipient=comm.foia.fax,
-            error_type='apiError',
-            error_code=exc.args[0],
-        )
-        fatal_errors = {
-            (
-                'Phone number is not formatted correctly or invalid. '
-                'Please check the number and try again.'
-            ),
-        }
-        if exc.args[0] in fatal_errors:
-            comm.foia.fax.status = 'error'
-            comm.foia.fax.save()
-            ReviewAgencyTask.objects.ensure_one_created(
-                agency=comm.foia.agency,
-                resolved=False,
-            )
-        else:
-            logger.error(
-                'Send fax error, will retry: %s',
-                exc,
-                exc_info=sys.exc_info(),
-            )
-            send_fax.retry(
-                countdown=300,
-                args=[comm_id, subject, body, error_count],
-                kwargs=kwargs,
-                exc=exc,
-            )
+@periodic_task(
+    run_every=crontab(minute='*'),
+    ignore_result=True,
+    time_limit=DISPATCH_TIME_LIMIT,
+    name='muckrock.foia.tasks.dispatch_faxes',
+)
+def dispatch_faxes():
+    """Send the next batch of queued faxes"""
+    send_next_batch()
 
 
 @periodic_task(
@@ -765,3 +744,63 @@ def autoimport():
             'info@muckrock.com', ['info@muckrock.com'],
             fail_silently=False
         )
+
+
+@task(
+    ignore_result=True,
+    time_limit=3600,
+    soft_time_limit=3540,
+    name='muckrock.foia.tasks.export_csv'
+)
+def export_csv(export_pk, view_path, query_string, view_kwargs=None):
+    """Generate a CSV export of a list of requests and email the user
+    a link to download it
+
+    The requests are rebuilt from the list view and its query string, as
+    the user who requested the export would have seen them
+    """
+    export = FOIAExport.objects.select_related('user').get(pk=export_pk)
+    try:
+        view_class = import_string(view_path)
+        foias = view_class.get_export_queryset(
+            export.user,
+            query_string,
+            view_kwargs or {},
+        )
+        export.generate(foias)
+    except SoftTimeLimitExceeded:
+        export.status = 'failed'
+        export.save()
+        logger.error('Export CSV took too long: %s', export_pk)
+        return
+    except Exception:
+        export.status = 'failed'
+        export.save()
+        logger.error(
+            'Export CSV failed: %s',
+            export_pk,
+            exc_info=sys.exc_info(),
+        )
+        raise
+    TemplateEmail(
+        user=export.user,
+        extra_context={'export': export},
+        text_template='message/notification/export.txt',
+        html_template='message/notification/export.html',
+        subject=u'Your request export is ready',
+    ).send(fail_silently=False)
+
+
+@periodic_task(
+    run_every=crontab(hour=3, minute=30),
+    name='muckrock.foia.tasks.clean_exports'
+)
+def clean_exports():
+    """Remove exports which are too old to be reused"""
+    cutoff = timezone.now() - timedelta(
+        days=settings.EXPORT_CSV_EXPIRE_DAYS
+    )
+    for export in FOIAExport.objects.filter(datetime_created__lt=cutoff):
+        if export.ffile:
+            export.ffile.delete(save=False)
+        export.delete()
@@ -4,10 +4,13 @@ Tests for the FOIACommunication model
 
 # Django
 from django import test
+from django.core.mail import EmailMessage
+from django.utils import timezone
 
 # Standard Library
 import logging
 import os
+from datetime import timedelta
 
 # Third Party
 import nose
@@ -22,7 +25,11 @@ from muckrock.foia.factories import (
     FOIAFileFactory,
     FOIARequestFactory,
 )
-from muckrock.foia.models import CommunicationMoveLog, FOIACommunication
+from muckrock.foia.models import (
+    CommunicationMoveLog,
+    FOIACommunication,
+    FOIARequest,
+)
 
 
 class TestCommunication(test.TestCase):
@@ -70,6 +77,26 @@ class TestCommunication(test.TestCase):
         eq_(foia_file.ffile.file.name, 'doc.pdf')
         eq_(foia_file.ffile.read(), 'More contents')
 
+    def test_attach_files_to_email(self):
+        """Files within the size budget are attached, the rest are returned
+        to be linked to"""
+        comm = FOIACommunicationFactory()
+        small_file = FOIAFileFactory(
+            comm=comm,
+            ffile__filename='small.txt',
+            ffile__data='small',
+        )
+        large_file = FOIAFileFactory(
+            comm=comm,
+            ffile__filename='large.pdf',
+            ffile__data='large' * 10,
+        )
+        msg = EmailMessage()
+        with self.settings(EMAIL_ATTACHMENT_MAX_SIZE=20):
+            linked_files = comm.attach_files_to_email(msg)
+        eq_(linked_files, [large_file])
+        eq_(msg.attachments, [(small_file.name(), u'small', 'text/plain')])
+
     @raises(ValueError)
     def test_orphan_error(self):
         """Orphans should raise an error"""
@@ -289,6 +316,67 @@ class TestCommunicationClone(test.TestCase):
             )
         mock_upload.assert_called()
 
+    @patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+    def test_clone_files_shared(self, mock_upload):
+        """Cloned files should share the stored file with the original"""
+        # pylint: disable=unused-argument
+        clones = self.comm.clone([FOIARequestFactory()], self.user)
+        clone_file = clones[0].files.get()
+        eq_(clone_file.ffile.name, self.file.ffile.name)
+        ok_(self.file.is_shared())
+        clone_file.delete()
+        ok_(not self.file.is_shared())
+
+    @patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+    def test_clone_sub_communications(self, mock_upload):
+        """Should copy the sub communications and their email addresses"""
+        # pylint: disable=unused-argument
+        email = self.comm.emails.first()
+        email.to_emails.set(
+            [EmailAddress.objects.fetch(u'to@example.com')]
+        )
+        email.cc_emails.set([
+            EmailAddress.objects.fetch(u'cc1@example.com'),
+            EmailAddress.objects.fetch(u'cc2@example.com'),
+        ])
+        clones = self.comm.clone(
+            [FOIARequestFactory(), FOIARequestFactory()],
+            self.user,
+        )
+        for clone in clones:
+            eq_(clone.emails.count(), self.comm.emails.count())
+            clone_email = clone.emails.first()
+            eq_(clone_email.from_email, email.from_email)
+            eq_(
+                set(clone_email.to_emails.all()),
+                set(email.to_emails.all()),
+            )
+            eq_(
+                set(clone_email.cc_emails.all()),
+                set(email.cc_emails.all()),
+            )
+
+    def test_clone_datetime_updated(self):
+        """Cloning should update the requests' updated date"""
+        foia = FOIARequestFactory(datetime_updated=None)
+        self.comm.clone([foia], self.user)
+        foia.refresh_from_db()
+        eq_(foia.datetime_updated, self.comm.datetime)
+
+    @patch('muckrock.foia.feeds.clear_feed_cache')
+    @patch('muckrock.foia.models.communication.invalidate_tags')
+    def test_clone_clears_caches(self, mock_invalidate, mock_clear):
+        """Cloning should clear the caches for each of the requests"""
+        foias = FOIARequestFactory.create_batch(2)
+        self.comm.clone(foias, self.user)
+        mock_invalidate.assert_called_once_with(
+            *[foia.cache_tag() for foia in foias]
+        )
+        eq_(
+            set(c[1]['foia'] for c in mock_clear.call_args_list),
+            set(foias),
+        )
+
     @raises(ValueError)
     def test_clone_empty_list(self):
         """Should throw a value error if given an empty list"""
@@ -308,3 +396,75 @@ class TestCommunicationClone(test.TestCase):
         ok_(not self.comm.files.all()[0].ffile)
         other_foia = FOIARequestFactory()
         self.comm.clone([other_foia], self.user)
+
+
+class TestCommunicationStats(test.TestCase):
+    """The request's communication stats should follow its communications"""
+
+    def setUp(self):
+        self.foia = FOIARequestFactory()
+        now = timezone.now()
+        self.request = FOIACommunicationFactory(
+            foia=self.foia,
+            response=False,
+            datetime=now - timedelta(3),
+        )
+        self.response = FOIACommunicationFactory(
+            foia=self.foia,
+            response=True,
+            datetime=now - timedelta(2),
+        )
+        self.followup = FOIACommunicationFactory(
+            foia=self.foia,
+            response=False,
+            datetime=now - timedelta(1),
+        )
+
+    def test_save(self):
+        """Saving communications should update the stats"""
+        self.foia.refresh_from_db()
+        eq_(self.foia.datetime_last_response, self.response.datetime)
+        eq_(self.foia.datetime_last_request, self.followup.datetime)
+        eq_(self.foia.communication_count, 3)
+        eq_(self.foia.requests_since_response, 1)
+        ok_(self.foia.has_ack())
+
+    def test_delete(self):
+        """Deleting a communication should update the stats"""
+        self.response.delete()
+        self.foia.refresh_from_db()
+        eq_(self.foia.datetime_last_response, None)
+        eq_(self.foia.communication_count, 2)
+        eq_(self.foia.requests_since_response, 0)
+        ok_(not self.foia.has_ack())
+
+    @patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+    def test_move(self, mock_upload):
+        """Moving a communication should update both requests' stats"""
+        # pylint: disable=unused-argument
+        other_foia = FOIARequestFactory()
+        self.response.move([other_foia.pk], UserFactory())
+        self.foia.refresh_from_db()
+        other_foia.refresh_from_db()
+        eq_(self.foia.datetime_last_response, None)
+        eq_(self.foia.communication_count, 2)
+        eq_(other_foia.datetime_last_response, self.response.datetime)
+        eq_(other_foia.communication_count, 1)
+
+    def test_stale_save(self):
+        """Saving a request loaded before a new communication should not
+        overwrite its stats"""
+        foia = FOIARequest.objects.get(pk=self.foia.pk)
+        FOIACommunicationFactory(foia=self.foia, response=False)
+        foia.save()
+        foia.refresh_from_db()
+        eq_(foia.communication_count, 4)
+        eq_(foia.requests_since_response, 2)
+
+    @patch('muckrock.foia.querysets.STALE_REPLIES', 1)
+    def test_get_stale(self):
+        """Requests with many unanswered communications are stale"""
+        FOIARequest.objects.filter(pk=self.foia.pk).update(status='processed')
+        ok_(self.foia not in FOIARequest.objects.get_stale())
+        FOIACommunicationFactory(foia=self.foia, response=False)
+        ok_(self.foia in FOIARequest.objects.get_stale())
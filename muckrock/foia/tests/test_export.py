@@ -0,0 +1,130 @@
+"""
+Tests for background CSV exports of requests
+"""
+
+# Django
+from django.http.request import QueryDict
+from django.test import TestCase
+from django.test.utils import override_settings
+
+# Standard Library
+import gzip
+from StringIO import StringIO
+
+# Third Party
+import mock
+import unicodecsv as csv
+from nose.tools import assert_raises, eq_, ok_
+
+# MuckRock
+from muckrock.core.factories import UserFactory
+from muckrock.foia.factories import FOIARequestFactory
+from muckrock.foia.models import FOIAExport, FOIARequest, export_hash
+from muckrock.foia.tasks import export_csv
+
+
+class TestFOIAExport(TestCase):
+    """Test generating request exports"""
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.foias = FOIARequestFactory.create_batch(3)
+
+    @override_settings(EXPORT_CSV_BATCH_SIZE=2)
+    def test_generate(self):
+        """All requests should be exported across batches"""
+        export = FOIAExport.objects.create(user=self.user, query_hash='hash')
+        export.generate(FOIARequest.objects.all())
+        export.refresh_from_db()
+        eq_(export.status, 'done')
+        eq_(export.row_count, 3)
+        rows = list(csv.reader(export.ffile))
+        eq_(rows[0][1], 'Title')
+        eq_(
+            sorted(row[1] for row in rows[1:]),
+            sorted(foia.title for foia in self.foias),
+        )
+
+    def test_generate_compressed(self):
+        """Compressed exports should be gzipped"""
+        export = FOIAExport.objects.create(
+            user=self.user,
+            query_hash='hash',
+            compressed=True,
+        )
+        export.generate(FOIARequest.objects.filter(pk=self.foias[0].pk))
+        export.refresh_from_db()
+        ok_(export.ffile.name.endswith('.csv.gz'))
+        contents = gzip.GzipFile(fileobj=StringIO(export.ffile.read())).read()
+        rows = list(csv.reader(StringIO(contents)))
+        eq_(len(rows), 2)
+        eq_(rows[1][1], self.foias[0].title)
+
+    def test_task(self):
+        """The task should rebuild the view's queryset and export it"""
+        export = FOIAExport.objects.create(user=self.user, query_hash='hash')
+        export_csv(
+            export.pk,
+            'muckrock.foia.views.list.RequestList',
+            'user={}'.format(self.foias[1].composer.user.pk),
+            {},
+        )
+        export.refresh_from_db()
+        eq_(export.status, 'done')
+        eq_(export.row_count, 1)
+
+    def test_task_failure(self):
+        """An error while exporting should mark the export as failed"""
+        export = FOIAExport.objects.create(user=self.user, query_hash='hash')
+        with mock.patch.object(
+            FOIAExport, 'generate', side_effect=ValueError
+        ):
+            with assert_raises(ValueError):
+                export_csv(
+                    export.pk,
+                    'muckrock.foia.views.list.RequestList',
+                    '',
+                    {},
+                )
+        export.refresh_from_db()
+        eq_(export.status, 'failed')
+
+    def test_hash(self):
+        """Pagination and sorting should not change the export hash, while
+        the user and the list view should"""
+        view = 'muckrock.foia.views.list.RequestList'
+        query = QueryDict('status=done')
+        eq_(
+            export_hash(
+                self.user,
+                view,
+                {},
+                QueryDict('status=done&page=2&sort=title'),
+            ),
+            export_hash(self.user, view, {}, query),
+        )
+        ok_(
+            export_hash(self.user, view, {}, query) !=
+            export_hash(UserFactory(), view, {}, query)
+        )
+        ok_(
+            export_hash(self.user, view, {}, query) != export_hash(
+                self.user,
+                'muckrock.foia.views.list.MyRequestList',
+                {},
+                query,
+            )
+        )
+        ok_(
+            export_hash(self.user, view, {'idx': 1}, query) !=
+            export_hash(self.user, view, {'idx': 2}, query)
+        )
+
+    def test_get_recent(self):
+        """Recent exports should be reused, failed ones should not"""
+        export = FOIAExport.objects.create(user=self.user, query_hash='hash')
+        eq_(FOIAExport.objects.get_recent(self.user, 'hash', False), export)
+        eq_(FOIAExport.objects.get_recent(self.user, 'hash', True), None)
+        export.status = 'failed'
+        export.save()
+        eq_(FOIAExport.objects.get_recent(self.user, 'hash', False), None)
@@ -0,0 +1,120 @@
+"""
+Tests for the fax dispatcher
+"""
+
+# Django
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Standard Library
+from datetime import timedelta
+
+# Third Party
+from nose.tools import eq_, ok_
+
+# MuckRock
+from muckrock.communication.factories import PhoneNumberFactory
+from muckrock.communication.models import QueuedFax
+from muckrock.foia.factories import FOIACommunicationFactory
+from muckrock.foia.fax import (
+    FATAL_ERRORS,
+    LOCK_KEY,
+    FakePhaxioApi,
+    _claim_batch,
+    get_stats,
+    queue_fax,
+    send_next_batch,
+)
+
+
+class TestFaxDispatch(TestCase):
+    """Test queueing and sending faxes"""
+
+    def setUp(self):
+        FakePhaxioApi.reset()
+        now = timezone.now()
+        self.initial = FOIACommunicationFactory(
+            datetime=now - timedelta(1),
+            foia__fax=PhoneNumberFactory(number='+16175551234', type='fax'),
+        )
+        self.follow_up = FOIACommunicationFactory(
+            datetime=now,
+            foia=self.initial.foia,
+        )
+
+    def test_priority(self):
+        """Initial requests should be sent before follow ups"""
+        follow_up = queue_fax(self.follow_up, 'Follow up', 'Body')
+        initial = queue_fax(self.initial, 'Initial', 'Body')
+        eq_(follow_up.priority, 1)
+        eq_(initial.priority, 0)
+        stats = get_stats()
+        eq_(stats['depth'], 2)
+        eq_(stats['initial_depth'], 1)
+        eq_(stats['follow_up_depth'], 1)
+        send_next_batch()
+        eq_(
+            [f['header_text'] for f in FakePhaxioApi.sent],
+            ['Initial', 'Follow up'],
+        )
+        ok_(not QueuedFax.objects.exists())
+        eq_(self.initial.faxes.get().fax_id, '1')
+
+    def test_countdown(self):
+        """Faxes should not be sent before their countdown is up"""
+        queue_fax(self.follow_up, 'Follow up', 'Body', 1, 60 * 60)
+        send_next_batch()
+        eq_(FakePhaxioApi.sent, [])
+        eq_(QueuedFax.objects.count(), 1)
+
+    def test_error(self):
+        """An API error should stop the batch and retry the fax later"""
+        queue_fax(self.initial, 'Initial', 'Body')
+        queue_fax(self.follow_up, 'Follow up', 'Body')
+        FakePhaxioApi.errors.append('Temporary error')
+        send_next_batch()
+        eq_(FakePhaxioApi.sent, [])
+        queued = QueuedFax.objects.get(communication=self.initial)
+        eq_(queued.attempts, 1)
+        ok_(queued.send_after > timezone.now())
+        eq_(self.initial.faxes.get().errors.count(), 1)
+        ok_(QueuedFax.objects.filter(communication=self.follow_up).exists())
+
+    def test_fatal_error(self):
+        """A bad number should not be retried"""
+        queue_fax(self.initial, 'Initial', 'Body')
+        FakePhaxioApi.errors.append(list(FATAL_ERRORS)[0])
+        send_next_batch()
+        ok_(not QueuedFax.objects.exists())
+        self.initial.foia.fax.refresh_from_db()
+        eq_(self.initial.foia.fax.status, 'error')
+
+    def test_claimed(self):
+        """Faxes claimed by another run should not be sent again"""
+        queue_fax(self.initial, 'Initial', 'Body')
+        eq_(len(_claim_batch(10)), 1)
+        send_next_batch()
+        eq_(FakePhaxioApi.sent, [])
+        eq_(QueuedFax.objects.count(), 1)
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+    )
+    def test_lock(self):
+        """A run should not send while another holds the lock, or release
+        another run's lock"""
+        cache.clear()
+        queue_fax(self.initial, 'Initial', 'Body')
+        cache.add(LOCK_KEY, 'other')
+        send_next_batch()
+        eq_(FakePhaxioApi.sent, [])
+        eq_(cache.get(LOCK_KEY), 'other')
+        cache.delete(LOCK_KEY)
+        send_next_batch()
+        eq_(len(FakePhaxioApi.sent), 1)
+        eq_(cache.get(LOCK_KEY), None)
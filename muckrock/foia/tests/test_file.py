@@ -3,18 +3,29 @@ Files should be added to communications
 """
 
 # Django
+from django.core import signing
 from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.test import TestCase
 
+# Standard Library
+import hashlib
+import os
+from cStringIO import StringIO
+
 # Third Party
+from mock import patch
 from nose.tools import eq_, ok_, raises
+from PIL import Image
 
 # MuckRock
 from muckrock.core.factories import UserFactory
 from muckrock.core.test_utils import http_get_response
 from muckrock.foia.factories import FOIAFileFactory
-from muckrock.foia.views import FOIAFileListView
+from muckrock.foia.models import FOIAFile
+from muckrock.foia.models.file import FILE_LINK_SALT
+from muckrock.foia.tasks import finalize_upload
+from muckrock.foia.views import FOIAFileListView, file_download
 
 
 class TestRequestFilesView(TestCase):
@@ -51,3 +62,148 @@ class TestRequestFilesView(TestCase):
         user = UserFactory()
         ok_(not self.foia.has_perm(user, 'view'))
         http_get_response(self.url, self.view, user, **self.kwargs)
+
+
+class TestFileDownloadView(TestCase):
+    """Signed links to files too large to attach to emails"""
+
+    def setUp(self):
+        self.file = FOIAFileFactory()
+
+    def test_get_ok(self):
+        """A signed link should redirect to the file"""
+        url = self.file.get_signed_url()
+        token = url.rstrip('/').split('/')[-1]
+        response = http_get_response(url, file_download, token=token)
+        eq_(response.status_code, 302)
+        eq_(response.url, self.file.ffile.url)
+
+    @raises(Http404)
+    def test_get_bad_signature(self):
+        """A tampered link should 404"""
+        token = signing.dumps(self.file.pk, salt=FILE_LINK_SALT) + 'x'
+        http_get_response(
+            reverse('foia-file-download', kwargs={'token': token}),
+            file_download,
+            token=token,
+        )
+
+    @raises(Http404)
+    def test_get_expired(self):
+        """An expired link should 404"""
+        token = signing.dumps(self.file.pk, salt=FILE_LINK_SALT)
+        with self.settings(EMAIL_ATTACHMENT_LINK_DAYS=-1):
+            http_get_response(
+                reverse('foia-file-download', kwargs={'token': token}),
+                file_download,
+                token=token,
+            )
+
+
+class TestFileFinalize(TestCase):
+    """Uploaded files are finalized before being sent to Document Cloud"""
+
+    def test_finalize(self):
+        """Size, content type and hash should be stored"""
+        file_ = FOIAFileFactory(
+            ffile__filename='notes.txt',
+            ffile__data='file contents',
+        )
+        file_.finalize()
+        file_.refresh_from_db()
+        eq_(file_.size, len('file contents'))
+        eq_(file_.content_type, 'text/plain')
+        eq_(file_.content_hash, hashlib.sha256('file contents').hexdigest())
+        ok_(file_.datetime_finalized)
+        ok_(not file_.thumbnail)
+
+    def test_finalize_image(self):
+        """Images should have a thumbnail generated"""
+        image = StringIO()
+        Image.new('RGB', (1000, 1000)).save(image, 'PNG')
+        file_ = FOIAFileFactory(
+            ffile__filename='photo.png',
+            ffile__data=image.getvalue(),
+        )
+        file_.finalize()
+        file_.refresh_from_db()
+        ok_(file_.thumbnail)
+        thumbnail = Image.open(file_.thumbnail)
+        ok_(max(thumbnail.size) <= 240)
+        eq_(file_.get_thumbnail(), file_.thumbnail.url)
+        # thumbnail names should not be guessable from the file name
+        ok_(os.path.basename(file_.thumbnail.name).startswith('photo-'))
+        ok_(len(os.path.basename(file_.thumbnail.name)) > len('photo.png'))
+
+    @patch('muckrock.foia.signals.boto')
+    @patch('muckrock.foia.signals.S3Connection')
+    def test_delete_thumbnail(self, mock_s3, mock_boto):
+        """Thumbnails should be deleted with the last file using them"""
+        image = StringIO()
+        Image.new('RGB', (100, 100)).save(image, 'PNG')
+        file_ = FOIAFileFactory(
+            ffile__filename='photo.png',
+            ffile__data=image.getvalue(),
+        )
+        file_.finalize()
+        clone = FOIAFile.objects.get(pk=file_.pk)
+        clone.pk = None
+        clone.save()
+        storage = file_.thumbnail.storage
+        name = file_.thumbnail.name
+        with self.settings(CLEAN_S3_ON_FOIA_DELETE=True):
+            clone.delete()
+            ok_(storage.exists(name))
+            file_.delete()
+            ok_(not storage.exists(name))
+
+    def test_finalize_bad_image(self):
+        """Images which can not be read should not have a thumbnail"""
+        file_ = FOIAFileFactory(
+            ffile__filename='photo.png',
+            ffile__data='not an image',
+        )
+        file_.finalize()
+        file_.refresh_from_db()
+        ok_(file_.datetime_finalized)
+        ok_(not file_.thumbnail)
+
+    def test_finalize_bad_pdf(self):
+        """PDFs which can not be read should not have their pages set"""
+        file_ = FOIAFileFactory(
+            ffile__filename='doc.pdf',
+            ffile__data='not a pdf',
+        )
+        file_.finalize()
+        file_.refresh_from_db()
+        eq_(file_.pages, 0)
+        ok_(file_.datetime_finalized)
+
+    @patch('muckrock.foia.tasks.upload_document_cloud.delay')
+    def test_finalize_upload(self, mock_upload):
+        """The task should finalize the file and then upload it to Document
+        Cloud"""
+        file_ = FOIAFileFactory(ffile__filename='doc.pdf')
+        finalize_upload(file_.pk)
+        file_.refresh_from_db()
+        ok_(file_.datetime_finalized)
+        mock_upload.assert_called_once_with(file_.pk, False)
+
+    @patch('muckrock.foia.tasks.upload_document_cloud.delay')
+    def test_finalize_upload_not_doccloud(self, mock_upload):
+        """Files Document Cloud does not support should not be uploaded"""
+        file_ = FOIAFileFactory(ffile__filename='photo.png')
+        finalize_upload(file_.pk)
+        mock_upload.assert_not_called()
+
+    def test_clone(self):
+        """Clones should keep the finalized data"""
+        file_ = FOIAFileFactory(
+            ffile__filename='notes.txt',
+            ffile__data='file contents',
+        )
+        file_.finalize()
+        clone = file_.build_clone(FOIAFileFactory().comm)
+        eq_(clone.content_hash, file_.content_hash)
+        eq_(clone.size, file_.size)
+        eq_(clone.datetime_finalized, file_.datetime_finalized)
@@ -6,7 +6,7 @@ Tests for the FOIA views
 from django.contrib.auth.models import AnonymousUser, User
 from django.core.urlresolvers import resolve, reverse
 from django.http.response import Http404
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 from django.utils import timezone
 
 # Standard Library
@@ -1442,3 +1442,64 @@ class TestFOIAComposerViews(TestCase):
         )
         eq_(response.status_code, 200)
         eq_(response.template_name, ['foia/foiacomposer_detail.html'])
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestCachedFeeds(TestCase):
+    """Test caching and conditional GETs for the RSS feeds"""
+
+    def setUp(self):
+        self.comm = FOIACommunicationFactory(
+            communication='The first request text',
+            foia__status='submitted',
+        )
+        self.foia = self.comm.foia
+        self.url = reverse('foia-feed', kwargs={'idx': self.foia.pk})
+
+    def test_excerpt(self):
+        """The first communication is stored on the request for the feeds"""
+        FOIACommunicationFactory(
+            foia=self.foia,
+            communication='A later communication',
+        )
+        self.foia.refresh_from_db()
+        eq_(self.foia.first_request_excerpt, 'The first request text')
+        response = self.client.get(reverse('foia-submitted-feed'))
+        assert_in('The first request text', response.content)
+
+    def test_conditional_get(self):
+        """A reader with the current version of the feed gets a 304"""
+        response = self.client.get(self.url)
+        eq_(response.status_code, 200)
+        ok_(response.has_header('Last-Modified'))
+        response = self.client.get(
+            self.url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        eq_(response.status_code, 304)
+
+    def test_invalidation(self):
+        """New communications and status changes clear the cached feeds"""
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        FOIACommunicationFactory(
+            foia=self.foia,
+            communication='A new response',
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 200)
+        assert_in('A new response', response.content)
+
+        response = self.client.get(reverse('foia-done-feed'))
+        assert_not_in(self.foia.title, response.content)
+        self.foia.status = 'done'
+        self.foia.datetime_done = timezone.now()
+        self.foia.save()
+        response = self.client.get(reverse('foia-done-feed'))
+        assert_in(self.foia.title, response.content)
@@ -109,6 +109,16 @@ urlpatterns = [
     # Misc Views
     url(r'^acronyms/$', views.acronyms, name='foia-acronyms'),
     url(r'^raw_email/(?P<idx>\d+)/$', views.raw, name='foia-raw'),
+    url(
+        r'^export/(?P<idx>\d+)/$',
+        views.export_download,
+        name='foia-export',
+    ),
+    url(
+        r'^file/(?P<token>[\w:-]+)/$',
+        views.file_download,
+        name='foia-file-download',
+    ),
 
     # Feeds
     url(
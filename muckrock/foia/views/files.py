@@ -1,17 +1,23 @@
 """FOIA views for handling files"""
 
 # Django
+from django.conf import settings
+from django.core import signing
 from django.http import Http404
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect
 from django.utils.decorators import method_decorator
 from django.views.generic import DetailView, ListView
 
+# Standard Library
+from datetime import timedelta
+
 # Third Party
 from djangosecure.decorators import frame_deny_exempt
 
 # MuckRock
 from muckrock.core.views import PaginationMixin
 from muckrock.foia.models import FOIAFile, FOIARequest
+from muckrock.foia.models.file import FILE_LINK_SALT
 
 
 @method_decorator(frame_deny_exempt, name='dispatch')
@@ -52,3 +58,18 @@ class FOIAFileListView(PaginationMixin, ListView):
         context = super(FOIAFileListView, self).get_context_data(**kwargs)
         context['foia'] = self.get_foia()
         return context
+
+
+def file_download(request, token):
+    """Download a file from a signed link sent in place of an attachment"""
+    # pylint: disable=unused-argument
+    try:
+        idx = signing.loads(
+            token,
+            salt=FILE_LINK_SALT,
+            max_age=timedelta(settings.EMAIL_ATTACHMENT_LINK_DAYS),
+        )
+    except signing.BadSignature:
+        raise Http404
+    file_ = get_object_or_404(FOIAFile, pk=idx)
+    return redirect(file_.ffile.url)
@@ -3,38 +3,32 @@ Views to display lists of FOIA requests
 """
 
 # Django
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.postgres.aggregates.general import StringAgg
 from django.core.urlresolvers import reverse
-from django.db.models import Count, DurationField, F, Prefetch
-from django.db.models.functions import Cast, Now
-from django.http import Http404, StreamingHttpResponse
+from django.db.models import Count, Prefetch
+from django.http import Http404, HttpRequest, QueryDict
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
 # Standard Library
 from datetime import date, timedelta
-from itertools import chain
 
 # Third Party
 import actstream
-import unicodecsv as csv
 from actstream.models import following
 from furl import furl
 
 # MuckRock
 from muckrock.agency.models import Agency
 from muckrock.core.forms import TagManagerForm
-from muckrock.core.models import ExtractDay
-from muckrock.core.utils import Echo
 from muckrock.core.views import (
     MRListView,
     MRSearchFilterListView,
     class_view_decorator,
 )
 from muckrock.crowdsource.forms import CrowdsourceChoiceForm
+from muckrock.crowdsource.models import CrowdsourceData
 from muckrock.foia.filters import (
     AgencyFOIARequestFilterSet,
     FOIARequestFilterSet,
@@ -49,10 +43,13 @@ from muckrock.foia.forms import (
 from muckrock.foia.models import (
     END_STATUS,
     FOIAComposer,
+    FOIAExport,
     FOIARequest,
     FOIASavedSearch,
+    export_hash,
 )
 from muckrock.foia.rules import can_embargo, can_embargo_permananently
+from muckrock.foia.tasks import export_csv
 from muckrock.news.models import Article
 from muckrock.project.forms import ProjectManagerForm
 from muckrock.project.models import Project
@@ -144,6 +141,8 @@ class RequestList(MRSearchFilterListView):
         url = furl(self.request.get_full_path())
         url.args['content_type'] = 'csv'
         context['csv_link'] = url.url
+        url.args['compress'] = '1'
+        context['csv_gz_link'] = url.url
         context['save_search_form'] = SaveSearchForm(
             initial={
                 'search_title': self.request.GET.get('search_title')
@@ -165,91 +164,66 @@ class RequestList(MRSearchFilterListView):
         wants_csv = self.request.GET.get('content_type') == 'csv'
         has_perm = self.request.user.has_perm('foia.export_csv')
         if wants_csv and has_perm:
-            psuedo_buffer = Echo()
-            fields = (
-                (lambda f: f.user.username, 'User'),
-                (lambda f: f.title, 'Title'),
-                (lambda f: f.get_status_display(), 'Status'),
-                (lambda f: settings.MUCKROCK_URL + f.get_absolute_url(), 'URL'),
-                (lambda f: f.jurisdiction.name, 'Jurisdiction'),
-                (lambda f: f.jurisdiction.pk, 'Jurisdiction ID'),
-                (
-                    lambda f: f.jurisdiction.get_level_display(),
-                    'Jurisdiction Level',
-                ),
-                (
-                    lambda f: f.jurisdiction.parent.name
-                    if f.jurisdiction.level == 'l' else f.jurisdiction.name,
-                    'Jurisdiction State',
-                ),
-                (lambda f: f.agency.name if f.agency else '', 'Agency'),
-                (lambda f: f.agency.pk if f.agency else '', 'Agency ID'),
-                (lambda f: f.date_followup, 'Followup Date'),
-                (lambda f: f.date_estimate, 'Estimated Completion Date'),
-                (lambda f: f.composer.requested_docs, 'Requested Documents'),
-                (lambda f: f.current_tracking_id(), 'Tracking Number'),
-                (lambda f: f.embargo, 'Embargo'),
-                (lambda f: f.days_since_submitted, 'Days since submitted'),
-                (lambda f: f.days_since_updated, 'Days since updated'),
-                (lambda f: f.project_names, 'Projects'),
-                (lambda f: f.tag_names, 'Tags'),
-            )
-            foias = (
-                context['paginator'].object_list.select_related(None)
-                .select_related(
-                    'composer__user',
-                    'agency__jurisdiction',
-                ).prefetch_related(
-                    'tracking_ids',
-                ).only(
-                    'composer__user__username',
-                    'title',
-                    'status',
-                    'slug',
-                    'agency__jurisdiction__name',
-                    'agency__jurisdiction__slug',
-                    'agency__jurisdiction__id',
-                    'agency__name',
-                    'agency__id',
-                    'date_followup',
-                    'date_estimate',
-                    'embargo',
-                    'composer__requested_docs',
-                ).annotate(
-                    days_since_submitted=ExtractDay(
-                        Cast(
-                            Now() - F('composer__datetime_submitted'),
-                            DurationField()
-                        )
-                    ),
-                    days_since_updated=ExtractDay(
-                        Cast(Now() - F('datetime_updated'), DurationField())
-                    ),
-                    project_names=StringAgg(
-                        'projects__title', ',', distinct=True
-                    ),
-                    tag_names=StringAgg('tags__name', ',', distinct=True),
-                )
-            )
-            writer = csv.writer(psuedo_buffer)
-            response = StreamingHttpResponse(
-                chain(
-                    [writer.writerow(f[1] for f in fields)],
-                    (
-                        writer.writerow(f[0](foia)
-                                        for f in fields)
-                        for foia in foias
-                    ),
-                ),
-                content_type='text/csv',
-            )
-            response['Content-Disposition'
-                     ] = 'attachment; filename="requests.csv"'
-            return response
+            return self._export_csv(context)
         else:
             return super(RequestList,
                          self).render_to_response(context, **kwargs)
 
+    @classmethod
+    def get_export_queryset(cls, user, query_string, kwargs):
+        """Rebuild the filtered requests being exported, outside of the
+        request they were listed in"""
+        view = cls()
+        view.request = HttpRequest()
+        view.request.user = user
+        view.request.GET = QueryDict(query_string)
+        view.args = ()
+        view.kwargs = kwargs
+        return view.get_filtered_queryset()
+
+    def _export_csv(self, context):
+        """Generate the CSV in the background, reusing a recent identical
+        export if there is one"""
+        user = self.request.user
+        compressed = self.request.GET.get('compress') == '1'
+        view_path = '{}.{}'.format(type(self).__module__, type(self).__name__)
+        query_hash = export_hash(
+            user,
+            view_path,
+            self.kwargs,
+            self.request.GET,
+        )
+        url = furl(self.request.get_full_path())
+        url.args.pop('content_type', None)
+        url.args.pop('compress', None)
+        export = FOIAExport.objects.get_recent(user, query_hash, compressed)
+        if export is not None and export.status == 'done':
+            return redirect(export)
+        elif export is not None:
+            messages.info(
+                self.request,
+                'Your export is still being generated.  We will email you '
+                'a link to download it when it is ready.',
+            )
+            return redirect(url.url)
+        export = FOIAExport.objects.create(
+            user=user,
+            query_hash=query_hash,
+            compressed=compressed,
+        )
+        export_csv.delay(
+            export.pk,
+            view_path,
+            self.request.GET.urlencode(),
+            self.kwargs,
+        )
+        messages.info(
+            self.request,
+            'Your export has been started.  We will email you a link to '
+            'download it when it is ready.',
+        )
+        return redirect(url.url)
+
     def post(self, request, *args, **kwargs):
         """Allow saving a search/filter"""
         # pylint: disable=unused-argument
@@ -342,15 +316,14 @@ class RequestList(MRSearchFilterListView):
             crowdsource = form.cleaned_data['crowdsource']
             if crowdsource is None:
                 return 'No crowdsource selected'
-            for foia in foias:
-                for comm in foia.communications.all():
-                    for file_ in comm.files.all():
-                        if file_.doc_id:
-                            crowdsource.data.create(
-                                url=
-                                'https://www.documentcloud.org/documents/{}.html'.
-                                format(file_.doc_id)
-                            )
+            CrowdsourceData.objects.bulk_create([
+                CrowdsourceData(
+                    crowdsource=crowdsource,
+                    url='https://www.documentcloud.org/documents/{}.html'
+                    .format(file_.doc_id),
+                ) for foia in foias for comm in foia.communications.all()
+                for file_ in comm.files.all() if file_.doc_id
+            ])
         return 'Files added to assignment'
 
     def get(self, request, *args, **kwargs):
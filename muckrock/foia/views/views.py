@@ -3,13 +3,22 @@ Miscellaneous Views for the FOIA application
 """
 
 # Django
-from django.contrib.auth.decorators import user_passes_test
-from django.http import Http404, HttpResponse
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+# Standard Library
+import os
+
 # MuckRock
 from muckrock.foia.codes import CODES
-from muckrock.foia.models import STATUS, FOIACommunication, FOIARequest
+from muckrock.foia.models import (
+    STATUS,
+    FOIACommunication,
+    FOIAExport,
+    FOIARequest,
+)
 
 
 def redirect_old(request, jurisdiction, slug, idx, action):
@@ -62,3 +71,37 @@ def raw(request, idx):
         )
     else:
         raise Http404
+
+
+@login_required
+def export_download(request, idx):
+    """Download a CSV export of requests"""
+    export = get_object_or_404(FOIAExport, pk=idx)
+    if export.user != request.user and not request.user.is_staff:
+        raise Http404
+    if export.status == 'done':
+        url = export.get_download_url()
+        if url is not None:
+            return redirect(url)
+        export.ffile.open('rb')
+        response = FileResponse(
+            export.ffile,
+            content_type='application/gzip'
+            if export.compressed else 'text/csv',
+        )
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+            os.path.basename(export.ffile.name)
+        )
+        return response
+    elif export.status == 'pending':
+        messages.info(
+            request,
+            'Your export is still being generated.  We will email you '
+            'a link to download it when it is ready.',
+        )
+    else:
+        messages.error(
+            request,
+            'There was an error generating your export, please try again',
+        )
+    return redirect('foia-list')
@@ -35,12 +35,34 @@ from muckrock.communication.models import (
     FaxError,
     PhoneNumber,
 )
+from muckrock.core.routing import Router
 from muckrock.foia.models import FOIACommunication, FOIARequest, RawEmail
 from muckrock.foia.tasks import classify_status
 from muckrock.task.models import FlaggedTask, OrphanTask, ReviewAgencyTask
 
 logger = logging.getLogger(__name__)
 
+RECIPIENT_ROUTER = Router(
+    'mailgun_recipient',
+    [
+        (
+            r'\A(\d+-\d{3,10})@%s' % re.escape(settings.MAILGUN_SERVER_NAME),
+            'request',
+        ),
+        (r'@%s\Z' % re.escape(settings.MAILGUN_SERVER_NAME), 'catch_all'),
+    ],
+)
+
+# remove RE: and trailing space from replies
+REPLY_ROUTER = Router(
+    'mailgun_reply',
+    [
+        (r'RE:.?(?P<subject>.*)', 'RE'),
+        (r'Re:.?(?P<subject>.*)', 'Re'),
+    ],
+    re.DOTALL,
+)
+
 
 def _make_orphan_comm(
     from_email, to_emails, cc_emails, subject, post, files, foia
@@ -180,18 +202,15 @@ def route_mailgun(request):
         if not cache.add(message_id, 1, 300):
             return HttpResponse('OK')
 
-    p_request_email = re.compile(
-        r'(\d+-\d{3,10})@%s' % settings.MAILGUN_SERVER_NAME
-    )
     tos = post.get('To', '') or post.get('to', '')
     ccs = post.get('Cc', '') or post.get('cc', '')
     name_emails = getaddresses([tos.lower(), ccs.lower()])
     logger.info('Incoming email: %s - %s', name_emails, post.get('Subject', ''))
     for _, email in name_emails:
-        m_request_email = p_request_email.match(email)
-        if m_request_email:
-            _handle_request(request, m_request_email.group(1))
-        elif email.endswith('@%s' % settings.MAILGUN_SERVER_NAME):
+        route, match = RECIPIENT_ROUTER.match(email)
+        if route == 'request':
+            _handle_request(request, match.group(1))
+        elif route == 'catch_all':
             _catch_all(request, email)
     return HttpResponse('OK')
 
@@ -385,14 +404,10 @@ def _catch_all(request, address):
 
 def _find_likely_bounce(subject):
     """Find likely foia for out of office bounces"""
-    if 'RE:' in subject:
-        reply = 'RE:'
-    elif 'Re:' in subject:
-        reply = 'Re:'
-    else:
+    _, match = REPLY_ROUTER.match(subject)
+    if match is None:
         return None
-    # remove RE: and trailing space
-    subject = subject[subject.find(reply) + 4:]
+    subject = match.group('subject')
     comm = FOIACommunication.objects.filter(subject__contains=subject).last()
     if comm:
         return comm.foia
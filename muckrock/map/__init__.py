@@ -0,0 +1 @@
+default_app_config = 'muckrock.map.apps.MapConfig'
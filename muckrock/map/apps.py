@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+App config for maps
+"""
+from __future__ import unicode_literals
+
+# Django
+from django.apps import AppConfig
+
+
+class MapConfig(AppConfig):
+    """Config maps"""
+    name = 'muckrock.map'
+
+    def ready(self):
+        """Connect the signal handlers"""
+        import muckrock.map.signals  # pylint: disable=unused-import,unused-variable
@@ -0,0 +1,106 @@
+"""
+Compact GeoJSON for the markers on a map
+
+A map's markers are reduced to a list of `(x, y, foia_id)` points, with the
+coordinates rounded, which is cached, and filtered to a bounding box or map
+tile so the client only fetches the markers it can see.
+"""
+
+# Standard Library
+import json
+import math
+
+# coordinates are rounded to this many decimal places, about a meter
+COORDINATE_PRECISION = 5
+
+
+def point_coordinates(point):
+    """The rounded coordinates of a GeoJSON point, or None if it is empty"""
+    if isinstance(point, basestring):
+        try:
+            point = json.loads(point) if point else None
+        except ValueError:
+            return None
+    try:
+        x, y = point['coordinates'][:2]
+        return (
+            round(float(x), COORDINATE_PRECISION),
+            round(float(y), COORDINATE_PRECISION),
+        )
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def _wrap_longitude(x):
+    """Wrap a longitude into [-180, 180)"""
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def parse_bbox(value):
+    """Parse a `west,south,east,north` bounding box, as sent by Leaflet's
+    `toBBoxString`, raising ValueError if it is not valid
+
+    Leaflet does not wrap the longitudes of the bounding box, which may be
+    outside of [-180, 180] once the map has been panned across the
+    antimeridian or zoomed out past the whole world, so they are wrapped
+    here, with a box which crosses the antimeridian having its west edge
+    east of its east edge.
+    """
+    bbox = tuple(float(v) for v in value.split(','))
+    if len(bbox) != 4 or bbox[1] > bbox[3]:
+        raise ValueError('Invalid bounding box: {}'.format(value))
+    west, south, east, north = bbox
+    if east - west >= 360:
+        return (-180.0, south, 180.0, north)
+    return (_wrap_longitude(west), south, _wrap_longitude(east), north)
+
+
+def tile_bbox(zoom, x, y):
+    """The bounding box of a web mercator (slippy map) tile"""
+    size = 2.0 ** zoom
+
+    def latitude(tile_y):
+        """The latitude of the top of a row of tiles"""
+        return math.degrees(
+            math.atan(math.sinh(math.pi * (1 - 2 * tile_y / size)))
+        )
+
+    return (
+        x / size * 360.0 - 180.0,
+        latitude(y + 1),
+        (x + 1) / size * 360.0 - 180.0,
+        latitude(y),
+    )
+
+
+def filter_points(points, bbox):
+    """The points within the bounding box"""
+    west, south, east, north = bbox
+    if west <= east:
+        in_x = lambda x: west <= x <= east
+    else:
+        # the box crosses the antimeridian
+        in_x = lambda x: x >= west or x <= east
+    return [p for p in points if in_x(p[0]) and south <= p[1] <= north]
+
+
+def to_geojson(points):
+    """Serialize the points to a GeoJSON feature collection, without any
+    whitespace"""
+    return json.dumps(
+        {
+            'type':
+                'FeatureCollection',
+            'features': [{
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': [x, y],
+                },
+                'properties': {
+                    'foia': foia_id,
+                },
+            } for x, y, foia_id in points],
+        },
+        separators=(',', ':'),
+    )
@@ -4,8 +4,9 @@ Models for the Map application
 
 # Django
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 
 # Standard Library
@@ -14,11 +15,18 @@ import json
 # Third Party
 from djgeojson.fields import PointField
 
+# MuckRock
+from muckrock.core import caching
+from muckrock.map.geojson import point_coordinates
+
 DEFAULT_CENTER_POINT = json.dumps({
     "type": "Point",
     "coordinates": settings.LEAFLET_CONFIG['DEFAULT_CENTER']
 })
 DEFAULT_ZOOM_LEVEL = settings.LEAFLET_CONFIG['DEFAULT_ZOOM']
+CACHE_TAG = 'map:{}'
+POINTS_CACHE_KEY = 'map:{}:points'
+POINTS_QUEUED_KEY = 'map:{}:points_queued'
 
 
 class Map(models.Model):
@@ -49,6 +57,49 @@ class Map(models.Model):
         """Returns the URL for this map"""
         return reverse('map-detail', kwargs={'slug': self.slug, 'idx': self.id})
 
+    def cache_tag(self):
+        """The tag for cached values which show this map"""
+        return CACHE_TAG.format(self.pk)
+
+    def get_points(self):
+        """The location of each marker, as a list of `(x, y, foia_id)`,
+        from the cache if possible"""
+        return caching.get_or_set(
+            POINTS_CACHE_KEY.format(self.pk),
+            self._compute_points,
+            settings.MAP_POINTS_CACHE_TIMEOUT,
+            tags=[self.cache_tag()],
+        )
+
+    def refresh_points(self):
+        """Recompute the cached marker locations"""
+        return caching.refresh(
+            POINTS_CACHE_KEY.format(self.pk),
+            self._compute_points,
+            settings.MAP_POINTS_CACHE_TIMEOUT,
+            tags=[self.cache_tag()],
+        )
+
+    def _compute_points(self):
+        """Get the location of each marker from the database"""
+        points = []
+        markers = self.markers.order_by('pk').values_list('point', 'foia_id')
+        for point, foia_id in markers:
+            coordinates = point_coordinates(point)
+            if coordinates is not None:
+                points.append(coordinates + (foia_id,))
+        return points
+
+    @staticmethod
+    def points_changed(map_pk):
+        """Invalidate the cached marker locations, and recompute them in the
+        background once the current transaction commits, unless that is
+        already queued"""
+        from muckrock.map.tasks import refresh_map_points
+        caching.invalidate_tags(CACHE_TAG.format(map_pk))
+        if cache.add(POINTS_QUEUED_KEY.format(map_pk), True, 5 * 60):
+            transaction.on_commit(lambda: refresh_map_points.delay(map_pk))
+
 
 class Marker(models.Model):
     """A Marker connects a FOIARequest to a Map with a location."""
@@ -0,0 +1,38 @@
+"""Model signal handlers for the map application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.map.models import Map, Marker
+
+
+def map_points_changed(sender, instance, **kwargs):
+    """Recompute the map's cached marker locations when it or one of its
+    markers changes"""
+    # pylint: disable=unused-argument
+    if kwargs.get('raw'):
+        return
+    if isinstance(instance, Map):
+        Map.points_changed(instance.pk)
+    else:
+        Map.points_changed(instance.map_id)
+
+
+post_save.connect(
+    map_points_changed,
+    sender=Map,
+    dispatch_uid='muckrock.map.signals.map_points_changed',
+)
+
+post_save.connect(
+    map_points_changed,
+    sender=Marker,
+    dispatch_uid='muckrock.map.signals.marker_points_changed',
+)
+
+post_delete.connect(
+    map_points_changed,
+    sender=Marker,
+    dispatch_uid='muckrock.map.signals.marker_delete_points_changed',
+)
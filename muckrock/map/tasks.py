@@ -0,0 +1,24 @@
+"""
+Celery tasks for the map application
+"""
+
+# Django
+from celery.task import task
+from django.core.cache import cache
+
+# MuckRock
+from muckrock.map.models import POINTS_QUEUED_KEY, Map
+
+
+@task(ignore_result=True, name='muckrock.map.tasks.refresh_map_points')
+def refresh_map_points(map_pk, **kwargs):
+    """Recompute the cached marker locations for a map"""
+    # pylint: disable=unused-argument
+    # allow another refresh to be queued if a marker changes while
+    # this one is running
+    cache.delete(POINTS_QUEUED_KEY.format(map_pk))
+    try:
+        map_ = Map.objects.get(pk=map_pk)
+    except Map.DoesNotExist:
+        return
+    map_.refresh_points()
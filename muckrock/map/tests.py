@@ -3,7 +3,9 @@ Tests for the Map application
 """
 
 # Django
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import RequestFactory, TestCase, override_settings
 from django.utils.text import slugify
 
 # Standard Library
@@ -15,7 +17,19 @@ from nose.tools import eq_, ok_
 # MuckRock
 from muckrock.core.factories import AgencyFactory, ProjectFactory
 from muckrock.foia.factories import FOIARequestFactory
+from muckrock.map.geojson import (
+    filter_points,
+    parse_bbox,
+    point_coordinates,
+    tile_bbox,
+)
 from muckrock.map.models import Map, Marker
+from muckrock.map.views import MapLayerView
+
+
+def make_point(x, y):
+    """Make a GeoJSON point"""
+    return json.dumps({'type': 'Point', 'coordinates': [x, y]})
 
 
 class UnitTestMap(TestCase):
@@ -125,3 +139,134 @@ class UnitTestMarker(TestCase):
             filled_marker.point, location2,
             'The location of the marker should not change since it was provided at creation.'
         )
+
+
+class TestGeoJSON(TestCase):
+    """Compact GeoJSON for the map's markers"""
+
+    def test_point_coordinates(self):
+        """Coordinates should be rounded, and empty points skipped"""
+        eq_(point_coordinates(make_point(1.123456789, -2.5)), (1.12346, -2.5))
+        eq_(
+            point_coordinates({
+                'type': 'Point',
+                'coordinates': [1, 2]
+            }),
+            (1.0, 2.0),
+        )
+        eq_(point_coordinates(''), None)
+        eq_(point_coordinates('not json'), None)
+        eq_(point_coordinates(None), None)
+
+    def test_filter_points(self):
+        """Only points within the bounding box should be kept"""
+        points = [(0, 0, 1), (10, 10, 2), (179, 0, 3), (-179, 0, 4)]
+        eq_(filter_points(points, (-1, -1, 1, 1)), [(0, 0, 1)])
+        eq_(
+            filter_points(points, parse_bbox('170,-1,-170,1')),
+            [(179, 0, 3), (-179, 0, 4)],
+        )
+
+    def test_unwrapped_bbox(self):
+        """Bounding boxes with unwrapped longitudes should be wrapped"""
+        points = [(0, 0, 1), (10, 10, 2), (179, 0, 3), (-179, 0, 4)]
+        # panned east across the antimeridian
+        eq_(
+            filter_points(points, parse_bbox('170,-1,190,1')),
+            [(179, 0, 3), (-179, 0, 4)],
+        )
+        # a copy of the world to the west
+        eq_(
+            filter_points(points, parse_bbox('-361,-1,-359,1')),
+            [(0, 0, 1)],
+        )
+        # zoomed out past the whole world
+        eq_(parse_bbox('-400,-80,400,80'), (-180, -80, 180, 80))
+        eq_(
+            filter_points(points, parse_bbox('-400,-80,400,80')),
+            points,
+        )
+
+    def test_tile_bbox(self):
+        """The whole world should be in the zoom 0 tile"""
+        west, south, east, north = tile_bbox(0, 0, 0)
+        eq_((west, east), (-180, 180))
+        ok_(south < -85 and north > 85)
+        west, south, east, north = tile_bbox(1, 1, 0)
+        eq_((west, south, east), (0, 0, 180))
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestMapLayerView(TestCase):
+    """The map's markers are served as cached GeoJSON"""
+
+    def setUp(self):
+        cache.clear()
+        self.map = Map.objects.create(
+            title='Test map', project=ProjectFactory()
+        )
+        self.marker = Marker.objects.create(
+            map=self.map,
+            foia=FOIARequestFactory(),
+            point=make_point(10, 10),
+        )
+        Marker.objects.create(
+            map=self.map,
+            foia=FOIARequestFactory(),
+            point=make_point(-100, 40),
+        )
+        self.request_factory = RequestFactory()
+        self.kwargs = {'slug': self.map.slug, 'idx': self.map.pk}
+
+    def get_data(self, url_name='map-data', data=None, **kwargs):
+        """Get the map's GeoJSON"""
+        kwargs.update(self.kwargs)
+        request = self.request_factory.get(
+            reverse(url_name, kwargs=kwargs), data
+        )
+        return MapLayerView.as_view()(request, **kwargs)
+
+    def test_get(self):
+        """All of the markers should be returned"""
+        response = self.get_data()
+        eq_(response.status_code, 200)
+        data = json.loads(response.content)
+        eq_(
+            [f['geometry']['coordinates'] for f in data['features']],
+            [[10, 10], [-100, 40]],
+        )
+        eq_(data['features'][0]['properties']['foia'], self.marker.foia_id)
+
+    def test_bbox(self):
+        """Only markers within the bounding box should be returned"""
+        response = self.get_data(data={'bbox': '0,0,20,20'})
+        data = json.loads(response.content)
+        eq_(len(data['features']), 1)
+        response = self.get_data(data={'bbox': 'foo'})
+        eq_(response.status_code, 400)
+
+    def test_tile(self):
+        """Only markers within the tile should be returned"""
+        response = self.get_data('map-data-tile', zoom='1', x='0', y='0')
+        data = json.loads(response.content)
+        eq_(
+            [f['geometry']['coordinates'] for f in data['features']],
+            [[-100, 40]],
+        )
+
+    def test_cache_invalidation(self):
+        """Changing a marker should update the cached GeoJSON"""
+        self.get_data()
+        self.marker.point = make_point(20, 20)
+        self.marker.save()
+        data = json.loads(self.get_data().content)
+        eq_(data['features'][0]['geometry']['coordinates'], [20, 20])
+        self.marker.delete()
+        data = json.loads(self.get_data().content)
+        eq_(len(data['features']), 1)
@@ -20,4 +20,10 @@ urlpatterns = [
         MapLayerView.as_view(),
         name='map-data'
     ),
+    url(
+        r'^(?P<slug>[-\w]+)-(?P<idx>\d+)/data/(?P<zoom>\d+)/(?P<x>\d+)/'
+        r'(?P<y>\d+).geojson$',
+        MapLayerView.as_view(),
+        name='map-data-tile'
+    ),
 ]
@@ -3,16 +3,26 @@ Views for the Map application
 """
 
 # Django
+from django.conf import settings
 from django.contrib.auth.decorators import user_passes_test
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views.generic import DetailView, ListView, View
 
-# Third Party
-from djgeojson.serializers import Serializer as GeoJSONSerializer
+# Standard Library
+import hashlib
 
 # MuckRock
-from muckrock.map.models import Map, Marker
+from muckrock.map.geojson import (
+    filter_points,
+    parse_bbox,
+    tile_bbox,
+    to_geojson,
+)
+from muckrock.map.models import Map
 
 user_can_view_maps = lambda u: u.is_authenticated() and u.profile.experimental
 
@@ -38,16 +48,44 @@ class MapListView(ListView):
 
 
 class MapLayerView(View):
-    """Serializes map data to a GeoJSON file."""
+    """Serializes map data to a GeoJSON file.
+
+    The markers may be limited to those within a `bbox` query parameter,
+    or within a map tile, so the client only fetches the visible markers.
+    """
     http_method_names = ['get']
 
     def get(self, request, *args, **kwargs):
-        """Returns GeoJSON for all the map's markers"""
-        _map = Map.objects.get(id=kwargs['idx'])
-        data = GeoJSONSerializer().serialize(
-            Marker.objects.filter(map=_map),
-            geometry_field='point',
-            use_natural_keys=True,
-            with_modelname=False
-        )
-        return HttpResponse(data, content_type='application/json')
+        """Returns GeoJSON for the map's markers"""
+        _map = get_object_or_404(Map, id=kwargs['idx'])
+        points = _map.get_points()
+        if 'zoom' in kwargs:
+            points = filter_points(
+                points,
+                tile_bbox(
+                    int(kwargs['zoom']),
+                    int(kwargs['x']),
+                    int(kwargs['y']),
+                ),
+            )
+        elif 'bbox' in request.GET:
+            try:
+                points = filter_points(points, parse_bbox(request.GET['bbox']))
+            except ValueError:
+                return HttpResponseBadRequest()
+        data = to_geojson(points)
+
+        etag = quote_etag(hashlib.md5(data).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(data, content_type='application/json')
+        response['ETag'] = etag
+        if _map.private:
+            patch_cache_control(
+                response, private=True, max_age=settings.MAP_DATA_MAX_AGE
+            )
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.MAP_DATA_MAX_AGE
+            )
+        return response
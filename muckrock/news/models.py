@@ -19,6 +19,14 @@ from taggit.managers import TaggableManager
 from muckrock.core.utils import get_image_storage
 from muckrock.foia.models import FOIARequest
 from muckrock.tags.models import TaggedItemBase
+from muckrock.tags.related import get_related_ids, in_order, tag_scores, top_ids
+
+RELATED_ARTICLE_COUNT = 4
+# more related articles than are shown are ranked and cached, as some may
+# be unpublished by the time they are shown
+RELATED_CANDIDATE_COUNT = 20
+# sharing a project counts for about as much as sharing an uncommon tag
+SHARED_PROJECT_WEIGHT = 3.0
 
 
 class ArticleQuerySet(models.QuerySet):
@@ -129,6 +137,43 @@ class Article(models.Model):
 
     get_authors_names.short_description = 'Authors'
 
+    def get_related_articles(self):
+        """Get published articles related to this one, ranked by the tags
+        and projects they share with it"""
+        ids = get_related_ids(self, 'articles', self._rank_related_articles)
+        articles = (
+            Article.objects.get_published().prefetch_authors()
+            .prefetch_editors()
+        )
+        return in_order(articles, ids)[:RELATED_ARTICLE_COUNT]
+
+    def _rank_related_articles(self):
+        """Rank the ids of articles with the same tags as this one, in
+        the same projects as this one, or in projects with the same tags as
+        this one"""
+        # pylint: disable=invalid-name
+        Project = self.projects.model
+        published = Article.objects.get_published().values('pk')
+        project_articles = Project.articles.through.objects.filter(
+            article__in=published
+        )
+        tag_ids = list(self.tags.values_list('pk', flat=True))
+
+        scores = tag_scores(Article, tag_ids, candidates=published)
+        for article_id in (
+            project_articles.filter(project__in=self.projects.all())
+            .values_list('article_id', flat=True)
+        ):
+            scores[article_id] += SHARED_PROJECT_WEIGHT
+        project_scores = tag_scores(Project, tag_ids)
+        for article_id, project_id in (
+            project_articles.filter(project__in=project_scores.keys())
+            .values_list('article_id', 'project_id')
+        ):
+            scores[article_id] += project_scores[project_id]
+        scores.pop(self.pk, None)
+        return top_ids(scores, RELATED_CANDIDATE_COUNT)
+
     class Meta:
         ordering = ['-pub_date']
         get_latest_by = 'pub_date'
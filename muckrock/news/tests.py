@@ -60,6 +60,28 @@ class TestNewsUnit(TestCase):
         ok_(all(a.publish and a.pub_date <= timezone.now() for a in published))
         eq_(published.count(), 2)
 
+    def test_get_related_articles(self):
+        """Published articles sharing tags or projects should be related,
+        with those sharing rarer tags ranked first"""
+        self.article.tags.add('common', 'rare')
+        common = ArticleFactory(publish=True)
+        common.tags.add('common')
+        rare = ArticleFactory(publish=True)
+        rare.tags.add('rare')
+        in_project = ArticleFactory(publish=True)
+        ProjectFactory().articles.add(self.article, in_project)
+        draft = ArticleFactory(publish=False)
+        draft.tags.add('common')
+        ArticleFactory(publish=True).tags.add('other', 'common')
+        ArticleFactory(publish=True).tags.add('other')
+        ArticleFactory(publish=True)
+        related = self.article.get_related_articles()
+        eq_(related[:2], [in_project, rare])
+        ok_(common in related)
+        ok_(draft not in related)
+        ok_(self.article not in related)
+        eq_(len(related), 4)
+
     def test_manager_get_drafts(self):
         """Test the Article Manager's get_drafts method"""
         drafted = Article.objects.get_drafts()
@@ -6,7 +6,7 @@ Views for the news application
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch
 from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import TemplateView
@@ -49,19 +49,7 @@ class NewsDetail(DateDetailView):
 
     def get_related_articles(self, article):
         """Get articles related to the current one."""
-        # articles in the same project as this one
-        project_filter = Q(projects__in=article.projects.all())
-        # articles with the same tag as this one
-        tag_filter = Q(tags__in=article.tags.all())
-        # articles in projects with the same tag as this one
-        project_tag_filter = Q(projects__tags__in=article.tags.all())
-        related_articles = (
-            Article.objects.get_published()
-            .filter(project_filter | tag_filter | project_tag_filter)
-            .exclude(pk=article.pk).distinct().prefetch_authors()
-            .prefetch_editors()
-        )
-        return related_articles[:4]
+        return article.get_related_articles()
 
     def get_context_data(self, **kwargs):
         context = super(NewsDetail, self).get_context_data(**kwargs)
@@ -8,6 +8,7 @@ from django.contrib.auth.models import User
 from django.core.mail import EmailMessage
 from django.core.urlresolvers import reverse
 from django.db import models, transaction
+from django.db.models import F, Q
 from django.template.loader import render_to_string
 from django.utils.text import slugify
 
@@ -19,6 +20,7 @@ from datetime import date
 import stripe
 
 # MuckRock
+from muckrock.accounts.models import RequestCredit, reset_due
 from muckrock.core.utils import stripe_retry_on_error
 
 logger = logging.getLogger(__name__)
@@ -55,30 +57,54 @@ class Organization(models.Model):
         """The url for this object"""
         return reverse('org-detail', kwargs={'slug': self.slug})
 
-    def restore_requests(self):
-        """Restore the number of requests credited to the org."""
-        if self.active:
+    def get_requests(self):
+        """Get the number of requests left for this month
+        This does not lock or write to the organization - if the requests
+        have not been restored yet this month, it is what they will be
+        restored to"""
+        if self.active and reset_due(self.date_update):
+            return self.monthly_requests
+        return self.num_requests
+
+    def reset_requests(self):
+        """Restore the number of requests credited to the org, if they have
+        not been restored yet this month.  The caller must hold a lock on
+        the organization and save it."""
+        if self.active and reset_due(self.date_update):
+            RequestCredit.objects.record(
+                self.monthly_requests - self.num_requests,
+                'org',
+                'reset',
+                organization=self,
+            )
             self.date_update = date.today()
             self.num_requests = self.monthly_requests
-            self.save()
 
-    def get_requests(self):
-        """
-        Get the number of requests left for this month.
-        Before doing so, restore the org's requests if they have not
-        been restored for this month, or ever.
-        """
+    @classmethod
+    def reset_all_requests(cls):
+        """Restore the requests of every active organization which has not
+        been restored yet this month"""
+        today = date.today()
         with transaction.atomic():
-            org = Organization.objects.select_for_update().get(pk=self.pk)
-            today = date.today()
-            if org.date_update:
-                not_this_month = org.date_update.month != today.month
-                not_this_year = org.date_update.year != today.year
-                if not_this_month or not_this_year:
-                    org.restore_requests()
-            else:
-                org.restore_requests()
-            return org.num_requests
+            orgs = cls.objects.select_for_update().filter(
+                Q(date_update__lt=today.replace(day=1))
+                | Q(date_update=None),
+                active=True,
+            )
+            RequestCredit.objects.bulk_create(
+                RequestCredit(
+                    organization_id=pk,
+                    kind='org',
+                    amount=monthly_requests - num_requests,
+                    reason='reset',
+                ) for pk, monthly_requests, num_requests in orgs.values_list(
+                    'pk', 'monthly_requests', 'num_requests'
+                ) if monthly_requests != num_requests
+            )
+            orgs.update(
+                num_requests=F('monthly_requests'),
+                date_update=today,
+            )
 
     def is_owned_by(self, user):
         """Returns true IFF the passed-in user is the owner of the org"""
@@ -207,6 +233,12 @@ class Organization(models.Model):
         with transaction.atomic():
             org = Organization.objects.select_for_update().get(pk=self.pk)
             org.update_num_seats(num_seats)
+            RequestCredit.objects.record(
+                org.monthly_requests - org.num_requests,
+                'org',
+                'plan',
+                organization=org,
+            )
             org.num_requests = org.monthly_requests
             org.stripe_id = subscription.id
             org.active = True
@@ -258,6 +290,12 @@ class Organization(models.Model):
             # if it goes up, let it go up. if it goes down, don't let it go down
             if new_monthly_requests > old_monthly_requests:
                 org.num_requests += new_monthly_requests - old_monthly_requests
+                RequestCredit.objects.record(
+                    new_monthly_requests - old_monthly_requests,
+                    'org',
+                    'plan',
+                    organization=org,
+                )
             org.save()
         return subscription
 
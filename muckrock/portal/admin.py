@@ -3,6 +3,7 @@
 
 # Django
 from django.contrib import admin
+from django.utils.html import format_html_join
 
 # Third Party
 from reversion.admin import VersionAdmin
@@ -16,6 +17,18 @@ class PortalAdmin(VersionAdmin):
     search_fields = ['name', 'url']
     list_display = ['name', 'url', 'type']
     list_filter = ['type', 'status']
+    readonly_fields = ['routing_hits']
+
+    def routing_hits(self, obj):
+        """How many incoming messages have matched each routing rule for
+        this type of portal"""
+        if not hasattr(obj.portal_type, 'get_router'):
+            return 'This portal type does not route incoming messages'
+        return format_html_join(
+            '\n',
+            '<div>{}: {}</div>',
+            obj.portal_type.get_router().hit_counts(),
+        )
 
 
 admin.site.register(Portal, PortalAdmin)
@@ -5,14 +5,15 @@ Shared logic for handling automated portal processing
 # Django
 from django.utils import timezone
 
-# Standard Library
-import re
-
 # MuckRock
 from muckrock.communication.models import PortalCommunication
+from muckrock.core.routing import Router
 from muckrock.foia.tasks import classify_status
 from muckrock.task.models import ResponseTask
 
+# compiled routers for each portal type
+_routers = {}
+
 
 class PortalAutoReceiveMixin(object):
     """
@@ -22,21 +23,20 @@ class PortalAutoReceiveMixin(object):
 
     error_msg = 'Did not know how to handle'
 
-    def __init__(self, *args, **kwargs):
-        """Initialize the router"""
-        self._router = [(re.compile(pattern), getattr(self, method))
-                        for pattern, method in self.router]
-        super(PortalAutoReceiveMixin, self).__init__(*args, **kwargs)
+    @classmethod
+    def get_router(cls):
+        """Get the compiled router for this portal type
+        It is compiled once per process, on first use"""
+        if cls not in _routers:
+            _routers[cls] = Router('portal:{}'.format(cls.__name__), cls.router)
+        return _routers[cls]
 
     def receive_msg(self, comm, **kwargs):
         """Route incoming messages"""
         # pylint: disable=unused-argument
-
-        for pattern, handler in self._router:
-            match = pattern.search(comm.subject)
-            if match:
-                handler(comm, **match.groupdict())
-                break
+        method, match = self.get_router().match(comm.subject)
+        if method is not None:
+            getattr(self, method)(comm, **match.groupdict())
         else:
             super(PortalAutoReceiveMixin, self).receive_msg(
                 comm,
@@ -4,6 +4,7 @@ Logic for interacting with NextRequest portals automatically
 """
 
 # Django
+from django.conf import settings
 from django.template.defaultfilters import linebreaks
 from django.utils import timezone
 
@@ -12,6 +13,7 @@ import json
 import re
 import time
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 # Third Party
 import requests
@@ -24,6 +26,7 @@ from muckrock.foia.models import FOIACommunication
 from muckrock.portal.exceptions import PortalError
 from muckrock.portal.portals.automated import PortalAutoReceiveMixin
 from muckrock.portal.portals.manual import ManualPortal
+from muckrock.portal.sessions import get_session
 from muckrock.portal.tasks import portal_task
 from muckrock.task.models import PortalTask, SnailMailTask
 
@@ -186,8 +189,7 @@ class NextRequestPortal(PortalAutoReceiveMixin, ManualPortal):
         comm = FOIACommunication.objects.get(pk=comm_pk)
         try:
             request_id = self._get_request_id(comm)
-            session = requests.Session()
-            self._login(comm, session)
+            session = self._get_session(comm)
             csrf_token = self._get_csrf_token(
                 session,
                 ['requests', comm.foia.current_tracking_id()],
@@ -360,8 +362,7 @@ class NextRequestPortal(PortalAutoReceiveMixin, ManualPortal):
             if first_comm.files.exists():
                 try:
                     request_id = self._get_request_id(first_comm)
-                    session = requests.Session()
-                    self._login(first_comm, session)
+                    session = self._get_session(first_comm)
                     self._send_documents(first_comm, session, request_id)
                 except PortalError as exc:
                     PortalTask.objects.create(
@@ -433,8 +434,7 @@ class NextRequestPortal(PortalAutoReceiveMixin, ManualPortal):
         """Download the documents in a task"""
         comm = FOIACommunication.objects.get(pk=comm_pk)
         try:
-            session = requests.Session()
-            self._login(comm, session)
+            session = self._get_session(comm)
             reply = self._get(
                 session,
                 furl(self.portal.url
@@ -446,25 +446,24 @@ class NextRequestPortal(PortalAutoReceiveMixin, ManualPortal):
                 d.strip('- \r') for d in documents.split('\n') if d.strip()
             ]
             soup = BeautifulSoup(reply.content, 'lxml')
-            for document in documents:
-                href = self._find_tag_attr(
-                    soup,
-                    {
-                        'name': 'a',
-                        'class': 'document-link',
-                        'string': document,
-                    },
-                    'href',
-                    'Attempting to find the document: {}'.format(document),
-                )
-                url = furl(self.portal.url).add(path=href)
-                reply = self._get(
-                    session,
-                    url,
-                    'Downloading document: {}'.format(document),
-                )
+            urls = [
+                furl(self.portal.url).add(
+                    path=self._find_tag_attr(
+                        soup,
+                        {
+                            'name': 'a',
+                            'class': 'document-link',
+                            'string': document,
+                        },
+                        'href',
+                        'Attempting to find the document: {}'.format(document),
+                    )
+                ) for document in documents
+            ]
+            contents = self._download_documents(session, documents, urls)
+            for document, content in zip(documents, contents):
                 comm.attach_file(
-                    content=reply.content,
+                    content=content,
                     name=document,
                     source=self.portal.name,
                 )
@@ -476,6 +475,28 @@ class NextRequestPortal(PortalAutoReceiveMixin, ManualPortal):
                 reason=exc.args[0],
             )
 
+    def _download_documents(self, session, documents, urls):
+        """Download the documents concurrently, with up to
+        PORTAL_DOWNLOAD_CONCURRENCY downloads at once from the portal"""
+
+        def download(args):
+            """Download a single document"""
+            document, url = args
+            return self._get(
+                session,
+                url,
+                'Downloading document: {}'.format(document),
+            ).content
+
+        pool = ThreadPool(
+            max(min(settings.PORTAL_DOWNLOAD_CONCURRENCY, len(urls)), 1)
+        )
+        try:
+            return pool.map(download, zip(documents, urls))
+        finally:
+            pool.close()
+            pool.join()
+
     def status_update(self, comm, status):
         """A status update message"""
         self._accept_comm(
@@ -561,6 +582,23 @@ class NextRequestPortal(PortalAutoReceiveMixin, ManualPortal):
             'Attempting to get CSRF token',
         )
 
+    def _get_session(self, comm):
+        """Get a logged in session for the request's portal account,
+        shared with any other tasks for the same account"""
+        return get_session(
+            self.portal,
+            comm.foia.get_request_email(),
+            lambda session: self._login(comm, session),
+            self._is_signed_out,
+        )
+
+    def _is_signed_out(self, reply):
+        """Has the portal signed out the session this reply is for?"""
+        return reply.status_code == 401 or (
+            bool(reply.history)
+            and furl(reply.url).path.segments[-2:] == ['users', 'sign_in']
+        )
+
     def _login(self, comm, session):
         """Login to the portal"""
         csrf_token = self._get_csrf_token(session, 'users/sign_in')
@@ -0,0 +1,130 @@
+"""
+Persistent sessions for automated portal accounts
+
+Logging in to a portal costs several requests, so sessions are shared
+between tasks instead of logging in for every task.  Each worker keeps a
+small pool of open sessions, and their cookies are stored in the cache so
+that a login made by one worker may be reused by the others.  When the
+portal signs a session out, it logs back in and retries the request.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+
+# Standard Library
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Third Party
+import requests
+
+SESSION_CACHE_KEY = 'portal:{}:session:{}'
+
+# per process pool of open sessions, least recently used first
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+class PortalSession(requests.Session):
+    """A session for a single portal account
+
+    `login` is called with the session to log in, and `is_signed_out` is
+    called with each reply to check if the portal has signed us out
+    """
+
+    def __init__(self, cache_key, login, is_signed_out):
+        super(PortalSession, self).__init__()
+        self.cache_key = cache_key
+        self.login = login
+        self.is_signed_out = is_signed_out
+        # documents may be downloaded from several threads at once,
+        # so only one of them should log back in
+        self._login_lock = threading.Lock()
+        self._login_count = 0
+        self._local = threading.local()
+
+    def request(self, method, url, *args, **kwargs):
+        """Make a request, logging back in and retrying once if the portal
+        has signed us out"""
+        # pylint: disable=arguments-differ
+        login_count = self._login_count
+        reply = super(PortalSession, self).request(method, url, *args, **kwargs)
+        if (
+            not getattr(self._local, 'logging_in', False)
+            and self.is_signed_out(reply)
+        ):
+            self.log_in(login_count)
+            reply = super(PortalSession,
+                          self).request(method, url, *args, **kwargs)
+        if reply.cookies:
+            self.save_cookies()
+        return reply
+
+    def log_in(self, login_count=None):
+        """Log in to the portal and store the new cookies
+        If another thread has logged in since `login_count` was read,
+        its login is used instead"""
+        with self._login_lock:
+            if login_count is not None and login_count != self._login_count:
+                return
+            self.cookies.clear()
+            self._local.logging_in = True
+            try:
+                self.login(self)
+            finally:
+                self._local.logging_in = False
+            self._login_count += 1
+            self.save_cookies()
+
+    def load_cookies(self):
+        """Load the cookies from a previous login, if there are any"""
+        cookies = cache.get(self.cache_key)
+        if cookies is None:
+            return False
+        self.cookies.update(cookies)
+        return True
+
+    def save_cookies(self):
+        """Store the cookies so other workers may reuse this login"""
+        cache.set(
+            self.cache_key,
+            self.cookies,
+            settings.PORTAL_SESSION_TIMEOUT,
+        )
+
+    def clear(self):
+        """Clear the stored cookies, so the next use logs in again"""
+        self.cookies.clear()
+        cache.delete(self.cache_key)
+
+
+def get_session(portal, account, login, is_signed_out):
+    """Get a logged in session for the account on the portal"""
+    account_hash = hashlib.sha1(account.encode('utf8')).hexdigest()
+    cache_key = SESSION_CACHE_KEY.format(portal.pk, account_hash)
+    with _sessions_lock:
+        session = _sessions.pop(cache_key, None)
+        new = session is None
+        if new:
+            session = PortalSession(cache_key, login, is_signed_out)
+        else:
+            # the login may depend on the caller's state, so always use
+            # the newest one
+            session.login = login
+        _sessions[cache_key] = session
+        while len(_sessions) > settings.PORTAL_SESSION_POOL_SIZE:
+            _, old_session = _sessions.popitem(last=False)
+            old_session.close()
+    if new and not session.load_cookies():
+        session.log_in()
+    return session
+
+
+def clear_sessions():
+    """Close all of the open sessions in this process"""
+    with _sessions_lock:
+        while _sessions:
+            _, session = _sessions.popitem()
+            session.close()
@@ -18,6 +18,7 @@ from nose.tools import assert_false, eq_, ok_
 from muckrock.foia.factories import FOIACommunicationFactory
 from muckrock.foia.models.communication import FOIACommunication
 from muckrock.portal.models import Portal
+from muckrock.portal.sessions import clear_sessions
 from muckrock.task.models import PortalTask
 
 
@@ -70,6 +71,7 @@ class TestNextRequestPortal(TestCase):
             name='Test Portal',
             type='nextrequest',
         )
+        clear_sessions()
 
     def test_confirm_open(self):
         """Test receiving a confirmation message"""
@@ -133,6 +135,96 @@ class TestNextRequestPortal(TestCase):
         assert_false(comm.hidden)
         eq_(comm.foia.date_estimate, date(2018, 3, 16))
 
+    def _mock_portal(self, mock_requests, request_page):
+        """Set up a fake NextRequest server"""
+        mock_requests.get(
+            'https://www.example.com/users/sign_in',
+            text='<meta name="csrf-token" content="token">',
+        )
+        mock_requests.post(
+            'https://www.example.com/users/sign_in',
+            text='<span class="notice">Signed in successfully.</span>',
+        )
+        mock_requests.get('https://www.example.com/requests/17-1', request_page)
+        mock_requests.get(
+            'https://www.example.com/documents/1',
+            text='File 1 Content',
+        )
+        mock_requests.get(
+            'https://www.example.com/documents/2',
+            text='File 2 Content',
+        )
+
+    @patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+    @patch('muckrock.foia.tasks.classify_status.apply_async')
+    def test_document_reply_task(self, mock_classify, mock_upload):
+        """Documents should be downloaded, logging in only once for
+        several tasks"""
+        # pylint: disable=unused-argument
+        page = [{
+            'text':
+                '<a class="document-link" href="documents/1">file1.pdf</a>'
+                '<a class="document-link" href="documents/2">file2.pdf</a>'
+        }]
+        comm = FOIACommunicationFactory(foia__status='processed')
+        comm.foia.add_tracking_id('17-1')
+        other_comm = FOIACommunicationFactory(foia=comm.foia)
+        with requests_mock.Mocker() as mock_requests:
+            self._mock_portal(mock_requests, page)
+            for comm_ in (comm, other_comm):
+                self.portal.portal_type.document_reply_task(
+                    comm_.pk,
+                    'file1.pdf\nfile2.pdf',
+                    'Documents have been released',
+                )
+            logins = [
+                r for r in mock_requests.request_history
+                if r.method == 'POST' and r.path == '/users/sign_in'
+            ]
+        eq_(len(logins), 1)
+        for comm_ in (comm, other_comm):
+            files = comm_.files.order_by('pk')
+            eq_(files.count(), 2)
+            eq_(files[0].ffile.read(), 'File 1 Content')
+            eq_(files[1].ffile.read(), 'File 2 Content')
+
+    @patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+    @patch('muckrock.foia.tasks.classify_status.apply_async')
+    def test_session_expired(self, mock_classify, mock_upload):
+        """An expired session should log back in and retry"""
+        # pylint: disable=unused-argument
+        link = '<a class="document-link" href="documents/1">file1.pdf</a>'
+        page = [
+            {
+                'text': link
+            },
+            {
+                'status_code': 302,
+                'headers': {
+                    'Location': 'https://www.example.com/users/sign_in'
+                },
+            },
+            {
+                'text': link
+            },
+        ]
+        comm = FOIACommunicationFactory(foia__status='processed')
+        comm.foia.add_tracking_id('17-1')
+        with requests_mock.Mocker() as mock_requests:
+            self._mock_portal(mock_requests, page)
+            for _ in range(2):
+                self.portal.portal_type.document_reply_task(
+                    comm.pk,
+                    'file1.pdf',
+                    'A document has been released',
+                )
+            logins = [
+                r for r in mock_requests.request_history
+                if r.method == 'POST' and r.path == '/users/sign_in'
+            ]
+        eq_(len(logins), 2)
+        eq_(comm.files.count(), 2)
+
 
 class TestFBIPortal(TestCase):
     """Test cases for the FBI portal integration"""
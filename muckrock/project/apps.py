@@ -15,6 +15,7 @@ class ProjectConfig(AppConfig):
         # pylint: disable=invalid-name
         from actstream import registry as action
         from watson import search
+        import muckrock.project.signals  # pylint: disable=unused-import,unused-variable
         Project = self.get_model('Project')
         action.register(Project)
         search.register(Project.objects.get_public())
@@ -18,8 +18,11 @@ from muckrock.core.utils import get_image_storage
 from muckrock.crowdfund.models import Crowdfund
 from muckrock.foia.models import FOIARequest
 from muckrock.news.models import Article
+from muckrock.tags.related import get_related_ids, in_order, tag_scores, top_ids
 from muckrock.task.models import ProjectReviewTask
 
+SUGGESTION_COUNT = 10
+
 
 class ProjectQuerySet(models.QuerySet):
     """Object manager for projects"""
@@ -201,24 +204,45 @@ class Project(models.Model):
         return self.crowdfunds.filter(closed=False)
 
     def suggest_requests(self):
-        """Returns a list of requests that may be related to this project."""
-        requests = list(
+        """Returns a list of requests that may be related to this project,
+        ranked by the tags they share with it."""
+        ids = get_related_ids(self, 'requests', self._rank_requests)
+        return in_order(FOIARequest.objects.all(), ids)
+
+    def _rank_requests(self):
+        """Rank the ids of requests by the project's contributors with the
+        project's tags"""
+        candidates = (
             FOIARequest.objects.filter(
-                composer__user__in=self.contributors.all(),
-                tags__name__in=self.tags.names()
-            ).exclude(projects=self)
+                composer__user__in=self.contributors.all()
+            ).exclude(projects=self).values('pk')
+        )
+        return top_ids(
+            tag_scores(FOIARequest, self._tag_ids(), candidates),
+            SUGGESTION_COUNT,
         )
-        return requests
 
     def suggest_articles(self):
-        """Returns a list of articles that may be related to this project."""
-        articles = list(
-            Article.objects.filter(
-                authors__in=self.contributors.all(),
-                tags__name__in=self.tags.names(),
-            ).exclude(projects=self)
+        """Returns a list of articles that may be related to this project,
+        ranked by the tags they share with it."""
+        ids = get_related_ids(self, 'articles', self._rank_articles)
+        return in_order(Article.objects.all(), ids)
+
+    def _rank_articles(self):
+        """Rank the ids of articles by the project's contributors with the
+        project's tags"""
+        candidates = (
+            Article.objects.filter(authors__in=self.contributors.all())
+            .exclude(projects=self).values('pk')
+        )
+        return top_ids(
+            tag_scores(Article, self._tag_ids(), candidates),
+            SUGGESTION_COUNT,
         )
-        return articles
+
+    def _tag_ids(self):
+        """The ids of the project's tags"""
+        return list(self.tags.values_list('pk', flat=True))
 
     def publish(self, notes):
         """Publishing a project sets it public and returns a ProjectReviewTask."""
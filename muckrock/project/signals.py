@@ -0,0 +1,38 @@
+"""Model signal handlers for the project application"""
+
+# Django
+from django.db.models.signals import m2m_changed
+
+# MuckRock
+from muckrock.project.models import Project
+from muckrock.tags.related import invalidate_related
+
+
+def related_content_changed(sender, instance, action, model, pk_set, **kwargs):
+    """Invalidate the cached suggestions on both sides when a project's
+    contributors, requests or articles change"""
+    # pylint: disable=unused-argument
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    invalidate_related(type(instance), instance.pk)
+    if pk_set:
+        invalidate_related(model, *pk_set)
+
+
+m2m_changed.connect(
+    related_content_changed,
+    sender=Project.contributors.through,
+    dispatch_uid='muckrock.project.signals.contributors_changed',
+)
+
+m2m_changed.connect(
+    related_content_changed,
+    sender=Project.requests.through,
+    dispatch_uid='muckrock.project.signals.requests_changed',
+)
+
+m2m_changed.connect(
+    related_content_changed,
+    sender=Project.articles.through,
+    dispatch_uid='muckrock.project.signals.articles_changed',
+)
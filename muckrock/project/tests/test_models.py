@@ -152,6 +152,22 @@ class TestProject(TestCase):
         self.project.requests.add(test_request)
         ok_(test_request not in self.project.suggest_requests())
 
+    def test_suggest_requests_ranked(self):
+        """Requests sharing rarer tags with the project should be suggested
+        first"""
+        user = UserFactory()
+        self.project.contributors.add(user)
+        self.project.tags.add(u'common', u'rare')
+        common_request = FOIARequestFactory(composer__user=user)
+        common_request.tags.add(u'common')
+        rare_request = FOIARequestFactory(composer__user=user)
+        rare_request.tags.add(u'rare')
+        FOIARequestFactory().tags.add(u'common')
+        eq_(
+            self.project.suggest_requests(),
+            [rare_request, common_request],
+        )
+
     def test_suggest_articles(self):
         """
         Projects should recommend articles to be added to them.
@@ -287,6 +287,9 @@ CELERY_IMPORTS = (
     'muckrock.portal.tasks',
     'muckrock.dataset.tasks',
     'muckrock.crowdsource.tasks',
+    'muckrock.core.tasks',
+    'muckrock.map.tasks',
+    'muckrock.tags.tasks',
 )
 CELERYD_MAX_TASKS_PER_CHILD = os.environ.get('CELERYD_MAX_TASKS_PER_CHILD', 100)
 CELERYD_TASK_TIME_LIMIT = os.environ.get('CELERYD_TASK_TIME_LIMIT', 5 * 60)
@@ -294,6 +297,9 @@ CELERY_ROUTES = {
     'muckrock.foia.tasks.send_fax': {
         'queue': 'phaxio'
     },
+    'muckrock.foia.tasks.dispatch_faxes': {
+        'queue': 'phaxio'
+    },
 }
 
 AUTHENTICATION_BACKENDS = (
@@ -443,6 +449,15 @@ PHAXIO_KEY = os.environ.get('PHAXIO_KEY')
 PHAXIO_SECRET = os.environ.get('PHAXIO_SECRET')
 PHAXIO_BATCH_DELAY = os.environ.get('PHAXIO_BATCH_DELAY', 300)
 PHAXIO_CALLBACK_TOKEN = os.environ.get('PHAXIO_CALLBACK_TOKEN')
+# use a fake Phaxio client which records faxes instead of sending them
+PHAXIO_FAKE = boolcheck(os.environ.get('PHAXIO_FAKE', False))
+# faxes sent per minute by the dispatcher - it starts at PHAXIO_RATE and
+# adapts between the min and max depending on the responses from Phaxio
+PHAXIO_RATE = 15
+PHAXIO_MIN_RATE = 1
+PHAXIO_MAX_RATE = 30
+# how many times to try sending a fax to the Phaxio API before giving up
+PHAXIO_MAX_ATTEMPTS = 5
 
 SLACK_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL', '')
 
@@ -475,6 +490,35 @@ CACHES = {
     }
 }
 DEFAULT_CACHE_TIMEOUT = 15 * 60
+# stale values are served for this long while one worker recomputes them
+CACHE_STALE_TIMEOUT = 5 * 60
+# how long a worker may hold the lock to recompute a value
+CACHE_LOCK_TIMEOUT = 30
+# how long to wait for another worker to compute a missing value
+CACHE_LOCK_WAIT = 1
+# timeouts are randomly adjusted by up to this fraction
+CACHE_TIMEOUT_JITTER = 0.1
+# rendered feeds are cleared when their requests change, this limits how
+# stale they may get from other changes
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# pages of data set data are cached until the data set's version changes
+DATASET_DATA_CACHE_TIMEOUT = 24 * 60 * 60
+# how long browsers and the CDN may serve a page of data before checking
+# its ETag with us
+DATASET_DATA_MAX_AGE = 5 * 60
+
+# the locations of a map's markers are cached until a marker changes
+MAP_POINTS_CACHE_TIMEOUT = 24 * 60 * 60
+# how long browsers and the CDN may serve a map's GeoJSON
+MAP_DATA_MAX_AGE = 5 * 60
+
+# the weights of tags, used to rank related content, are refreshed in the
+# background whenever tags change
+RELATED_TAG_WEIGHTS_CACHE_TIMEOUT = 24 * 60 * 60
+# suggestions are invalidated when the object's own tags change, and
+# otherwise pick up new related content after this long
+RELATED_CONTENT_CACHE_TIMEOUT = 60 * 60
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
@@ -601,6 +645,36 @@ ALLOWED_FILE_EXTS = [
     'txt',
 ]
 
+# background CSV exports of request lists
+EXPORT_CSV_BATCH_SIZE = 2000
+EXPORT_CSV_REUSE_HOURS = 24
+EXPORT_CSV_EXPIRE_DAYS = 7
+# exports are stored privately, and downloaded through links signed for
+# this many seconds
+EXPORT_CSV_URL_EXPIRE = 5 * 60
+
+# crowdsource data imports
+CROWDSOURCE_BULK_SIZE = 1000
+CROWDSOURCE_DOCCLOUD_BATCH_SIZE = 25
+
+# cloned request files reference the original's stored file instead of
+# copying it
+CLONE_FILES_BY_REFERENCE = True
+
+# outbound email attachments - files past the size budget are sent as links
+# instead, which stay valid for the given number of days
+EMAIL_ATTACHMENT_MAX_SIZE = 15 * 1024 * 1024
+EMAIL_ATTACHMENT_LINK_DAYS = 30
+# how many bytes of a text attachment to sample to detect its encoding
+EMAIL_CHARSET_SAMPLE_SIZE = 64 * 1024
+
+# automated portal sessions are shared between tasks - how long to keep their
+# cookies, and how many open sessions each worker keeps
+PORTAL_SESSION_TIMEOUT = 12 * 60 * 60
+PORTAL_SESSION_POOL_SIZE = 50
+# how many documents to download from a portal at once
+PORTAL_DOWNLOAD_CONCURRENCY = 4
+
 # for django-phonenumber-field
 PHONENUMBER_DB_FORMAT = 'INTERNATIONAL'
 PHONENUMBER_DEFAULT_REGION = 'US'
@@ -620,6 +694,9 @@ DASHING = {
     'PERMISSION_CLASSES': ('dashing.permissions.IsAdminUser',)
 }
 
+# the dashboard is served from a snapshot, refreshed every minute
+DASHBOARD_SNAPSHOT_TIMEOUT = 2 * 60
+
 CONSTANCE_BACKEND = 'constance.backends.database.DatabaseBackend'
 CONSTANCE_CONFIG = OrderedDict([
     ('ENABLE_FOLLOWUP', (True, 'Enable automated followups')),
@@ -77,4 +77,27 @@ if 'MEMCACHIER_SERVERS' in os.environ:
         }
     }
 
+    if boolcheck(os.environ.get('USE_TWO_TIER_CACHE', False)):
+        # keep recently read values in each worker, in front of memcached
+        CACHES['shared'] = CACHES['default']
+        CACHES['default'] = {
+            'BACKEND': 'muckrock.core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'TIMEOUT': None,
+            'OPTIONS': {
+                'LOCAL_TIMEOUT': 5,
+                'LOCAL_MAX_ENTRIES': 1000,
+                'CHECK_INTERVAL': 1,
+                # only values shared by every user and read far more often
+                # than they are written, as each write clears every
+                # worker's local values
+                'LOCAL_PREFIXES': (
+                    'caching:sb:broadcast:',
+                    'caching:hp:',
+                    'template.cache.homepage_',
+                    'template.cache.dropdown_recent_articles.',
+                ),
+            },
+        }
+
 CONSTANCE_DATABASE_CACHE_BACKEND = 'default'
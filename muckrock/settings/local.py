@@ -57,6 +57,9 @@ DEBUG_TOOLBAR_CONFIG = {
 
 EMAIL_PORT = 1025
 
+# record faxes instead of sending them
+PHAXIO_FAKE = True
+
 QUERYCOUNT = {
     'DISPLAY_DUPLICATES': 10,
 }
@@ -51,3 +51,5 @@ warnings.filterwarnings(
     RuntimeWarning,
     r'django\.db\.models\.fields',
 )
+
+PHAXIO_FAKE = True
@@ -79,7 +79,7 @@ def sidebar_broadcast(user):
     except Profile.DoesNotExist:
         user_class = 'anonymous'
     return cache_get_or_set(
-        'sb:%s:broadcast' % user_class, load_broadcast(user_class),
+        'sb:broadcast:%s' % user_class, load_broadcast(user_class),
         settings.DEFAULT_CACHE_TIMEOUT
     )
 
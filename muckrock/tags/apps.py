@@ -11,8 +11,10 @@ class TagConfig(AppConfig):
     name = 'muckrock.tags'
 
     def ready(self):
-        """Registers the application with the watson plugin"""
+        """Registers the application with the watson plugin and connects
+        the signal handlers"""
         # pylint: disable=invalid-name
         from watson import search
+        import muckrock.tags.signals  # pylint: disable=unused-import,unused-variable
         Tag = self.get_model('Tag')
         search.register(Tag)
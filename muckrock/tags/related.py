@@ -0,0 +1,133 @@
+"""
+Related content suggestions
+
+Objects are related by the tags they share, with each tag weighted by how
+rarely it is used, so sharing a rare tag counts for more than sharing a
+common one.  The weights of every tag are computed from all of the tagged
+objects and cached as an index, which is refreshed in the background when
+tags change.
+
+Suggestions are ranked from the `(object_id, tag_id)` rows of the tagged
+items, so only the top ranked objects are ever loaded, and the ranked ids
+are cached under the object's related tag, which is invalidated when the
+object's own tags change.
+"""
+
+# Django
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+# Standard Library
+import math
+from collections import Counter
+
+# MuckRock
+from muckrock.core import caching
+from muckrock.tags.models import TaggedItemBase
+
+WEIGHTS_CACHE_KEY = 'related:tag_weights'
+WEIGHTS_QUEUED_KEY = 'related:tag_weights_queued'
+RELATED_CACHE_KEY = 'related:{}:{}:{}'
+RELATED_CACHE_TAG = 'related:{}:{}'
+
+
+def compute_tag_weights():
+    """Weight each tag by the inverse of how many objects use it"""
+    total = (
+        TaggedItemBase.objects.values('content_type_id', 'object_id')
+        .distinct().count()
+    )
+    counts = (
+        TaggedItemBase.objects.order_by().values_list('tag_id')
+        .annotate(count=Count('pk'))
+    )
+    return {
+        tag_id: 1.0 + math.log(float(total) / count)
+        for tag_id, count in counts
+    }
+
+
+def get_tag_weights():
+    """Get the weight of each tag, from the cache if possible"""
+    return caching.get_or_set(
+        WEIGHTS_CACHE_KEY,
+        compute_tag_weights,
+        settings.RELATED_TAG_WEIGHTS_CACHE_TIMEOUT,
+    )
+
+
+def refresh_tag_weights():
+    """Recompute the cached tag weights"""
+    return caching.refresh(
+        WEIGHTS_CACHE_KEY,
+        compute_tag_weights,
+        settings.RELATED_TAG_WEIGHTS_CACHE_TIMEOUT,
+    )
+
+
+def queue_tag_weights_refresh():
+    """Refresh the tag weights in the background, once the current
+    transaction commits, unless a refresh is already queued"""
+    from muckrock.tags.tasks import refresh_related_tag_weights
+    if cache.add(WEIGHTS_QUEUED_KEY, True, 5 * 60):
+        transaction.on_commit(refresh_related_tag_weights.delay)
+
+
+def related_cache_tag(content_type_id, object_id):
+    """The tag for cached suggestions for an object"""
+    return RELATED_CACHE_TAG.format(content_type_id, object_id)
+
+
+def invalidate_related(model, *pks):
+    """Invalidate the cached suggestions for the model's objects"""
+    content_type_id = ContentType.objects.get_for_model(model).pk
+    caching.invalidate_tags(
+        *[related_cache_tag(content_type_id, pk) for pk in pks]
+    )
+
+
+def tag_scores(model, tag_ids, candidates=None):
+    """Score the model's objects by the total weight of the given tags
+    they have.  `candidates` may be a queryset of the model's primary keys
+    to limit which objects are scored."""
+    weights = get_tag_weights()
+    items = TaggedItemBase.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        tag_id__in=tag_ids,
+    )
+    if candidates is not None:
+        items = items.filter(object_id__in=candidates)
+    scores = Counter()
+    for object_id, tag_id in items.values_list('object_id', 'tag_id'):
+        scores[object_id] += weights.get(tag_id, 1.0)
+    return scores
+
+
+def top_ids(scores, limit):
+    """The ids with the highest scores, with ties going to the newest"""
+    ranked = sorted(
+        scores.iteritems(), key=lambda i: (i[1], i[0]), reverse=True
+    )
+    return [object_id for object_id, _ in ranked[:limit]]
+
+
+def get_related_ids(obj, name, rank):
+    """Get the ranked ids of the objects related to `obj`, from the cache
+    if possible.  `name` distinguishes the kinds of related objects, and
+    `rank` computes their ids when they are not cached."""
+    content_type_id = ContentType.objects.get_for_model(obj).pk
+    return caching.get_or_set(
+        RELATED_CACHE_KEY.format(content_type_id, obj.pk, name),
+        rank,
+        settings.RELATED_CONTENT_CACHE_TIMEOUT,
+        tags=[related_cache_tag(content_type_id, obj.pk)],
+    )
+
+
+def in_order(queryset, ids):
+    """The objects of the queryset, ordered as their ids are"""
+    objects = {o.pk: o for o in queryset.filter(pk__in=ids)}
+    return [objects[i] for i in ids if i in objects]
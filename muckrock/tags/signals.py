@@ -0,0 +1,34 @@
+"""Model signal handlers for the tags application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.core import caching
+from muckrock.tags.models import TaggedItemBase
+from muckrock.tags.related import queue_tag_weights_refresh, related_cache_tag
+
+
+def tagged_item_changed(sender, instance, **kwargs):
+    """Invalidate the tagged object's cached suggestions, and refresh the
+    tag weights, when it is tagged or untagged"""
+    # pylint: disable=unused-argument
+    if kwargs.get('raw'):
+        return
+    caching.invalidate_tags(
+        related_cache_tag(instance.content_type_id, instance.object_id)
+    )
+    queue_tag_weights_refresh()
+
+
+post_save.connect(
+    tagged_item_changed,
+    sender=TaggedItemBase,
+    dispatch_uid='muckrock.tags.signals.tagged_item_save',
+)
+
+post_delete.connect(
+    tagged_item_changed,
+    sender=TaggedItemBase,
+    dispatch_uid='muckrock.tags.signals.tagged_item_delete',
+)
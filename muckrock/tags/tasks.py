@@ -0,0 +1,23 @@
+"""
+Celery tasks for the tags application
+"""
+
+# Django
+from celery.task import task
+from django.core.cache import cache
+
+# MuckRock
+from muckrock.tags.related import WEIGHTS_QUEUED_KEY, refresh_tag_weights
+
+
+@task(
+    ignore_result=True,
+    name='muckrock.tags.tasks.refresh_related_tag_weights',
+)
+def refresh_related_tag_weights(**kwargs):
+    """Recompute the tag weights used to rank related content"""
+    # pylint: disable=unused-argument
+    # allow another refresh to be queued if tags change while
+    # this one is running
+    cache.delete(WEIGHTS_QUEUED_KEY)
+    refresh_tag_weights()
@@ -3,14 +3,24 @@ Tests for tags
 """
 # Django
 from django import test
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.test import override_settings
 
 # Third Party
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 
 # MuckRock
+from muckrock.core.factories import ArticleFactory
+from muckrock.news.models import Article
 from muckrock.tags import views
 from muckrock.tags.models import Tag, normalize
+from muckrock.tags.related import (
+    compute_tag_weights,
+    get_tag_weights,
+    tag_scores,
+    top_ids,
+)
 
 
 class TestTagModel(test.TestCase):
@@ -92,3 +102,41 @@ class TestTagDetailView(test.TestCase):
         tag_url = reverse('tag-detail', kwargs={'slug': self.tag_foo.slug})
         response = self.client.get(tag_url)
         eq_(response.status_code, 200)
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestRelated(test.TestCase):
+    """Related content is ranked by the weight of the tags it shares"""
+
+    def setUp(self):
+        cache.clear()
+        self.articles = ArticleFactory.create_batch(3)
+        for article in self.articles:
+            article.tags.add('common')
+        self.articles[0].tags.add('rare')
+
+    def test_tag_weights(self):
+        """Rarer tags should weigh more"""
+        weights = compute_tag_weights()
+        common = Tag.objects.get(name='common')
+        rare = Tag.objects.get(name='rare')
+        eq_(weights[common.pk], 1.0)
+        ok_(weights[rare.pk] > weights[common.pk])
+        eq_(get_tag_weights(), weights)
+
+    def test_rank(self):
+        """Objects sharing more, and rarer, tags should rank higher"""
+        tag_ids = Tag.objects.values_list('pk', flat=True)
+        ids = top_ids(tag_scores(Article, tag_ids), 2)
+        eq_(ids, [self.articles[0].pk, self.articles[2].pk])
+        candidates = Article.objects.filter(pk=self.articles[1].pk)
+        eq_(
+            tag_scores(Article, tag_ids, candidates.values('pk')).keys(),
+            [self.articles[1].pk],
+        )
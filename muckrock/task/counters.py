@@ -0,0 +1,78 @@
+"""
+Cached counts of open tasks, for the staff task list
+
+Each task type's count of unresolved, undeferred tasks is cached under its
+own key.  Saving or deleting a task clears only its own type's count (and
+the total), which is then recounted from that type's table alone on the
+next page load.  Clearing instead of incrementing means counts can not
+drift, and deferred tasks coming due are picked up by expiring all counts
+at midnight.
+"""
+
+# Django
+from django.core.cache import cache
+from django.utils import timezone
+
+# Standard Library
+from datetime import datetime, time, timedelta
+
+# MuckRock
+from muckrock.task import models
+
+COUNTER_KEY = 'task_counter:{}'
+
+# counter name -> task model
+COUNTED_TASKS = {
+    'all': models.Task,
+    'orphan': models.OrphanTask,
+    'snail_mail': models.SnailMailTask,
+    'review_agency': models.ReviewAgencyTask,
+    'flagged': models.FlaggedTask,
+    'projectreview': models.ProjectReviewTask,
+    'new_agency': models.NewAgencyTask,
+    'response': models.ResponseTask,
+    'status_change': models.StatusChangeTask,
+    'crowdfund': models.CrowdfundTask,
+    'multirequest': models.MultiRequestTask,
+    'portal': models.PortalTask,
+}
+
+
+def _seconds_until_midnight():
+    """Deferred tasks come due at midnight, so counts are only valid
+    until then"""
+    now = timezone.localtime(timezone.now())
+    midnight = timezone.make_aware(
+        datetime.combine(now.date() + timedelta(1), time())
+    )
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def get_counts():
+    """Get the count of open tasks for each task type"""
+    keys = {COUNTER_KEY.format(name): name for name in COUNTED_TASKS}
+    counts = {keys[key]: count for key, count in cache.get_many(keys).items()}
+    missing = {}
+    for name, model in COUNTED_TASKS.iteritems():
+        if name not in counts:
+            counts[name] = (
+                model.objects.get_unresolved().get_undeferred().count()
+            )
+            missing[COUNTER_KEY.format(name)] = counts[name]
+    if missing:
+        cache.set_many(missing, _seconds_until_midnight())
+    return counts
+
+
+def clear_count(model):
+    """Clear the count for the given task model, and the total count"""
+    cache.delete_many([
+        COUNTER_KEY.format(name)
+        for name, counted_model in COUNTED_TASKS.iteritems()
+        if counted_model in (model, models.Task)
+    ])
+
+
+def clear_counts():
+    """Clear all of the counts"""
+    cache.delete_many([COUNTER_KEY.format(name) for name in COUNTED_TASKS])
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+# Django
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0031_auto_20180529_1210'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reviewagencytask',
+            name='dossier',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reviewagencytask',
+            name='dossier_datetime',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -6,10 +6,11 @@ Models for the Task application
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import JSONField
+from django.core.cache import cache
 from django.core.mail import EmailMessage
 from django.core.urlresolvers import reverse
 from django.db import models, transaction
-from django.db.models import Case, Count, Max, Prefetch, When
+from django.db.models import Count, F, Max, Prefetch
 from django.db.models.functions import Cast, Now
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -295,11 +296,20 @@ class SnailMailTask(Task):
         return note
 
 
+DOSSIER_QUEUED_KEY = 'review_agency_task:{}:dossier_queued'
+
+
 class ReviewAgencyTask(Task):
     """An agency has had one of its forms of communication have an error
     and new contact information is required"""
     type = 'ReviewAgencyTask'
     agency = models.ForeignKey('agency.Agency')
+    # the review data is expensive to compute, so it is rendered in the
+    # background and stored here
+    dossier = models.TextField(blank=True, editable=False)
+    dossier_datetime = models.DateTimeField(
+        blank=True, null=True, editable=False
+    )
 
     objects = ReviewAgencyTaskQuerySet.as_manager()
 
@@ -309,8 +319,64 @@ class ReviewAgencyTask(Task):
     def get_absolute_url(self):
         return reverse('review-agency-task', kwargs={'pk': self.pk})
 
+    def _get_open_requests(self):
+        """Get the agency's open requests, with what is shown for each"""
+        return (
+            self.agency.foiarequest_set.get_open().select_related(
+                'agency__jurisdiction',
+                'composer',
+                'email',
+                'fax',
+                'portal',
+            ).annotate(
+                latest_response=ExtractDay(
+                    Cast(
+                        Now() - F('datetime_last_response'),
+                        models.DurationField(),
+                    )
+                )
+            )
+        )
+
+    def get_review_requests(self):
+        """Get the open requests for the agency, grouped by where they are
+        sent, for selecting which requests to update.  Unlike the review
+        data, these are always rendered live."""
+        review_requests = []
+        for email_or_fax in ('email', 'fax'):
+            open_requests = (
+                self._get_open_requests().order_by(
+                    '%s__status' % email_or_fax, email_or_fax
+                ).exclude(**{
+                    email_or_fax: None
+                })
+            )
+            for addr, foias in groupby(
+                open_requests, lambda f, e=email_or_fax: getattr(f, e)
+            ):
+                review_requests.append({
+                    'address':
+                        addr,
+                    'error':
+                        addr.status == 'error',
+                    'foias':
+                        list(foias),
+                    'checkbox_name':
+                        'foias-%d-%s-%d' % (self.pk, email_or_fax, addr.pk),
+                })
+        # snail mail
+        foias = list(self._get_open_requests().filter(email=None, fax=None))
+        if foias:
+            review_requests.append({
+                'address': 'Snail Mail',
+                'foias': foias,
+                'checkbox_name': '%d-snail' % self.pk,
+            })
+        return review_requests
+
     def get_review_data(self):
-        """Get all the data on all open requests for the agency"""
+        """Get the error and confirmation stats for each email address and
+        fax number the agency's open requests are sent to"""
         review_data = []
 
         def get_data(email_or_fax):
@@ -324,40 +390,17 @@ class ReviewAgencyTask(Task):
                 error_model = FaxError
                 confirm_rel = 'faxes'
 
-            open_requests = (
-                self.agency.foiarequest_set.get_open().order_by(
-                    '%s__status' % email_or_fax, email_or_fax
-                ).exclude(**{
+            open_counts = (
+                self.agency.foiarequest_set.get_open().exclude(**{
                     email_or_fax: None
-                }).select_related(
-                    'agency__jurisdiction',
-                    'composer',
-                    'email',
-                    'fax',
-                    'portal',
-                ).annotate(
-                    latest_response=ExtractDay(
-                        Cast(
-                            Now() - Max(
-                                Case(
-                                    When(
-                                        communications__response=True,
-                                        then='communications__datetime'
-                                    )
-                                )
-                            ),
-                            models.DurationField(),
-                        )
-                    )
+                }).order_by().values_list(email_or_fax).annotate(
+                    count=Count('pk')
                 )
             )
-            grouped_requests = [
-                (k, list(v)) for k, v in
-                groupby(open_requests, lambda f: getattr(f, email_or_fax))
-            ]
+            open_counts = dict(open_counts)
             # do a seperate query for per email addr/fax number stats
             addresses = (
-                address_model.objects.annotate(
+                address_model.objects.filter(pk__in=open_counts).annotate(
                     error_count=Count('errors', distinct=True),
                     last_error=Max('errors__datetime'),
                     last_confirm=Max('%s__confirmed_datetime' % confirm_rel),
@@ -369,18 +412,15 @@ class ReviewAgencyTask(Task):
                             email_or_fax
                         ).order_by('-datetime')
                     )
-                )
+                ).order_by('status', 'pk')
             )
             if email_or_fax == 'email':
                 addresses = addresses.annotate(
                     last_open=Max('opens__datetime'),
                 )
-            addresses = addresses.in_bulk(g[0].pk for g in grouped_requests)
 
             review_data = []
-            for addr, foias in grouped_requests:
-                # fetch the address with the annotated stats
-                addr = addresses[addr.pk]
+            for addr in addresses:
                 review_data.append({
                     'address':
                         addr,
@@ -388,8 +428,8 @@ class ReviewAgencyTask(Task):
                         addr.status == 'error',
                     'errors':
                         addr.errors.all()[:5],
-                    'foias':
-                        foias,
+                    'num_open_requests':
+                        open_counts[addr.pk],
                     'total_errors':
                         addr.error_count,
                     'last_error':
@@ -398,8 +438,6 @@ class ReviewAgencyTask(Task):
                         addr.last_confirm,
                     'last_open':
                         addr.last_open if email_or_fax == 'email' else None,
-                    'checkbox_name':
-                        'foias-%d-%s-%d' % (self.pk, email_or_fax, addr.pk),
                     'email_or_fax':
                         email_or_fax,
                 })
@@ -407,39 +445,6 @@ class ReviewAgencyTask(Task):
 
         review_data.extend(get_data('email'))
         review_data.extend(get_data('fax'))
-        # snail mail
-        foias = list(
-            self.agency.foiarequest_set.get_open().filter(
-                email=None, fax=None
-            ).select_related(
-                'agency__jurisdiction',
-                'composer',
-                'email',
-                'fax',
-                'portal',
-            ).annotate(
-                latest_response=ExtractDay(
-                    Cast(
-                        Now() - Max(
-                            Case(
-                                When(
-                                    communications__response=True,
-                                    then='communications__datetime'
-                                )
-                            )
-                        ),
-                        models.DurationField(),
-                    )
-                )
-            )
-        )
-        if foias:
-            review_data.append({
-                'address': 'Snail Mail',
-                'foias': foias,
-                'checkbox_name': '%d-snail' % self.pk,
-            })
-
         return review_data
 
     def update_contact(self, email_or_fax, foia_list, update_info, snail):
@@ -509,10 +514,47 @@ class ReviewAgencyTask(Task):
         """Returns the latest response from the agency"""
         return (
             self.agency.foiarequest_set.aggregate(
-                max_date=Max('communications__datetime')
+                max_date=Max('datetime_last_response')
             )['max_date']
         )
 
+    def update_dossier(self):
+        """Render the review data and store it as the dossier"""
+        latest_response = self.latest_response()
+        if latest_response:
+            latest_response = (
+                latest_response,
+                (timezone.now() - latest_response).days,
+            )
+        dossier = render_to_string(
+            'task/review_agency_dossier.html', {
+                'task': self,
+                'num_open_requests':
+                    self.agency.foiarequest_set.get_open().count(),
+                'latest_response': latest_response,
+                'review_data': self.get_review_data(),
+            }
+        )
+        self.dossier = dossier
+        self.dossier_datetime = timezone.now()
+        ReviewAgencyTask.objects.filter(pk=self.pk).update(
+            dossier=self.dossier,
+            dossier_datetime=self.dossier_datetime,
+        )
+
+    def queue_dossier_update(self):
+        """Update the dossier in the background, once the current
+        transaction commits, unless an update is already queued"""
+        from muckrock.task.tasks import update_review_agency_dossier
+
+        def queue():
+            """Only mark the update as queued once it is, so a rolled back
+            transaction can not block later updates"""
+            if cache.add(DOSSIER_QUEUED_KEY.format(self.pk), True, 5 * 60):
+                update_review_agency_dossier.delay(self.pk)
+
+        transaction.on_commit(queue)
+
 
 class FlaggedTask(Task):
     """A user has flagged a request, agency or jurisdiction"""
@@ -907,10 +949,12 @@ class StaleAgencyTask(Task):
 
     def latest_response(self):
         """Returns the latest response from the agency"""
-        foias = self.agency.foiarequest_set.all()
-        comms = [c for f in foias for c in f.communications.all() if c.response]
-        if len(comms) > 0:
-            return max(comms, key=lambda x: x.datetime)
+        foia = (
+            self.agency.foiarequest_set.exclude(datetime_last_response=None)
+            .order_by('-datetime_last_response').first()
+        )
+        if foia is not None:
+            return foia.last_response()
         else:
             return None
 
@@ -4,10 +4,11 @@ Custom QuerySets for the Task application
 
 # Django
 from django.db import models
-from django.db.models import F, Prefetch, Q, Sum
+from django.db.models import F, IntegerField, Prefetch, Q, Sum, Value
 from django.db.models.functions import Cast, Now
 
 # Standard Library
+from collections import defaultdict
 from datetime import date
 
 # MuckRock
@@ -33,41 +34,52 @@ class TaskQuerySet(models.QuerySet):
         Get tasks that relate to the provided FOIA request.
         If user is staff, get all tasks.
         For all users, get new agency task.
+
+        A single union query finds which task types have matching tasks,
+        so only those types need to be loaded with their relations.
         """
-        tasks = []
-        # tasks that point to a communication
-        communication_task_types = [
-            task.models.ResponseTask,
-            task.models.SnailMailTask,
-            task.models.PortalTask,
-        ]
-        if user.is_staff:
-            for task_type in communication_task_types:
-                tasks += list(
-                    task_type.objects.filter(communication__foia=foia)
-                    .preload_list()
-                )
-        # tasks that point to a foia
-        foia_task_types = [
-            task.models.FlaggedTask,
-            task.models.StatusChangeTask,
-        ]
+        task_types = []
         if user.is_staff:
-            for task_type in foia_task_types:
-                tasks += list(
-                    task_type.objects.filter(foia=foia).preload_list()
-                )
+            # tasks that point to a communication
+            task_types.extend([
+                (task.models.ResponseTask, Q(communication__foia=foia)),
+                (task.models.SnailMailTask, Q(communication__foia=foia)),
+                (task.models.PortalTask, Q(communication__foia=foia)),
+            ])
+            # tasks that point to a foia
+            task_types.extend([
+                (task.models.FlaggedTask, Q(foia=foia)),
+                (task.models.StatusChangeTask, Q(foia=foia)),
+            ])
         # tasks that point to an agency
         if foia.agency:
-            tasks += list(
-                task.models.NewAgencyTask.objects.filter(agency=foia.agency)
-                .preload_list()
+            task_types.append(
+                (task.models.NewAgencyTask, Q(agency=foia.agency))
             )
         if foia.agency and user.is_staff:
-            tasks += list(
-                task.models.ReviewAgencyTask.objects.filter(agency=foia.agency)
-                .preload_list()
+            task_types.append(
+                (task.models.ReviewAgencyTask, Q(agency=foia.agency))
             )
+        if not task_types:
+            return []
+
+        queries = [
+            task_type.objects.filter(query).order_by().annotate(
+                task_type=Value(i, output_field=IntegerField())
+            ).values_list('pk', 'task_type')
+            for i, (task_type, query) in enumerate(task_types)
+        ]
+        task_pks = defaultdict(list)
+        for pk, i in queries[0].union(*queries[1:], all=True):
+            task_pks[i].append(pk)
+
+        tasks = []
+        for i, (task_type, _) in enumerate(task_types):
+            if task_pks[i]:
+                tasks += list(
+                    task_type.objects.filter(pk__in=task_pks[i])
+                    .preload_list()
+                )
         return tasks
 
     def get_undeferred(self):
@@ -330,13 +342,15 @@ class ReviewAgencyTaskQuerySet(TaskQuerySet):
         """Ensure exactly one model exists in the database as specified"""
         try:
             task_, _ = self.get_or_create(**kwargs)
-            return task_
         except task.models.ReviewAgencyTask.MultipleObjectsReturned:
             # if there are multiples, delete all but the first one
             # then try again
             to_delete = self.filter(**kwargs).order_by('date_created')[1:]
             self.filter(pk__in=to_delete).delete()
-            self.ensure_one_created(**kwargs)
+            return self.ensure_one_created(**kwargs)
+        # the agency has a new problem, so its review data has changed
+        task_.queue_dossier_update()
+        return task_
 
 
 class ResponseTaskQuerySet(TaskQuerySet):
@@ -1,18 +1,20 @@
 """Signals for the task application"""
 # Django
 from django.core.urlresolvers import reverse
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
 # Standard Library
 import logging
 
 # MuckRock
 from muckrock.message.tasks import slack
+from muckrock.task.counters import clear_count
 from muckrock.task.models import (
     BlacklistDomain,
     FlaggedTask,
     OrphanTask,
     ProjectReviewTask,
+    Task,
 )
 
 logger = logging.getLogger(__name__)
@@ -153,6 +155,11 @@ def notify_project(sender, instance, created, **kwargs):
     slack.delay(payload)
 
 
+def clear_task_count(sender, **kwargs):
+    """Clear the cached open task count when a task changes"""
+    clear_count(sender)
+
+
 post_save.connect(
     domain_blacklist,
     sender=OrphanTask,
@@ -168,3 +175,17 @@ post_save.connect(
     sender=ProjectReviewTask,
     dispatch_uid='muckrock.task.signals.notify_project'
 )
+
+for task_model in [Task] + Task.__subclasses__():
+    post_save.connect(
+        clear_task_count,
+        sender=task_model,
+        dispatch_uid='muckrock.task.signals.clear_task_count_save.{}'
+        .format(task_model.__name__),
+    )
+    post_delete.connect(
+        clear_task_count,
+        sender=task_model,
+        dispatch_uid='muckrock.task.signals.clear_task_count_delete.{}'
+        .format(task_model.__name__),
+    )
@@ -3,9 +3,11 @@ Celery tasks for the task application
 """
 
 # Django
-from celery.task import task
+from celery.schedules import crontab
+from celery.task import periodic_task, task
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.utils import timezone
 
@@ -22,8 +24,13 @@ from PyPDF2.utils import PdfReadError
 # MuckRock
 from muckrock.communication.models import MailCommunication
 from muckrock.foia.models import FOIACommunication, FOIARequest
+from muckrock.task.counters import clear_counts, get_counts
 from muckrock.task.filters import SnailMailTaskFilterSet
-from muckrock.task.models import SnailMailTask
+from muckrock.task.models import (
+    DOSSIER_QUEUED_KEY,
+    ReviewAgencyTask,
+    SnailMailTask,
+)
 from muckrock.task.pdf import CoverPDF, SnailMailPDF
 
 
@@ -45,6 +52,25 @@ def submit_review_update(foia_pks, reply_text, **kwargs):
         foia.submit(switch=True)
 
 
+@task(
+    ignore_result=True,
+    name='muckrock.task.tasks.update_review_agency_dossier',
+)
+def update_review_agency_dossier(task_pk, **kwargs):
+    """Compute the review data for a review agency task"""
+    # pylint: disable=unused-argument
+    # allow another update to be queued if something changes while
+    # this one is running
+    cache.delete(DOSSIER_QUEUED_KEY.format(task_pk))
+    try:
+        review_task = (
+            ReviewAgencyTask.objects.select_related('agency').get(pk=task_pk)
+        )
+    except ReviewAgencyTask.DoesNotExist:
+        return
+    review_task.update_dossier()
+
+
 @task(ignore_result=True, name='muckrock.task.tasks.snail_mail_bulk_pdf_task')
 def snail_mail_bulk_pdf_task(pdf_name, get, **kwargs):
     """Save a PDF file for all open snail mail tasks"""
@@ -128,3 +154,13 @@ def snail_mail_bulk_pdf_task(pdf_name, get, **kwargs):
     key.key = pdf_name
     key.set_contents_from_file(bulk_pdf)
     key.set_canned_acl('public-read')
+
+
+@periodic_task(
+    run_every=crontab(hour=0, minute=1),
+    name='muckrock.task.tasks.reconcile_task_counts',
+)
+def reconcile_task_counts():
+    """Recount the open tasks once deferred tasks have come due"""
+    clear_counts()
+    get_counts()
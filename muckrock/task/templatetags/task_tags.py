@@ -5,7 +5,6 @@ Nodes and tags for rendering tasks into templates
 # Django
 from django import template
 from django.core.urlresolvers import reverse
-from django.utils import timezone
 
 # MuckRock
 from muckrock import agency, foia, task
@@ -302,15 +301,11 @@ class ReviewAgencyTaskNode(TaskNode):
         extra_context['addresses'] = [
             str(a) for a in self.task.agency.agencyaddress_set.all()
         ]
-        extra_context['num_open_requests'
-                      ] = (self.task.agency.foiarequest_set.get_open().count())
-        latest_response = self.task.latest_response()
-        if latest_response:
-            extra_context['latest_response'] = (
-                latest_response,
-                (timezone.now() - latest_response).days,
-            )
-        extra_context['review_data'] = self.task.get_review_data()
+        # the review data is rendered in the background
+        if self.task.dossier_datetime is None:
+            self.task.queue_dossier_update()
+        # the requests to update are rendered live, so they are never stale
+        extra_context['review_requests'] = self.task.get_review_requests()
         email = [
             e.email
             for e in self.task.agency.agencyemail_set.all()
@@ -0,0 +1,52 @@
+"""
+Tests for the cached task counters
+"""
+
+# Django
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+# Standard Library
+from datetime import date, timedelta
+
+# Third Party
+from nose.tools import eq_
+
+# MuckRock
+from muckrock.task.counters import get_counts
+from muckrock.task.factories import FlaggedTaskFactory, ResponseTaskFactory
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+)
+class TestTaskCounters(TestCase):
+    """Test the cached task counters"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_counts(self):
+        """Counts should stay correct as tasks are created, resolved and
+        deferred"""
+        flagged_task = FlaggedTaskFactory()
+        response_tasks = ResponseTaskFactory.create_batch(2)
+        counts = get_counts()
+        eq_(counts['all'], 3)
+        eq_(counts['flagged'], 1)
+        eq_(counts['response'], 2)
+        eq_(counts['orphan'], 0)
+
+        flagged_task.resolve()
+        response_tasks[0].defer(date.today() + timedelta(1))
+        FlaggedTaskFactory()
+        FlaggedTaskFactory()
+        counts = get_counts()
+        eq_(counts['all'], 3)
+        eq_(counts['flagged'], 2)
+        eq_(counts['response'], 1)
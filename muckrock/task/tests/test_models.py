@@ -3,8 +3,10 @@ Tests for Tasks models
 """
 
 # Django
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.utils import timezone
 
 # Standard Library
@@ -30,17 +32,20 @@ from muckrock.jurisdiction.factories import StateJurisdictionFactory
 from muckrock.task.factories import FlaggedTaskFactory, ProjectReviewTaskFactory
 from muckrock.task.forms import ResponseTaskForm
 from muckrock.task.models import (
+    DOSSIER_QUEUED_KEY,
     BlacklistDomain,
     FlaggedTask,
     MultiRequestTask,
     NewAgencyTask,
     OrphanTask,
     ResponseTask,
+    ReviewAgencyTask,
     SnailMailTask,
     StatusChangeTask,
     Task,
 )
 from muckrock.task.signals import domain_blacklist
+from muckrock.task.tasks import update_review_agency_dossier
 
 mock_send = mock.Mock()
 
@@ -226,6 +231,47 @@ class FlaggedTaskTests(TestCase):
         mock_support.assert_called_with(flagged_task.user, reply, flagged_task)
 
 
+class ReviewAgencyTaskTests(TestCase):
+    """Test the ReviewAgencyTask class"""
+
+    def setUp(self):
+        self.foia = FOIARequestFactory(status='ack')
+        self.task = ReviewAgencyTask.objects.create(agency=self.foia.agency)
+
+    def test_update_dossier(self):
+        """The dossier should contain only the agency's review stats"""
+        update_review_agency_dossier(self.task.pk)
+        self.task.refresh_from_db()
+        ok_(self.task.dossier_datetime)
+        ok_('Total Open Requests' in self.task.dossier)
+        ok_('type="checkbox"' not in self.task.dossier)
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+    )
+    @mock.patch('muckrock.task.tasks.update_review_agency_dossier.delay')
+    def test_queue_dossier_update(self, mock_delay):
+        """The update should only be marked as queued once the transaction
+        commits, so a rollback does not block later updates"""
+        self.task.queue_dossier_update()
+        eq_(cache.get(DOSSIER_QUEUED_KEY.format(self.task.pk)), None)
+        ok_(not mock_delay.called)
+
+    def test_get_review_requests(self):
+        """The review requests should contain the agency's open requests"""
+        FOIARequestFactory(agency=self.foia.agency, status='done')
+        foias = [
+            foia
+            for data in self.task.get_review_requests()
+            for foia in data['foias']
+        ]
+        eq_(foias, [self.foia])
+
+
 @mock.patch('muckrock.message.notifications.SlackNotification.send', mock_send)
 class ProjectReviewTaskTests(TestCase):
     """
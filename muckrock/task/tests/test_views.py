@@ -4,6 +4,7 @@ Tests for Tasks views
 # Django
 from django.core.urlresolvers import reverse
 from django.test import Client, RequestFactory, TestCase
+from django.utils import timezone
 
 # Standard Library
 import logging
@@ -36,12 +37,14 @@ from muckrock.task.models import (
     BlacklistDomain,
     NewAgencyTask,
     OrphanTask,
+    ReviewAgencyTask,
     SnailMailTask,
 )
 from muckrock.task.views import (
     FlaggedTaskList,
     ProjectReviewTaskList,
     ResponseTaskList,
+    ReviewAgencyTaskList,
     TaskList,
 )
 
@@ -727,3 +730,36 @@ class ResponseTaskListViewTests(TestCase):
             foia.communications.count(), num_comms,
             'The number of communications should not have changed from before.'
         )
+
+
+class ReviewAgencyTaskViewTests(TestCase):
+    """Review agency tasks are rendered from their dossiers"""
+
+    def setUp(self):
+        self.url = reverse('review-agency-task-list')
+        self.view = ReviewAgencyTaskList.as_view()
+        self.user = UserFactory(is_staff=True)
+        self.task = ReviewAgencyTask.objects.create(agency=AgencyFactory())
+
+    @mock.patch('muckrock.task.models.ReviewAgencyTask.get_review_data')
+    def test_render_dossier(self, mock_get_review_data):
+        """The review data should not be computed while rendering"""
+        self.task.dossier = 'Precomputed dossier'
+        self.task.dossier_datetime = timezone.now()
+        self.task.save()
+        response = http_get_response(self.url, self.view, self.user)
+        response.render()
+        ok_('Precomputed dossier' in response.content)
+        ok_(not mock_get_review_data.called)
+
+    @mock.patch('muckrock.task.models.ReviewAgencyTask.queue_dossier_update')
+    def test_refresh(self, mock_queue):
+        """The refresh button should queue a new dossier"""
+        http_post_response(
+            self.url,
+            self.view,
+            {'task': self.task.pk,
+             'refresh_dossier': 'true'},
+            self.user,
+        )
+        mock_queue.assert_called_once_with()
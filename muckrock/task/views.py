@@ -10,7 +10,6 @@ from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
 from django.core.urlresolvers import resolve
 from django.db import transaction
-from django.db.models import Count
 from django.http import (
     Http404,
     HttpResponse,
@@ -38,6 +37,7 @@ from muckrock.agency.models import Agency
 from muckrock.communication.models import MailCommunication, PortalCommunication
 from muckrock.core.views import MRFilterListView, class_view_decorator
 from muckrock.foia.models import STATUS, FOIARequest
+from muckrock.task.counters import get_counts
 from muckrock.task.filters import (
     FlaggedTaskFilterSet,
     NewAgencyTaskFilterSet,
@@ -74,27 +74,6 @@ from muckrock.task.pdf import SnailMailPDF
 from muckrock.task.tasks import snail_mail_bulk_pdf_task, submit_review_update
 
 
-def count_tasks():
-    """Counts all unresolved tasks and adds them to a dictionary"""
-    count = (
-        Task.objects.get_unresolved().get_undeferred().aggregate(
-            all=Count('id'),
-            orphan=Count('orphantask'),
-            snail_mail=Count('snailmailtask'),
-            review_agency=Count('reviewagencytask'),
-            flagged=Count('flaggedtask'),
-            projectreview=Count('projectreviewtask'),
-            new_agency=Count('newagencytask'),
-            response=Count('responsetask'),
-            status_change=Count('statuschangetask'),
-            crowdfund=Count('crowdfundtask'),
-            multirequest=Count('multirequesttask'),
-            portal=Count('portaltask'),
-        )
-    )
-    return count
-
-
 class TaskList(MRFilterListView):
     """List of tasks"""
     title = 'Tasks'
@@ -135,7 +114,7 @@ class TaskList(MRFilterListView):
     def get_context_data(self, **kwargs):
         """Adds counters for each of the sections and for processing requests."""
         context = super(TaskList, self).get_context_data(**kwargs)
-        context['counters'] = count_tasks()
+        context['counters'] = get_counts()
         context['bulk_actions'] = self.bulk_actions
         context['processing_count'] = FOIARequest.objects.filter(
             status='submitted'
@@ -305,6 +284,7 @@ class ReviewAgencyTaskList(TaskList):
                 snail = form.cleaned_data['snail_mail']
                 with transaction.atomic():
                     task.update_contact(email_or_fax, foias, update_info, snail)
+                    task.queue_dossier_update()
                     # ensure th eupdated contact information is commited to the
                     # database before trying to re-submit
                     if form.cleaned_data['reply']:
@@ -326,6 +306,14 @@ class ReviewAgencyTaskList(TaskList):
                     'snail mail is not checked',
                 )
                 return
+        elif request.POST.get('refresh_dossier'):
+            task.queue_dossier_update()
+            messages.success(
+                request,
+                'The review data is being refreshed.  Reload the page in a '
+                'moment to see it.',
+            )
+            return
         return super(ReviewAgencyTaskList, self).task_post_helper(request, task)
 
 